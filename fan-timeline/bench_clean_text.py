@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark utils.clean_text / clean_texts against the original chained regex cleaner.
+Usage: python bench_clean_text.py --n 1000000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.utils import clean_text, clean_texts, CLEAN_RE, URL_RE, CODE_RE, QUOTE_RE
+
+BODIES = [
+    "LeBron is absolutely cooking tonight! 🔥",
+    "This defense is suffocating them",
+    "Refs are missing obvious calls",
+    "Who's watching this one?",
+    "Let's get this W!",
+    "Can't buy a bucket right now",
+    "Great ball movement,   beautiful basketball",
+    "clip: https://streamable.com/abc123",
+    "> refs are fine\nno they are not",
+    "he said `ball don't lie` lol",
+]
+
+def reference_clean_text(s: str) -> str:
+    """The original four-pass implementation."""
+    s = URL_RE.sub("", s)
+    s = CODE_RE.sub("", s)
+    s = QUOTE_RE.sub("", s)
+    s = s.replace("\u00a0", " ")
+    s = CLEAN_RE.sub(" ", s).strip()
+    return s
+
+def timed(label: str, fn, n: int) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:>8.2f}s {n / elapsed:>14,.0f} comments/s")
+    return elapsed
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=1_000_000, help="Number of synthetic comments")
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    texts = [rng.choice(BODIES) + f" #{i}" for i in range(args.n)]
+    print(f"Cleaning {args.n:,} synthetic comments "
+          f"({sum('http' in t or '`' in t or '>' in t for t in texts) / args.n:.0%} need a regex pass)\n")
+
+    base = timed("reference (4 regex passes)", lambda: [reference_clean_text(t) for t in texts], args.n)
+    single = timed("clean_text", lambda: [clean_text(t) for t in texts], args.n)
+    batch = timed("clean_texts (batch)", lambda: clean_texts(texts), args.n)
+
+    assert clean_texts(texts) == [reference_clean_text(t) for t in texts]
+    print(f"\nSpeedup: clean_text {base / single:.1f}x, clean_texts {base / batch:.1f}x (outputs identical)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark request decoding for a large thread, from raw body bytes to the
+comment and PBP dicts the pipeline takes: JSON-in-JSON string fields (the
+original request shape), the typed JSON body, and the NDJSON upload plain
+and gzipped (fed in 64KB chunks, as the server receives it).
+Usage: python bench_decode.py --comments 20000
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from bench_serve import LegacyRequest, legacy_payload, make_payload
+from timeline.serve import TimelineRequest, read_upload, request_inputs
+
+CHUNK = 64 * 1024
+
+def reference_decode(body: bytes):
+    """The original path: FastAPI parses the body, then each string field is parsed again."""
+    request = LegacyRequest.model_validate(json.loads(body))
+    return json.loads(request.reddit_thread_json), json.loads(request.pbp_json)
+
+def typed_decode(body: bytes):
+    """What FastAPI does for the typed body: one parse, then validation."""
+    return request_inputs(TimelineRequest.model_validate(json.loads(body)))
+
+def upload_decode(body: bytes, gzipped: bool):
+    async def chunks():
+        for i in range(0, len(body), CHUNK):
+            yield body[i:i + CHUNK]
+    header, comments = asyncio.run(read_upload(chunks(), gzipped))
+    return comments, header.pbp
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--comments", type=int, default=20_000, help="Comments in the thread")
+    ap.add_argument("--repeat", type=int, default=5, help="Runs per variant (best is reported)")
+    args = ap.parse_args()
+
+    payload = make_payload(args.comments)
+    header = {"game_id": payload["game_id"], "pbp": payload["pbp"], "start_utc": payload["start_utc"]}
+    ndjson = "".join(json.dumps(obj) + "\n" for obj in [header] + payload["comments"]).encode()
+    bodies = {
+        "json-in-json strings": json.dumps(legacy_payload(payload)).encode(),
+        "typed JSON body": json.dumps(payload).encode(),
+        "NDJSON upload": ndjson,
+        "gzip NDJSON upload": gzip.compress(ndjson),
+    }
+    decoders = {
+        "json-in-json strings": reference_decode,
+        "typed JSON body": typed_decode,
+        "NDJSON upload": lambda b: upload_decode(b, False),
+        "gzip NDJSON upload": lambda b: upload_decode(b, True),
+    }
+
+    print(f"{args.comments:,} comments, {len(payload['pbp'])} PBP events\n")
+    t_ref = None
+    for name, body in bodies.items():
+        (comments, pbp), t = timed(lambda: decoders[name](body), args.repeat)
+        assert comments == payload["comments"] and pbp == payload["pbp"]
+        t_ref = t_ref or t
+        print(f"{name:<22} {len(body) / 1e6:>6.2f}MB {t * 1e3:>8.1f} ms ({t_ref / t:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark module import time with `python -X importtime`, optionally against an
+older revision of this directory (e.g. before lazy loading in teacher.py).
+Usage: python bench_import.py
+       python bench_import.py --ref HEAD~1 --modules timeline.teacher timeline.make_sft
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+
+DEFAULT_MODULES = [
+    "timeline.teacher",
+    "timeline.make_sft",
+    "timeline.serve",
+    "test_run_pipeline",
+    "test_setup",
+]
+
+def import_time(root: Path, module: str, repeats: int):
+    """(cumulative importtime µs, wall ms) for `import module`, best of `repeats`; None on failure."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(root / "src"), str(root)])}
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              cwd=root, env=env, capture_output=True, text=True)
+        wall = (time.perf_counter() - start) * 1000
+        if proc.returncode != 0:
+            return None
+        # Last line for the module itself: "import time: self | cumulative | name"
+        cumulative = next(int(line.split("|")[1]) for line in reversed(proc.stderr.splitlines())
+                          if line.startswith("import time:") and line.split("|")[2].strip() == module)
+        if best is None or cumulative < best[0]:
+            best = (cumulative, wall)
+    return best
+
+def checkout(ref: str, dest: Path) -> Path:
+    """Extract this directory as of `ref` into dest."""
+    top = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=HERE,
+                         capture_output=True, text=True, check=True).stdout.strip()
+    archive = dest / "ref.tar"
+    subprocess.run(["git", "archive", "--format=tar", "-o", str(archive),
+                    f"{ref}:{HERE.relative_to(top).as_posix()}"], cwd=top, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(dest / "tree")
+    return dest / "tree"
+
+def fmt(result) -> str:
+    return f"{'ImportError':>12} {'':>9}" if result is None else f"{result[0] / 1000:>10.1f}ms {result[1]:>7.0f}ms"
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    ap.add_argument("--ref", help="Also time this git revision, e.g. HEAD~1")
+    ap.add_argument("--repeats", type=int, default=5)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_root = checkout(args.ref, Path(tmp)) if args.ref else None
+        header = f"{'module':<22} {'import':>12} {'process':>9}"
+        if old_root:
+            header += f"   {args.ref + ' import':>12} {'process':>9}"
+        print(header)
+        for module in args.modules:
+            line = f"{module:<22} {fmt(import_time(HERE, module, args.repeats))}"
+            if old_root:
+                line += f"   {fmt(import_time(old_root, module, args.repeats))}"
+            print(line)
+
+if __name__ == "__main__":
+    main()
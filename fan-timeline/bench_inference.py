@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark the micro-batching inference engine: windows/sec and per-window
+latency vs max batch size, with concurrent clients each sending one window
+at a time (as API requests do). max_batch=1 is the old one-prompt-per-
+generate path. Then one game: window-by-window calls vs all windows
+streamed through the engine as /v1/timeline/game does.
+
+Uses --model_path if given, else a tiny random GPT-2 on CPU when torch is
+installed, else a simulated model whose batch costs --step_ms plus
+--per_prompt_ms per prompt (decode-bound generation: a batch costs little
+more than one prompt until the device saturates).
+Usage: python bench_inference.py --clients 16 --windows 96 --batches 1 4 8 16
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.inference import BatchEngine, HFGenerator, stream_completions
+
+WORDS = "what a shot refs are blind lets go defense asleep mvp dunk clutch bench so good".split()
+
+def tiny_model():
+    """A 2-layer random GPT-2 with an in-memory word tokenizer (no downloads)."""
+    import torch
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+    vocab = {"[PAD]": 0, "[EOS]": 1, "[UNK]": 2, **{w: i + 3 for i, w in enumerate(WORDS)}}
+    backend = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=backend, pad_token="[PAD]", eos_token="[EOS]",
+                                        unk_token="[UNK]")
+    torch.manual_seed(0)
+    config = GPT2Config(vocab_size=len(vocab), n_positions=256, n_embd=64, n_layer=2, n_head=2,
+                        bos_token_id=1, eos_token_id=1, pad_token_id=0)
+    return GPT2LMHeadModel(config).eval(), tokenizer
+
+class SimulatedModel:
+    def __init__(self, step_ms: float, per_prompt_ms: float):
+        self.step = step_ms / 1000
+        self.per_prompt = per_prompt_ms / 1000
+        self.lock = threading.Lock()  # one device
+
+    def __call__(self, prompts):
+        with self.lock:
+            time.sleep(self.step + self.per_prompt * len(prompts))
+        return ['{"timeline": []}'] * len(prompts)
+
+def make_generator(args):
+    if args.model_path:
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        model = AutoModelForCausalLM.from_pretrained(args.model_path).eval()
+        tokenizer = AutoTokenizer.from_pretrained(args.model_path)
+        return HFGenerator(model, tokenizer, max_new_tokens=args.new_tokens, do_sample=False), args.model_path
+    try:
+        model, tokenizer = tiny_model()
+    except ImportError:
+        return (SimulatedModel(args.step_ms, args.per_prompt_ms),
+                f"simulated ({args.step_ms:g}ms/batch + {args.per_prompt_ms:g}ms/prompt)")
+    return HFGenerator(model, tokenizer, max_new_tokens=args.new_tokens, do_sample=False), "tiny GPT-2 (CPU)"
+
+def prompts_for(n: int):
+    return [" ".join(WORDS[(i + j) % len(WORDS)] for j in range(8 + i % 24)) for i in range(n)]
+
+def run(generator, prompts, clients: int, max_batch: int, max_wait_ms: float):
+    latencies = []
+    with BatchEngine(generator, max_batch=max_batch, max_wait_ms=max_wait_ms) as engine:
+        def one(prompt):
+            t = time.perf_counter()
+            engine.generate(prompt)
+            latencies.append(time.perf_counter() - t)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(clients) as pool:
+            list(pool.map(one, prompts))
+        elapsed = time.perf_counter() - start
+    return latencies, elapsed, engine.stats
+
+def run_game(generator, prompts, max_batch: int, max_wait_ms: float):
+    """One game, one window at a time (client round-trips) vs streamed in one call."""
+    with BatchEngine(generator, max_batch=max_batch, max_wait_ms=max_wait_ms) as engine:
+        start = time.perf_counter()
+        for prompt in prompts:
+            engine.generate(prompt)
+        sequential = time.perf_counter() - start
+
+        async def stream():
+            first = None
+            start = time.perf_counter()
+            async for _ in stream_completions(engine, prompts):
+                first = first or time.perf_counter() - start
+            return first, time.perf_counter() - start
+        first, streamed = asyncio.run(stream())
+    return sequential, first, streamed
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] * 1000
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model_path", help="Causal LM to benchmark (default: tiny random GPT-2)")
+    ap.add_argument("--clients", type=int, default=16, help="Concurrent clients")
+    ap.add_argument("--windows", type=int, default=96, help="Windows to generate (48 per game)")
+    ap.add_argument("--batches", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="max_batch values")
+    ap.add_argument("--max_wait_ms", type=float, default=10.0, help="Engine max wait")
+    ap.add_argument("--new_tokens", type=int, default=32, help="Tokens generated per window")
+    ap.add_argument("--step_ms", type=float, default=120.0, help="Simulated cost per batch")
+    ap.add_argument("--per_prompt_ms", type=float, default=8.0, help="Simulated cost per prompt in a batch")
+    args = ap.parse_args()
+
+    generator, name = make_generator(args)
+    prompts = prompts_for(args.windows)
+    generator(prompts[:2])  # warm-up
+    print(f"{name}: {args.windows} windows, {args.clients} clients, max wait {args.max_wait_ms:g}ms\n")
+    print(f"{'max_batch':>9} {'windows/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'avg batch':>10}")
+    for max_batch in args.batches:
+        latencies, elapsed, stats = run(generator, prompts, args.clients, max_batch, args.max_wait_ms)
+        print(f"{max_batch:>9} {args.windows / elapsed:>10.1f} {pct(latencies, 0.5):>9.1f} "
+              f"{pct(latencies, 0.99):>9.1f} {stats['prompts'] / stats['batches']:>10.1f}")
+
+    # One 48-window game: per-window calls vs the whole game streamed (/v1/timeline/game)
+    max_batch = max(args.batches)
+    sequential, first, streamed = run_game(generator, prompts[:48], max_batch, args.max_wait_ms)
+    print(f"\n48-window game, max_batch {max_batch}:")
+    print(f"{'window by window':<22} {sequential * 1000:>9.1f} ms")
+    print(f"{'streamed in one call':<22} {streamed * 1000:>9.1f} ms (first window after {first * 1000:.1f} ms)")
+
+if __name__ == "__main__":
+    main()
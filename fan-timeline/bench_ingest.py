@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark Reddit ingest: whole-file loader vs streaming pipeline.
+Each run happens in a fresh subprocess so peak RSS is measured per mode.
+Usage: python bench_ingest.py --sizes 10000 50000 200000
+"""
+
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+BODIES = [
+    "LeBron is absolutely cooking tonight! 🔥",
+    "Refs are missing obvious calls https://streamable.com/abc123",
+    "> this\nis exactly what we needed",
+    "Can't buy a bucket right now",
+    "`code` Luka with the step-back three!!!",
+]
+
+def make_thread(path: Path, n_comments: int):
+    """Write a fetched-thread JSON file with `n_comments` comments.
+
+    Comments are written one at a time so this process stays small; a forked
+    worker otherwise inherits the parent's peak RSS.
+    """
+    rng = random.Random(0)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"game_id": "bench", "submission": {"id": "bench"}, "comments": [\n')
+        for i in range(n_comments):
+            comment = {
+                "id": f"c{i}",
+                "body": rng.choice(BODIES) + f" #{i}",
+                "created_utc": 1575249600 + i // 10,
+                "score": rng.randint(-5, 200),
+                "author": f"user_{rng.randint(1, 5000)}",
+                "subreddit": "nba",
+            }
+            f.write(("," if i else "") + json.dumps(comment, ensure_ascii=False) + "\n")
+        f.write("]}\n")
+
+def worker(mode: str, infile: str, outfile: str):
+    """Run one ingest in this process and print timing + peak RSS as JSON."""
+    from timeline.ingest_reddit import process_file
+    import contextlib, io
+
+    start = time.perf_counter()
+    n = 0
+    if mode != "baseline":
+        with contextlib.redirect_stdout(io.StringIO()):
+            process_file(Path(infile), Path(outfile), stream=(mode == "stream"))
+        n = sum(1 for _ in open(outfile, encoding="utf-8"))
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+    print(json.dumps({"seconds": elapsed, "comments": n, "peak_rss_mb": rss_mb}))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 200000])
+    ap.add_argument("--_worker", nargs=3, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args._worker:
+        worker(*args._worker)
+        return
+
+    def run(mode: str, infile: Path, outfile: Path) -> dict:
+        result = subprocess.run(
+            [sys.executable, __file__, "--_worker", mode, str(infile), str(outfile)],
+            check=True, capture_output=True, text=True)
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Peak RSS of an interpreter that only imports the ingest module
+        baseline = run("baseline", Path(tmp) / "none", Path(tmp) / "none")["peak_rss_mb"]
+        print(f"Interpreter baseline peak RSS: {baseline:.1f} MB\n")
+        print(f"{'comments':>10} {'mode':>8} {'seconds':>9} {'comments/s':>12} {'peak RSS MB':>12} {'over base':>10}")
+        for n in args.sizes:
+            infile = Path(tmp) / f"thread_{n}.json"
+            make_thread(infile, n)
+            for mode in ("load", "stream"):
+                r = run(mode, infile, Path(tmp) / f"out_{mode}_{n}.jsonl")
+                print(f"{n:>10} {mode:>8} {r['seconds']:>9.2f} {r['comments'] / r['seconds']:>12.0f} "
+                      f"{r['peak_rss_mb']:>12.1f} {r['peak_rss_mb'] - baseline:>10.1f}")
+
+if __name__ == "__main__":
+    main()
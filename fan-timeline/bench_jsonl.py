@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark random-sampled subsets of a large windows JSONL file: reading every
+line into a list vs the mmap, offset-indexed reader (cold index build, then
+with the cached index).
+Usage: python bench_jsonl.py --windows 50000 --sample 200
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.jsonl import JsonlFile, index_path_for
+
+def make_windows(path: Path, n: int):
+    rng = random.Random(0)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            comments = [{"body": f"comment {rng.random():.6f} what a play", "score": rng.randint(0, 500),
+                         "elapsed": i * 60 + rng.randint(0, 59)} for _ in range(rng.randint(5, 40))]
+            f.write(json.dumps({"window_id": i, "period": 1 + i % 4, "clock_start": "12:00",
+                                "score_before": "0-0", "score_after": "2-0", "comments": comments,
+                                "pbp": [{"desc": "Made Jump Shot", "points": 2}]}) + "\n")
+
+def reference_sample(path: Path, k: int, seed: int):
+    """The current pattern: load every record, then sample."""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    return random.Random(seed).sample(records, k)
+
+def indexed_sample(path: Path, k: int, seed: int):
+    with JsonlFile(path, cache_index=True) as data:
+        return data.sample(k, seed)
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--windows", type=int, default=50_000, help="Windows in the synthetic file")
+    ap.add_argument("--sample", type=int, default=200, help="Records per sampled subset")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "windows.jsonl"
+        make_windows(path, args.windows)
+        size_mb = path.stat().st_size / 1e6
+        print(f"{args.windows:,} windows, {size_mb:.1f}MB, sample of {args.sample}\n")
+
+        old, t_old = timed(lambda: reference_sample(path, args.sample, 0))
+        cold, t_cold = timed(lambda: indexed_sample(path, args.sample, 0))
+        warm, t_warm = timed(lambda: indexed_sample(path, args.sample, 0))
+        assert len(old) == len(cold) == args.sample and cold == warm
+        idx_kb = index_path_for(path).stat().st_size / 1e3
+
+        print(f"{'load all + sample':<28} {t_old * 1e3:>9.1f} ms")
+        print(f"{'mmap reader, build index':<28} {t_cold * 1e3:>9.1f} ms ({t_old / t_cold:.1f}x)")
+        print(f"{'mmap reader, cached index':<28} {t_warm * 1e3:>9.1f} ms ({t_old / t_warm:.1f}x, "
+              f"index {idx_kb:.0f}KB)")
+
+if __name__ == "__main__":
+    main()
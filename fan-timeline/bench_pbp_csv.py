@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark parse_pbp CSV loading: csv.DictReader per row vs the pandas loader.
+Runs on the yearly files if given, otherwise on a synthetic season-sized CSV.
+Usage: python bench_pbp_csv.py --csv data/pbp/raw_pbp/pbp2019.csv data/pbp/raw_pbp/pbp2020.csv
+       python bench_pbp_csv.py --rows 600000
+"""
+
+import argparse
+import csv
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.parse_pbp import PbpEvent, extract_points, frame_to_events, load_pbp_frame, parse_clock
+
+DESCS = ["Made 3PT Jump Shot", "Missed 3PT Jump Shot", "Made 2PT Layup", "Free Throw 1 of 2 Made",
+         "Free Throw 2 of 2 Missed", "Defensive Rebound", "Made Dunk", "Personal Foul", "Turnover: Bad Pass"]
+
+def reference_load_pbp_csv(path, game_id):
+    """The original csv.DictReader loader."""
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("type") in ["period", "timeout"]:
+                continue
+            desc = row.get("desc", "")
+            if desc and desc.strip():
+                events.append(PbpEvent(int(row.get("period", 1)), parse_clock(row.get("clock", "PT12M00.00S")),
+                                       row.get("team", ""), extract_points(desc, row.get("team", "")), desc, game_id))
+    return events
+
+def make_csv(path: Path, rows: int):
+    rng = random.Random(0)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["gameid", "actionNumber", "type", "period", "clock", "team", "desc"])
+        for i in range(rows):
+            kind = "timeout" if i % 97 == 0 else "period" if i % 250 == 0 else "shot"
+            secs = rng.uniform(0, 720)
+            w.writerow([f"00219{i // 500:05d}", i % 500, kind, 1 + (i % 500) // 125,
+                        f"PT{int(secs // 60):02d}M{secs % 60:05.2f}S", rng.choice(["LAL", "DAL", "BOS"]),
+                        rng.choice(DESCS)])
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    return result, elapsed
+
+def bench(path: Path):
+    size_mb = path.stat().st_size / 1e6
+    old, t_old = timed("dictreader", lambda: reference_load_pbp_csv(path, "bench"))
+    frame, t_frame = timed("frame", lambda: load_pbp_frame(str(path), "bench"))
+    events, t_events = timed("events", lambda: frame_to_events(frame))
+    assert events == old, "loaders disagree"
+    print(f"{path.name:<16} {size_mb:>7.1f}MB {len(old):>9,} events | DictReader {t_old:>6.2f}s | "
+          f"frame {t_frame:>6.2f}s ({t_old / t_frame:.1f}x) | frame+PbpEvent {t_frame + t_events:>6.2f}s "
+          f"({t_old / (t_frame + t_events):.1f}x)")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv", nargs="+", type=Path, help="Yearly pbp{year}.csv files")
+    ap.add_argument("--rows", type=int, default=600_000, help="Rows in the synthetic CSV")
+    args = ap.parse_args()
+
+    if args.csv:
+        for path in args.csv:
+            bench(path)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "pbp_synthetic.csv"
+        make_csv(path, args.rows)
+        bench(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark parse_pbp.detect_big_runs on a synthetic full season of PBP
+(1,230 games, ~1.3M events) against the original nested scan.
+Usage: python bench_pbp_runs.py --games 1230
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.parse_pbp import PbpEvent, detect_big_runs
+from timeline.utils import mmss_to_secs, secs_to_mmss
+
+def reference_detect_big_runs(events, window_secs=120):
+    """The original per-event rescan (also reports overlapping duplicates)."""
+    out = []
+    pts_by_time = []
+    for e in events:
+        t = mmss_to_secs(e.clock)
+        delta = e.points if e.team else 0
+        pts_by_time.append((e.period, t, e.team, delta))
+    for i in range(len(pts_by_time)):
+        p0, t0, team0, _ = pts_by_time[i]
+        sum_team = {team0: 0}
+        for j in range(i, len(pts_by_time)):
+            p, t, team, delta = pts_by_time[j]
+            if p != p0 or t < t0 - window_secs:
+                break
+            if team:
+                sum_team[team] = sum_team.get(team, 0) + delta
+        for tm, pts in sum_team.items():
+            if pts >= 8:
+                out.append({"period": p0, "clock": f"{t0//60:02d}:{t0%60:02d}", "run": f"{tm} {pts}-0"})
+    return out
+
+def make_season(n_games: int, events_per_period: int = 265):
+    """Game-ordered events; teams trade possessions with occasional streaks."""
+    rng = random.Random(0)
+    events = []
+    for g in range(n_games):
+        game_id = f"game{g:04d}"
+        for period in range(1, 5):
+            t = 720
+            team = "HOME"
+            for _ in range(events_per_period):
+                t = max(0, t - rng.randint(0, 5))
+                if rng.random() < 0.35:
+                    team = "AWAY" if team == "HOME" else "HOME"
+                scoring = rng.random() < 0.4
+                points = rng.choice([1, 2, 2, 3]) if scoring else 0
+                events.append(PbpEvent(period, secs_to_mmss(t), team if rng.random() < 0.9 else "",
+                                       points, "Shot", game_id))
+    return events
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--games", type=int, default=1230, help="Games in the synthetic season")
+    ap.add_argument("--skip_reference", action="store_true", help="Only time the one-pass detector")
+    args = ap.parse_args()
+
+    events = make_season(args.games)
+    print(f"{len(events):,} events over {args.games} games\n")
+
+    start = time.perf_counter()
+    runs = detect_big_runs(events)
+    fast = time.perf_counter() - start
+    print(f"{'one-pass detector':<22} {fast:>8.2f}s {len(events) / fast:>12,.0f} events/s {len(runs):>8,} runs")
+
+    if not args.skip_reference:
+        start = time.perf_counter()
+        old = reference_detect_big_runs(events)
+        slow = time.perf_counter() - start
+        print(f"{'original nested scan':<22} {slow:>8.2f}s {len(events) / slow:>12,.0f} events/s "
+              f"{len(old):>8,} rows (overlapping, not unanswered-only)")
+        print(f"\nspeedup: {slow / fast:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark teacher sentiment scoring: per-comment polarity_scores vs the memoized service.
+Comments are drawn from sft_data.jsonl bodies, so duplicates occur at the real rate.
+Usage: python bench_sentiment.py --n 200000 --workers 4
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.sentiment import SentimentService, get_analyzer
+
+def load_bodies():
+    bodies = []
+    with open(Path(__file__).parent / "sft_data.jsonl", encoding="utf-8") as f:
+        for line in f:
+            comments = json.loads(line)["input"].split("[COMMENTS]")[-1]
+            bodies.extend(b.strip() for b in comments.split("•") if b.strip())
+    return bodies
+
+def timed(label: str, fn, n: int) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed:>8.2f}s {n / elapsed:>12,.0f} comments/s")
+    return elapsed
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000, help="Comments to score")
+    ap.add_argument("--workers", type=int, default=4, help="Processes for the cold-corpus run")
+    ap.add_argument("--batch", type=int, default=40, help="Comments per call (about one window)")
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    bodies = load_bodies()
+    texts = [rng.choice(bodies) for _ in range(args.n)]
+    # Unique texts model a cold corpus with no repeats
+    cold = [f"{t} #{i}" for i, t in enumerate(texts)]
+    batches = [texts[i:i + args.batch] for i in range(0, len(texts), args.batch)]
+    polarity_scores = get_analyzer().polarity_scores
+
+    base = timed("polarity_scores per comment", lambda: [polarity_scores(t)["compound"] for t in texts], args.n)
+    service = SentimentService()
+    cached = timed("score_many per window", lambda: [service.score_many(b) for b in batches], args.n)
+    stats = service.stats()
+    print(f"{'':<32} hit rate {stats['hit_rate']:.1%}, {stats['avg_call_ms']:.3f} ms/call avg, "
+          f"p95 {stats['p95_call_ms']:.3f} ms")
+
+    cold_one = timed("cold corpus, 1 process", lambda: SentimentService().score_many(cold), args.n)
+    pooled = SentimentService(workers=args.workers)
+    cold_pool = timed(f"cold corpus, {args.workers} processes", lambda: pooled.score_many(cold), args.n)
+    pooled.close()
+    print(f"\nmemoized speedup: {base / cached:.1f}x, cold-corpus pool speedup: {cold_one / cold_pool:.1f}x")
+
+if __name__ == "__main__":
+    main()
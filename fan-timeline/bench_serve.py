@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Load-test POST /v1/timeline/generate: latency percentiles and requests/sec
+under concurrent clients, plus GET /health latency while the load runs (a
+blocked event loop shows up there first).
+
+"before" serves the original request path: JSON-string fields, comments and
+PBP written to temp files and read back, and all work done inside the async
+handler. "after" is
+timeline.serve: in-memory windows, work offloaded to the worker pool.
+Usage: python bench_serve.py --requests 200 --concurrency 16 --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add src to path
+SRC = Path(__file__).parent / "src"
+sys.path.insert(0, str(SRC))
+
+from typing import Optional
+
+import httpx
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from timeline.serve import TimelineResponse, build_timeline
+
+# The original handler: JSON-string fields, temp files and blocking work on the event loop
+legacy_app = FastAPI()
+
+class LegacyRequest(BaseModel):
+    game_id: str
+    reddit_thread_json: str
+    pbp_json: str
+    start_utc: Optional[int] = None
+
+def legacy_payload(payload: dict) -> dict:
+    return {"game_id": payload["game_id"], "reddit_thread_json": json.dumps(payload["comments"]),
+            "pbp_json": json.dumps(payload["pbp"]), "start_utc": payload["start_utc"]}
+
+@legacy_app.post("/v1/timeline/generate", response_model=TimelineResponse)
+async def legacy_generate(request: LegacyRequest):
+    reddit_data = json.loads(request.reddit_thread_json)
+    pbp_data = json.loads(request.pbp_json)
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl", delete=False) as reddit_file:
+        for comment in reddit_data:
+            reddit_file.write(json.dumps(comment) + "\n")
+        reddit_path = reddit_file.name
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as pbp_file:
+        json.dump(pbp_data, pbp_file)
+        pbp_path = pbp_file.name
+    try:
+        with open(reddit_path, "r", encoding="utf-8") as f:
+            comments = [json.loads(line) for line in f if line.strip()]
+        with open(pbp_path, "r", encoding="utf-8") as f:
+            pbp = json.load(f)
+        return TimelineResponse(**build_timeline(request.game_id, comments, pbp, request.start_utc))
+    finally:
+        os.unlink(reddit_path)
+        os.unlink(pbp_path)
+
+@legacy_app.get("/health")
+async def legacy_health():
+    return {"status": "healthy"}
+
+def make_payload(n_comments: int, seed: int = 0) -> dict:
+    """One game's worth of request body: a 48-minute thread and its PBP."""
+    rng = random.Random(seed)
+    bodies = ["what a shot", "refs are blind tonight", "LETS GO", "defense is asleep", "MVP MVP MVP",
+              "unreal dunk", "this is painful to watch", "clutch", "bench is cooked", "terrible turnover"]
+    comments = [{"body": f"{rng.choice(bodies)} {rng.randint(0, 999)}", "created_utc": 1_000_000 + rng.randint(0, 2880),
+                 "score": rng.randint(0, 200), "author": f"user{rng.randint(0, 500)}"} for _ in range(n_comments)]
+    pbp = [{"period": 1 + i // 100, "clock": f"{11 - (i % 100) * 12 // 100:02d}:{rng.randint(0, 59):02d}",
+            "team": rng.choice(["LAL", "DAL"]), "points": rng.choice([0, 0, 1, 2, 3]),
+            "desc": rng.choice(["Made Jump Shot", "Missed Layup", "3PT Made", "Dunk"])} for i in range(400)]
+    return {"game_id": "2019-12-01-LAL-DAL", "comments": comments, "pbp": pbp, "start_utc": 1_000_000}
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(app: str, port: int, workers: int) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": f"{SRC}{os.pathsep}{Path(__file__).parent}", "TIMELINE_WORKERS": str(workers)}
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+                            env=env, cwd=SRC)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{app} did not start")
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] * 1000 if values else 0.0
+
+async def load(base: str, payload: dict, n: int, concurrency: int):
+    latencies, health = [], []
+    sem = asyncio.Semaphore(concurrency)
+    done = asyncio.Event()
+    async with httpx.AsyncClient(base_url=base, timeout=300) as client:
+        await client.post("/v1/timeline/generate", json=payload)  # warm-up
+
+        async def one():
+            async with sem:
+                t = time.perf_counter()
+                r = await client.post("/v1/timeline/generate", json=payload)
+                r.raise_for_status()
+                latencies.append(time.perf_counter() - t)
+
+        async def ping():
+            while not done.is_set():
+                t = time.perf_counter()
+                await client.get("/health")
+                health.append(time.perf_counter() - t)
+                await asyncio.sleep(0.05)
+
+        pinger = asyncio.create_task(ping())
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(n)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await pinger
+    return latencies, health, elapsed
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=100, help="Requests per run")
+    ap.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    ap.add_argument("--comments", type=int, default=3000, help="Comments per request")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="TIMELINE_WORKERS for the server")
+    args = ap.parse_args()
+
+    payload = make_payload(args.comments)
+    print(f"{args.requests} requests x {args.comments} comments, concurrency {args.concurrency}, "
+          f"workers {args.workers}, {os.cpu_count()} CPUs\n")
+    print(f"{'':<8} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>7} {'health p50':>11} {'health p99':>11}")
+    for label, app, body in (("before", "bench_serve:legacy_app", legacy_payload(payload)),
+                             ("after", "timeline.serve:app", payload)):
+        port = free_port()
+        proc = start_server(app, port, args.workers)
+        try:
+            latencies, health, elapsed = asyncio.run(
+                load(f"http://127.0.0.1:{port}", body, args.requests, args.concurrency))
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(f"{label:<8} {pct(latencies, 0.5):>9.1f} {pct(latencies, 0.99):>9.1f} "
+              f"{args.requests / elapsed:>7.1f} {pct(health, 0.5):>11.1f} {pct(health, 0.99):>11.1f}")
+
+if __name__ == "__main__":
+    main()
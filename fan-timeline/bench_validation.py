@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark schema validation of SFT outputs: jsonschema.validate per call
+(rebuilds the validator and re-checks the schema every time) vs a cached
+jsonschema validator vs the compiled TimelineValidator.validate_many.
+Each output is completed to the full contract with its prompt's game_id.
+Usage: python bench_validation.py --data sft_data.jsonl --seconds 2
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import jsonschema
+from jsonschema.exceptions import best_match
+
+from timeline.jsonl import JsonlFile
+from timeline.validation import get_validator
+
+def load_outputs(path: str):
+    docs = []
+    with JsonlFile(path, cache_index=False) as data:
+        for record in data:
+            game_id = record["input"].split("game_id=", 1)[1].split("\n", 1)[0]
+            try:
+                docs.append({"game_id": game_id, **json.loads(record["output"])})
+            except json.JSONDecodeError:
+                docs.append(record["output"])
+    return docs
+
+def reference_validate_many(docs, schema):
+    """The current pattern: jsonschema.validate on every document."""
+    results = []
+    for doc in docs:
+        try:
+            jsonschema.validate(doc, schema)
+            results.append((True, "Valid"))
+        except jsonschema.ValidationError as e:
+            results.append((False, str(e)))
+    return results
+
+def cached_validate_many(docs, cached):
+    """A validator built once, with the same messages as jsonschema.validate."""
+    return [(True, "Valid") if cached.is_valid(d) else (False, str(best_match(cached.iter_errors(d))))
+            for d in docs]
+
+def rate(fn, n_docs: int, seconds: float):
+    """Validations per second, repeating fn over the batch for at least `seconds`."""
+    runs, start = 0, time.perf_counter()
+    while True:
+        result = fn()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return result, runs * n_docs / elapsed
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", default="sft_data.jsonl", help="SFT JSONL whose outputs are validated")
+    ap.add_argument("--seconds", type=float, default=2.0, help="Minimum time per variant")
+    args = ap.parse_args()
+
+    docs = load_outputs(args.data)
+    validator = get_validator()
+    cached = jsonschema.Draft202012Validator(validator.schema)
+
+    n = len(docs)
+    old, r_old = rate(lambda: reference_validate_many(docs, validator.schema), n, args.seconds)
+    cached_msgs, r_cached = rate(lambda: cached_validate_many(docs, cached), n, args.seconds)
+    new, r_new = rate(lambda: validator.validate_many(docs), n, args.seconds)
+    cached_ok, r_cached_ok = rate(lambda: [cached.is_valid(d) for d in docs], n, args.seconds)
+    new_ok, r_new_ok = rate(lambda: [validator.is_valid(d) for d in docs], n, args.seconds)
+    assert new == cached_msgs == old and [ok for ok, _ in new] == cached_ok == new_ok
+    valid = sum(new_ok)
+
+    print(f"{n} outputs from {args.data}, {valid} valid ({valid / n:.1%})\n")
+    print(f"{'validations/s':<28} {'with messages':>14} {'verdict only':>14}")
+    print(f"{'jsonschema.validate':<28} {r_old:>14,.0f} {'':>14}")
+    print(f"{'cached Draft202012Validator':<28} {r_cached:>14,.0f} {r_cached_ok:>14,.0f}")
+    print(f"{'TimelineValidator':<28} {r_new:>14,.0f} {r_new_ok:>14,.0f}")
+
+if __name__ == "__main__":
+    main()
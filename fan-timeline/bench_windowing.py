@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark windowing: original per-comment loop vs NumPy bucketing, and
+sliding-window construction as the stride shrinks.
+Usage: python bench_windowing.py --comments 50000 --games 5 --strides 60 30 20 10
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.windowing import build_sliding_index, build_window_index, build_windows, elapsed_array
+
+def reference_build_windows(comments, pbp_events, win_len=60):
+    """The original dict-of-lists implementation."""
+    windows = {}
+    for c in comments:
+        if 'elapsed' not in c:
+            continue
+        win = int(c["elapsed"] // win_len)
+        if win not in windows:
+            windows[win] = {"comments": [], "pbp": []}
+        windows[win]["comments"].append(c)
+    for e in pbp_events:
+        if 'elapsed' not in e:
+            continue
+        win = int(e["elapsed"] // win_len)
+        if win not in windows:
+            windows[win] = {"comments": [], "pbp": []}
+        windows[win]["pbp"].append(e)
+    return windows
+
+def make_game(n_comments: int, n_pbp: int = 450):
+    rng = random.Random(0)
+    comments = [{"body": f"comment {i}", "score": rng.randint(-5, 200), "elapsed": rng.randint(0, 2880)}
+                for i in range(n_comments)]
+    pbp = [{"desc": f"event {i}", "elapsed": rng.randint(0, 2880)} for i in range(n_pbp)]
+    return comments, pbp
+
+def timed(label: str, fn, games: int, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(games):
+        fn()
+    elapsed = (time.perf_counter() - start) / games
+    print(f"{label:<32} {elapsed * 1000:>9.1f} ms/game {n / elapsed:>14,.0f} comments/s")
+    return elapsed
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--comments", type=int, default=50_000, help="Comments per game")
+    ap.add_argument("--games", type=int, default=5, help="Repetitions")
+    ap.add_argument("--strides", type=int, nargs="+", default=[60, 30, 20, 10], help="Sliding strides (60s windows)")
+    args = ap.parse_args()
+
+    comments, pbp = make_game(args.comments)
+    c_elapsed, p_elapsed = elapsed_array(comments), elapsed_array(pbp)
+    print(f"{args.comments:,} comments, {len(pbp)} PBP events per game\n")
+
+    base = timed("loop (original)", lambda: reference_build_windows(comments, pbp), args.games, args.comments)
+    vec = timed("build_windows (dicts)", lambda: build_windows(comments, pbp), args.games, args.comments)
+    idx = timed("build_window_index (arrays)", lambda: build_window_index(c_elapsed, p_elapsed),
+                args.games, args.comments)
+    print(f"\nbuild_windows speedup: {base / vec:.1f}x, index-only speedup: {base / idx:.1f}x\n")
+
+    # Index cost should stay ~flat as windows overlap more; materialized dicts grow with 60 / stride
+    for stride in args.strides:
+        index = build_sliding_index(c_elapsed, p_elapsed, 60, stride)
+        refs = int(index.comment_counts().sum())
+        timed(f"sliding index stride={stride}s", lambda: build_sliding_index(c_elapsed, p_elapsed, 60, stride),
+              args.games, args.comments)
+        timed(f"sliding dicts stride={stride}s", lambda: build_windows(comments, pbp, 60, stride=stride),
+              args.games, args.comments)
+        print(f"{'':<32} {len(index):>9} windows, {refs:,} comment refs")
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,18 @@ Evaluation harness for the trained SFT model.
 
 import json
 import argparse
+import sys
 import torch
 from pathlib import Path
 from transformers import AutoModelForCausalLM, AutoTokenizer
 from peft import PeftModel
 import logging
 
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.inference import BatchEngine, HFGenerator
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -55,27 +61,7 @@ def load_model_and_tokenizer(model_path: str):
 
 def generate_timeline(model, tokenizer, prompt: str, max_length: int = 512):
     """Generate timeline from prompt."""
-    inputs = tokenizer(prompt, return_tensors="pt", truncation=True, max_length=max_length)
-    
-    if torch.cuda.is_available():
-        inputs = {k: v.cuda() for k, v in inputs.items()}
-    
-    with torch.no_grad():
-        outputs = model.generate(
-            **inputs,
-            max_new_tokens=256,
-            temperature=0.7,
-            do_sample=True,
-            pad_token_id=tokenizer.eos_token_id,
-            eos_token_id=tokenizer.eos_token_id
-        )
-    
-    generated_text = tokenizer.decode(outputs[0], skip_special_tokens=True)
-    # Extract only the new generated part
-    prompt_length = len(tokenizer.decode(inputs["input_ids"][0], skip_special_tokens=True))
-    generated_part = generated_text[prompt_length:].strip()
-    
-    return generated_part
+    return HFGenerator(model, tokenizer, max_length=max_length)([prompt])[0]
 
 def validate_json_output(text: str) -> dict:
     """Validate if the generated text is valid JSON."""
@@ -118,20 +104,23 @@ def validate_json_output(text: str) -> dict:
     except Exception as e:
         return {"valid": False, "error": f"Validation error: {e}"}
 
-def evaluate_model(model_path: str, test_prompts: list):
+def evaluate_model(model_path: str, test_prompts: list, batch_size: int = 8):
     """Evaluate the model on test prompts."""
     model, tokenizer = load_model_and_tokenizer(model_path)
     if model is None:
         return
     
+    # Generate all responses in left-padded batches (same engine as serve.py)
+    logger.info(f"Generating {len(test_prompts)} outputs, batch size {batch_size}")
+    with BatchEngine(HFGenerator(model, tokenizer), max_batch=batch_size) as engine:
+        outputs = engine.generate_many(test_prompts)
+    logger.info(f"Ran {engine.stats['batches']} batches")
+    
     results = []
     
-    for i, prompt in enumerate(test_prompts):
+    for i, (prompt, generated) in enumerate(zip(test_prompts, outputs)):
         logger.info(f"Testing prompt {i+1}/{len(test_prompts)}")
         
-        # Generate response
-        generated = generate_timeline(model, tokenizer, prompt)
-        
         # Validate output
         validation = validate_json_output(generated)
         
@@ -177,16 +166,17 @@ def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--model_path", required=True, help="Path to trained model")
     ap.add_argument("--test_prompts", nargs="+", help="Test prompts to evaluate")
+    ap.add_argument("--batch_size", type=int, default=8, help="Prompts per generate call")
     args = ap.parse_args()
     
     # Default test prompts if none provided
     if not args.test_prompts:
         args.test_prompts = [
-            "You are a sports timeline generator. Given fan comments from a game thread, create a concise event summary with sentiment.\n\n[CONTEXT]\ngame_id=2019-12-01-LAL-DAL\nquarter=Q1 window=11:59 score_before=0-0 score_after=0-0\n\n[COMMENTS]\n• What a game!\n• This is amazing\n• Great shot!",
-            "You are a sports timeline generator. Given fan comments from a game thread, create a concise event summary with sentiment.\n\n[CONTEXT]\ngame_id=2020-01-16-BOS-MIL\nquarter=Q2 window=10:30 score_before=45-42 score_after=50-45\n\n[COMMENTS]\n• Terrible call\n• Refs are awful\n• Can't believe this"
+            "You are a sports timeline generator. Given fan comments from a game thread, create a concise event summary with sentiment.\n\n[CONTEXT]\ngame_id=2019-12-01-LAL-DAL\nquarter=Q1 window=11:59 score_before=0-0 score_after=0-0 margin=+0\n\n[COMMENTS]\n• What a game!\n• This is amazing\n• Great shot!",
+            "You are a sports timeline generator. Given fan comments from a game thread, create a concise event summary with sentiment.\n\n[CONTEXT]\ngame_id=2020-01-16-BOS-MIL\nquarter=Q2 window=10:30 score_before=45-42 score_after=50-45 margin=+5\n\n[COMMENTS]\n• Terrible call\n• Refs are awful\n• Can't believe this"
         ]
     
-    results = evaluate_model(args.model_path, args.test_prompts)
+    results = evaluate_model(args.model_path, args.test_prompts, args.batch_size)
     
     # Save results
     output_file = Path(args.model_path) / "evaluation_results.json"
@@ -1,12 +1,23 @@
 #!/usr/bin/env python3
 """
 Extract specific games from PBP CSV files for the mini dataset.
+
+Each season file (pbp{year}.csv) is scanned once. The scan builds an index of
+every game in it: the byte spans of its rows, its teams and its date. Mini
+games are matched against the index by date and teams, and their rows are read
+back by seeking to those spans. With --save_index the index is written next to
+the CSV (pbp{year}.index.json), so later extractions seek directly instead of
+rescanning the season.
+Usage: python extract_mini_pbp.py --pbp_dir data/pbp/raw_pbp --out data/pbp --save_index
 """
 
+import argparse
 import csv
+import io
 import json
+from datetime import date, timedelta
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional
 
 # Mini dataset games
 MINI_GAMES = {
@@ -17,47 +28,170 @@ MINI_GAMES = {
     "2023-06-01-MIA-DEN": {"date": "2023-06-01", "away": "MIA", "home": "DEN", "year": 2023},
 }
 
-def extract_game_from_csv(csv_path: Path, game_info: Dict) -> List[Dict]:
-    """Extract events for a specific game from the CSV file."""
-    events = []
-    
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+GAME_ID_COLUMNS = ["gameid", "game_id", "GAME_ID"]
+TEAM_COLUMNS = ["team", "teamTricode", "team_abbreviation"]
+# Game date, or a per-event timestamp whose first 10 characters are the date
+DATE_COLUMNS = ["gamedate", "game_date", "GAME_DATE", "date", "timeActual"]
+
+def _column(header: List[str], names: List[str]) -> Optional[int]:
+    for name in names:
+        if name in header:
+            return header.index(name)
+    return None
+
+def index_path_for(csv_path: Path) -> Path:
+    return csv_path.with_suffix(".index.json")
+
+def _lines(f, pos: List[int]) -> Iterator[str]:
+    """Decoded lines of a binary file; pos[0] is the offset after the last line yielded."""
+    for line in f:
+        pos[0] += len(line)
+        yield line.decode("utf-8")
+
+def scan_season(csv_path: Path) -> Dict:
+    """One pass over a season CSV: byte spans, row count, teams and date per game.
+
+    csv.reader pulls exactly the lines of one record at a time, so the offset
+    after each row is that record's end, even for quoted multi-line fields.
+    Rows of a game are normally contiguous and share one span; a game that
+    reappears later in the file gets another span.
+    """
+    games: Dict[str, Dict] = {}
+    teams: Dict[str, set] = {}
+    pos = [0]
+    with open(csv_path, "rb") as f:
+        reader = csv.reader(_lines(f, pos))
+        header = next(reader, None)
+        if header is None:
+            raise ValueError(f"{csv_path} is empty")
+        gi = _column(header, GAME_ID_COLUMNS)
+        if gi is None:
+            raise ValueError(f"{csv_path} has no game id column (one of {GAME_ID_COLUMNS})")
+        ti = _column(header, TEAM_COLUMNS)
+        di = _column(header, DATE_COLUMNS)
+
+        header_end = start = pos[0]
         for row in reader:
-            # Check if this row belongs to our target game
-            # We'll need to match by date or game ID
-            # For now, let's extract all events and filter later
-            events.append(row)
-    
-    return events
+            end = pos[0]
+            if len(row) <= gi:
+                start = end
+                continue
+            game = games.get(row[gi])
+            if game is None:
+                game = games[row[gi]] = {"spans": [], "rows": 0, "date": ""}
+                teams[row[gi]] = set()
+            spans = game["spans"]
+            if spans and spans[-1][1] == start:
+                spans[-1][1] = end
+            else:
+                spans.append([start, end])
+            game["rows"] += 1
+            if ti is not None and len(row) > ti and row[ti]:
+                teams[row[gi]].add(row[ti])
+            if not game["date"] and di is not None and len(row) > di and row[di]:
+                game["date"] = row[di][:10]
+            start = end
+
+    for game_id, game in games.items():
+        game["teams"] = sorted(teams[game_id])
+    stat = csv_path.stat()
+    return {"csv": csv_path.name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "header_end": header_end, "games": games}
+
+def load_index(csv_path: Path) -> Optional[Dict]:
+    """Saved index for csv_path, or None if missing or the CSV has changed since."""
+    path = index_path_for(csv_path)
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    stat = csv_path.stat()
+    if index.get("size") != stat.st_size or index.get("mtime_ns") != stat.st_mtime_ns:
+        return None
+    return index
+
+def season_index(csv_path: Path, save: bool = False) -> Dict:
+    """Saved index if it is still valid, otherwise one scan (saved when requested)."""
+    index = load_index(csv_path)
+    if index is None:
+        index = scan_season(csv_path)
+        if save:
+            with open(index_path_for(csv_path), "w", encoding="utf-8") as f:
+                json.dump(index, f)
+    return index
+
+def match_game(index: Dict, game_info: Dict) -> Optional[str]:
+    """Season game id for a mini game, matched on teams and date.
+
+    Per-event timestamps are UTC, so an evening tip-off can carry the next
+    day's date; both days are accepted and an exact date wins a tie. Returns
+    None when nothing (or more than one game) matches.
+    """
+    day = date.fromisoformat(game_info["date"])
+    days = {day.isoformat(), (day + timedelta(days=1)).isoformat()}
+    candidates = [gid for gid, g in index["games"].items()
+                  if game_info["away"] in g["teams"] and game_info["home"] in g["teams"]
+                  and (not g["date"] or g["date"] in days)]
+    if len(candidates) > 1:
+        candidates = [gid for gid in candidates if index["games"][gid]["date"] == game_info["date"]]
+    return candidates[0] if len(candidates) == 1 else None
+
+def read_game_rows(csv_path: Path, index: Dict, game_id: str) -> List[Dict]:
+    """Rows of one game, read by seeking to its spans instead of scanning the file."""
+    with open(csv_path, "rb") as f:
+        header = f.read(index["header_end"])
+        chunks = [header]
+        for start, end in index["games"][game_id]["spans"]:
+            f.seek(start)
+            chunks.append(f.read(end - start))
+    text = b"".join(chunks).decode("utf-8")
+    return list(csv.DictReader(io.StringIO(text, newline="")))
+
+def extract_game_from_csv(csv_path: Path, game_info: Dict, index: Optional[Dict] = None) -> List[Dict]:
+    """Extract events for a specific game from the CSV file."""
+    index = index or season_index(csv_path)
+    game_id = match_game(index, game_info)
+    if game_id is None:
+        return []
+    return read_game_rows(csv_path, index, game_id)
 
 def main():
-    pbp_dir = Path("data/pbp/raw_pbp")
-    output_dir = Path("data/pbp")
-    output_dir.mkdir(exist_ok=True)
-    
-    # For each mini game, extract from the appropriate year's CSV
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pbp_dir", default="data/pbp/raw_pbp", help="Directory with pbp{year}.csv")
+    ap.add_argument("--out", default="data/pbp", help="Output directory for per-game JSON")
+    ap.add_argument("--save_index", action="store_true", help="Save each season's index next to its CSV")
+    args = ap.parse_args()
+
+    pbp_dir = Path(args.pbp_dir)
+    output_dir = Path(args.out)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Group mini games by season so each season file is scanned at most once
+    by_year: Dict[int, List[str]] = {}
     for game_id, game_info in MINI_GAMES.items():
-        year = game_info["year"]
+        by_year.setdefault(game_info["year"], []).append(game_id)
+
+    for year, game_ids in sorted(by_year.items()):
         csv_file = pbp_dir / f"pbp{year}.csv"
-        
         if not csv_file.exists():
-            print(f"Warning: {csv_file} not found for {game_id}")
+            print(f"Warning: {csv_file} not found for {', '.join(game_ids)}")
             continue
-        
-        print(f"Processing {game_id} from {csv_file}")
-        
-        # Extract all events from the year's CSV
-        events = extract_game_from_csv(csv_file, game_info)
-        
-        # For now, let's create a simple JSON file with all events
-        # We'll need to implement proper game filtering later
-        output_file = output_dir / f"{game_id}.json"
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(events, f, indent=2)
-        
-        print(f"Saved {len(events)} events to {output_file}")
+
+        index = season_index(csv_file, save=args.save_index)
+        print(f"Indexed {csv_file}: {len(index['games'])} games")
+
+        for game_id in game_ids:
+            season_game = match_game(index, MINI_GAMES[game_id])
+            if season_game is None:
+                print(f"Warning: no unique match for {game_id} in {csv_file}")
+                continue
+            events = read_game_rows(csv_file, index, season_game)
+
+            output_file = output_dir / f"{game_id}.json"
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(events, f, indent=2)
+
+            print(f"Saved {len(events)} events ({season_game}) to {output_file}")
 
 if __name__ == "__main__":
     main()
@@ -169,6 +169,8 @@ echo "Starting fetch_threads.py with nohup..."
 nohup python src/timeline/fetch_threads.py \
     --schedule_csv full_schedule.csv \
     --out_dir data/raw_reddit_full \
+    --workers 4 \
+    --rate 2 \
     > nohup.out 2>&1 &
 
 # Get the process ID
@@ -185,6 +187,8 @@ echo ""
 echo "To stop the process:"
 echo "  kill $FETCH_PID"
 echo ""
+echo "Re-running this script resumes: games already saved in data/raw_reddit_full are skipped"
+echo ""
 echo "Tomorrow morning, run:"
 echo "  python src/timeline/ingest_reddit.py --in_dir data/raw_reddit_full --out_dir data/reddit_full"
 echo ""
@@ -53,7 +53,7 @@ def generate_once(game_id: str, model, tokenizer):
 
 [CONTEXT]
 game_id={game_id}
-quarter=Q1 window=11:59 score_before=0-0 score_after=0-0
+quarter=Q1 window=11:59 score_before=0-0 score_after=0-0 margin=+0
 
 [COMMENTS]
 • What a game!
@@ -1,48 +1,101 @@
 #!/usr/bin/env python3
 """
-Run the pipeline for all mini games.
+Run the pipeline for every game in the schedule.
+
+The schedule is read once and games are fanned out over a process pool.
+Per-game stage timings and outcomes are written to a run manifest.
+Usage: python run_all_games.py --workers 8
+       python run_all_games.py --games 2019-12-01-LAL-DAL 2020-01-16-BOS-MIL
 """
 
-import subprocess
+import argparse
+import json
+import os
 import sys
+import time
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from run_pipeline import run_pipeline_for_game
+from timeline.align_time import load_game_schedule
+from timeline.cache import StageCache
+from timeline.utils import run_batch
 
 def main():
-    mini_games = [
-        "2019-12-01-LAL-DAL",
-        "2020-01-16-BOS-MIL", 
-        "2021-05-19-GSW-LAL",
-        "2022-12-25-MEM-GSW",
-        "2023-06-01-MIA-DEN"
-    ]
-    
-    for game_id in mini_games:
-        print(f"\n{'='*50}")
-        print(f"Processing {game_id}")
-        print(f"{'='*50}")
-        
-        try:
-            run_pipeline_for_game(game_id)
-            print(f"✅ Successfully processed {game_id}")
-        except Exception as e:
-            print(f"❌ Error processing {game_id}: {e}")
-    
+    ap = argparse.ArgumentParser(description="Run the pipeline for all scheduled games")
+    ap.add_argument("--schedule", default="game_schedule.csv", help="CSV with game_id,start_utc")
+    ap.add_argument("--games", nargs="+", help="Subset of game ids (default: every game in the schedule)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    ap.add_argument("--raw_reddit_dir", help="Fetched threads to ingest (default: use data/reddit as-is)")
+    ap.add_argument("--win_len", type=int, default=60, help="Window length in seconds")
+    ap.add_argument("--stride", type=int, help="Sliding-window stride in seconds (default: disjoint windows)")
+    ap.add_argument("--no_cache", action="store_true", help="Recompute every stage")
+    ap.add_argument("--no_label", action="store_true", help="Skip the teacher labeling stage")
+    ap.add_argument("--parquet_dir", help="Also write windows as Parquet (e.g. data/parquet)")
+    ap.add_argument("--manifest", default="data/run_manifest.json", help="Where to write the run manifest")
+    args = ap.parse_args()
+
+    schedule = load_game_schedule(args.schedule)
+    game_ids = args.games or list(schedule)
+    cache = StageCache(enabled=not args.no_cache)
+    raw_reddit_dir = Path(args.raw_reddit_dir) if args.raw_reddit_dir else None
+    parquet_dir = Path(args.parquet_dir) if args.parquet_dir else None
+
+    print(f"Running {len(game_ids)} games with {args.workers} workers")
+    start = time.time()
+    jobs = [(game_id, (game_id, schedule, cache, raw_reddit_dir, args.win_len, not args.no_label,
+                        parquet_dir, args.stride))
+            for game_id in game_ids]
+    results = run_batch(run_pipeline_for_game, jobs, workers=args.workers, unit="games")
+    elapsed = time.time() - start
+
+    games = []
+    for r in results:
+        stats = r["result"] or {}
+        ok = r["ok"] and r["result"] is not None
+        games.append({
+            "game_id": r["name"],
+            "ok": ok,
+            "error": r["error"] if not r["ok"] else (None if ok else "missing inputs (see log)"),
+            "seconds": round(r["seconds"], 3),
+            "windows": stats.get("windows", 0),
+            "stages": stats.get("stages", {}),
+            "timings": {k: round(v, 3) for k, v in stats.get("timings", {}).items()},
+        })
+
+    ok_games = [g for g in games if g["ok"]]
+    manifest = {
+        "started_utc": int(start),
+        "seconds": round(elapsed, 3),
+        "workers": args.workers,
+        "games_ok": len(ok_games),
+        "games_failed": len(games) - len(ok_games),
+        "windows": sum(g["windows"] for g in ok_games),
+        "games": games,
+    }
+    manifest_path = Path(args.manifest)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
     print(f"\n{'='*50}")
     print("Pipeline complete!")
     print(f"{'='*50}")
-    
-    # Print summary
-    windows_dir = Path("data/windows")
-    if windows_dir.exists():
-        window_files = list(windows_dir.glob("*.jsonl"))
-        print(f"Created {len(window_files)} window files:")
-        for f in window_files:
-            print(f"  - {f.name}")
+    print(f"{'game_id':<22} {'ok':<4} {'windows':>7} " +
+          " ".join(f"{s:>7}" for s in ("ingest", "align", "window", "label", "total")))
+    for g in games:
+        t = g["timings"]
+        print(f"{g['game_id']:<22} {'✅' if g['ok'] else '❌':<4} {g['windows']:>7} " +
+              " ".join(f"{t[s]:>7.2f}" if s in t else f"{'-':>7}"
+                       for s in ("ingest", "align", "window", "label", "total")))
+    print(f"\n{manifest['games_ok']} ok, {manifest['games_failed']} failed, "
+          f"{manifest['windows']} windows in {elapsed:.1f}s")
+    print(f"Run manifest: {manifest_path}")
+    # Fail the batch (CI, shell scripts) when any game failed
+    if manifest["games_failed"]:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -1,91 +1,214 @@
 #!/usr/bin/env python3
 """
 Run the full pipeline for one game.
+
+Stages (ingest -> align -> window -> label) are cached by content hash of
+their inputs, config and code under data/cache/, so re-running after editing
+teacher.py only re-runs the label stage.
 """
 
+import argparse
 import json
+import shutil
 import sys
+import time
 from pathlib import Path
+from typing import Dict, Optional
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from timeline.align_time import load_game_schedule, add_elapsed_times, add_elapsed_times_pbp
+from timeline.cache import StageCache, code_digest, file_digest
+from timeline.scoreboard import Scoreboard, teams_from_game_id
 from timeline.windowing import build_windows, save_windows_to_jsonl
 
-def run_pipeline_for_game(game_id: str):
-    """Run the full pipeline for a single game."""
+def _load_jsonl(path: Path):
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    return records
+
+def _find_raw_thread(raw_reddit_dir: Optional[Path], game_id: str) -> Optional[Path]:
+    if raw_reddit_dir is None:
+        return None
+    for suffix in (".jsonl", ".json"):
+        path = raw_reddit_dir / f"{game_id}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+def run_pipeline_for_game(game_id: str, schedule: Optional[Dict[str, int]] = None,
+                          cache: Optional[StageCache] = None,
+                          raw_reddit_dir: Optional[Path] = None,
+                          win_len: int = 60, label: bool = True,
+                          parquet_dir: Optional[Path] = None,
+                          stride: Optional[int] = None) -> Optional[Dict]:
+    """Run the full pipeline for a single game.
+
+    Args:
+        game_id: Game identifier, e.g. 2019-12-01-LAL-DAL
+        schedule: game_id -> tip-off UTC (loaded from game_schedule.csv if None)
+        cache: Stage cache (data/cache by default)
+        raw_reddit_dir: Fetched threads to ingest; if None, data/reddit is used as-is
+        win_len: Window length in seconds
+        label: Also run the teacher labeling stage
+        parquet_dir: Also write windows to this columnar dataset (needs pyarrow)
+        stride: Sliding-window stride in seconds (None = disjoint win_len bins)
+
+    Returns:
+        Dictionary with per-stage cache status, per-stage seconds and window
+        count, or None on error
+    """
     print(f"Running pipeline for {game_id}")
-    
+    cache = cache or StageCache()
+    stages = {}
+    timings = {}
+    t0 = time.perf_counter()
+
     # Load game schedule
-    schedule = load_game_schedule("game_schedule.csv")
+    if schedule is None:
+        schedule = load_game_schedule("game_schedule.csv")
     game_start_utc = schedule.get(game_id)
     if not game_start_utc:
         print(f"Error: No start time found for game {game_id}")
-        return
-    
+        return None
+
     print(f"Game start time: {game_start_utc}")
-    
-    # Load comments
-    comments_file = Path(f"data/reddit/{game_id}.jsonl")
-    if not comments_file.exists():
-        print(f"Error: Comments file not found: {comments_file}")
-        return
-    
-    comments = []
-    with open(comments_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.strip():
-                comments.append(json.loads(line))
-    
-    print(f"Loaded {len(comments)} comments")
-    
-    # Load PBP events
+
+    # Ingest comments
+    t = time.perf_counter()
+    raw_thread = _find_raw_thread(raw_reddit_dir, game_id)
+    if raw_thread is not None:
+        from timeline.ingest_reddit import process_file as ingest_file
+        ingest_key = cache.key("ingest", [file_digest(raw_thread)], {},
+                               code_digest("ingest_reddit.py", "utils.py"))
+        comments_file, hit = cache.run("ingest", ingest_key, lambda out: ingest_file(raw_thread, out))
+        stages["ingest"] = "hit" if hit else "miss"
+        reddit_dir = Path("data/reddit")
+        reddit_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(comments_file, reddit_dir / f"{game_id}.jsonl")
+    else:
+        comments_file = Path(f"data/reddit/{game_id}.jsonl")
+        if not comments_file.exists():
+            print(f"Error: Comments file not found: {comments_file}")
+            return None
+        ingest_key = file_digest(comments_file)
+        stages["ingest"] = "skipped"
+    timings["ingest"] = time.perf_counter() - t
+
     pbp_file = Path(f"data/pbp/{game_id}.jsonl")
     if not pbp_file.exists():
         print(f"Error: PBP file not found: {pbp_file}")
-        return
-    
-    pbp_events = []
-    with open(pbp_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.strip():
-                pbp_events.append(json.loads(line))
-    
-    print(f"Loaded {len(pbp_events)} PBP events")
-    
+        return None
+
     # Add elapsed times
-    comments = add_elapsed_times(comments, game_start_utc)
-    pbp_events = add_elapsed_times_pbp(pbp_events, game_start_utc)
-    
-    print(f"Added elapsed times to {len(comments)} comments and {len(pbp_events)} PBP events")
-    
+    def align(out: Path):
+        comments = _load_jsonl(comments_file)
+        pbp_events = _load_jsonl(pbp_file)
+        print(f"Loaded {len(comments)} comments")
+        print(f"Loaded {len(pbp_events)} PBP events")
+        comments = add_elapsed_times(comments, game_start_utc)
+        pbp_events = add_elapsed_times_pbp(pbp_events, game_start_utc)
+        print(f"Added elapsed times to {len(comments)} comments and {len(pbp_events)} PBP events")
+        with open(out, 'w', encoding='utf-8') as f:
+            json.dump({"comments": comments, "pbp": pbp_events}, f, ensure_ascii=False)
+
+    t = time.perf_counter()
+    align_key = cache.key("align", [ingest_key, file_digest(pbp_file)], {"start_utc": game_start_utc},
+                          code_digest("align_time.py", "utils.py"))
+    aligned_file, hit = cache.run("align", align_key, align, suffix=".json")
+    stages["align"] = "hit" if hit else "miss"
+    timings["align"] = time.perf_counter() - t
+
     # Build windows
-    windows = build_windows(comments, pbp_events)
-    print(f"Built {len(windows)} windows")
-    
+    def window(out: Path):
+        with open(aligned_file, 'r', encoding='utf-8') as f:
+            aligned = json.load(f)
+        windows = build_windows(aligned["comments"], aligned["pbp"], win_len=win_len, stride=stride)
+        print(f"Built {len(windows)} windows")
+        total_comments = sum(len(w["comments"]) for w in windows.values())
+        total_pbp = sum(len(w["pbp"]) for w in windows.values())
+        print(f"Total comments in windows: {total_comments}")
+        print(f"Total PBP events in windows: {total_pbp}")
+        scoreboard = Scoreboard(aligned["pbp"], teams_from_game_id(game_id))
+        print(f"Final score {scoreboard.teams[0]} {scoreboard.score_str(float('inf'))} {scoreboard.teams[1]}, "
+              f"{len(scoreboard.lead_changes)} lead changes")
+        save_windows_to_jsonl(windows, out, win_len, stride, scoreboard)
+
+    t = time.perf_counter()
+    # game_id sets the scoreboard's team order and is written into every window
+    window_config = {"game_id": game_id, "win_len": win_len}
+    if stride and stride != win_len:
+        window_config["stride"] = stride
+    window_key = cache.key("window", [align_key], window_config,
+                           code_digest("windowing.py", "scoreboard.py", "utils.py"))
+    window_file, hit = cache.run("window", window_key, window)
+    stages["window"] = "hit" if hit else "miss"
+
     # Save windows
     windows_dir = Path("data/windows")
-    windows_dir.mkdir(exist_ok=True)
-    windows_file = windows_dir / f"{game_id}.jsonl"
-    save_windows_to_jsonl(windows, windows_file)
-    
-    print(f"Saved windows to {windows_file}")
-    
-    # Print some stats
-    total_comments = sum(len(w["comments"]) for w in windows.values())
-    total_pbp = sum(len(w["pbp"]) for w in windows.values())
-    print(f"Total comments in windows: {total_comments}")
-    print(f"Total PBP events in windows: {total_pbp}")
+    windows_dir.mkdir(parents=True, exist_ok=True)
+    windows_out = windows_dir / f"{game_id}.jsonl"
+    shutil.copyfile(window_file, windows_out)
+    print(f"Saved windows to {windows_out}")
+    if parquet_dir is not None:
+        from timeline.columnar import write_windows_jsonl
+        write_windows_jsonl(window_file, parquet_dir, game_id, win_len, stride)
+        print(f"Saved columnar windows to {parquet_dir}")
+    timings["window"] = time.perf_counter() - t
+
+    # Teacher labels
+    if label:
+        def label_stage(out: Path):
+            from timeline.teacher import label_window
+            with open(window_file, 'r', encoding='utf-8') as fin, open(out, 'w', encoding='utf-8') as fout:
+                for line in fin:
+                    if not line.strip():
+                        continue
+                    w = json.loads(line)
+                    fout.write(json.dumps({"win_id": w["win_id"], **label_window(w)}, ensure_ascii=False) + "\n")
+
+        t = time.perf_counter()
+        label_key = cache.key("label", [window_key], {}, code_digest("teacher.py", "sentiment.py"))
+        label_file, hit = cache.run("label", label_key, label_stage)
+        stages["label"] = "hit" if hit else "miss"
+
+        labels_dir = Path("data/labels")
+        labels_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(label_file, labels_dir / f"{game_id}.jsonl")
+        print(f"Saved labels to {labels_dir / f'{game_id}.jsonl'}")
+        timings["label"] = time.perf_counter() - t
+
+    with open(window_file, 'r', encoding='utf-8') as f:
+        n_windows = sum(1 for line in f if line.strip())
+
+    print("Stages: " + ", ".join(f"{name}={status}" for name, status in stages.items()))
+    timings["total"] = time.perf_counter() - t0
+    return {"game_id": game_id, "stages": stages, "timings": timings, "windows": n_windows}
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python run_pipeline.py <game_id>")
-        print("Example: python run_pipeline.py 2019-12-01-LAL-DAL")
-        return
-    
-    game_id = sys.argv[1]
-    run_pipeline_for_game(game_id)
+    ap = argparse.ArgumentParser(description="Run the full pipeline for one game")
+    ap.add_argument("game_id", help="e.g. 2019-12-01-LAL-DAL")
+    ap.add_argument("--raw_reddit_dir", help="Fetched threads to ingest (default: use data/reddit as-is)")
+    ap.add_argument("--win_len", type=int, default=60, help="Window length in seconds")
+    ap.add_argument("--stride", type=int, help="Sliding-window stride in seconds (default: disjoint windows)")
+    ap.add_argument("--no_cache", action="store_true", help="Recompute every stage")
+    ap.add_argument("--no_label", action="store_true", help="Skip the teacher labeling stage")
+    ap.add_argument("--parquet_dir", help="Also write windows as Parquet (e.g. data/parquet)")
+    args = ap.parse_args()
+
+    run_pipeline_for_game(
+        args.game_id,
+        cache=StageCache(enabled=not args.no_cache),
+        raw_reddit_dir=Path(args.raw_reddit_dir) if args.raw_reddit_dir else None,
+        win_len=args.win_len,
+        label=not args.no_label,
+        parquet_dir=Path(args.parquet_dir) if args.parquet_dir else None,
+        stride=args.stride,
+    )
 
 if __name__ == "__main__":
     main()
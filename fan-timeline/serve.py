@@ -3,15 +3,30 @@
 FastAPI server for timeline generation.
 """
 
+import asyncio
 import json
+import os
+import sys
+import time
+from contextlib import aclosing
 import torch
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from pathlib import Path
+from typing import Optional
 from transformers import AutoModelForCausalLM, AutoTokenizer
 from peft import PeftModel
 import logging
 
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.inference import BatchEngine, HFGenerator, stream_completions
+from timeline.make_sft import game_prompts, margin_text
+from timeline.serve import CommentIn, PbpEventIn
+from timeline.windowing import windows_from_records
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,6 +37,10 @@ app = FastAPI(title="Sports Timeline Generator", version="1.0.0")
 # Global variables for model and tokenizer
 model = None
 tokenizer = None
+# Concurrent requests are micro-batched into one model.generate call
+engine = None
+MAX_BATCH = int(os.environ.get("TIMELINE_MAX_BATCH", 8))
+MAX_WAIT_MS = float(os.environ.get("TIMELINE_MAX_WAIT_MS", 10))
 
 class TimelineRequest(BaseModel):
     game_id: str
@@ -29,7 +48,13 @@ class TimelineRequest(BaseModel):
     quarter: str = "Q1"
     window: str = "11:59"
     score_before: str = "0-0"
-    score_after: str = "0-0"
+    score_after: str = Field("0-0", pattern=r"^\d+-\d+$")
+
+class GameRequest(BaseModel):
+    game_id: str
+    comments: list[CommentIn]
+    pbp: list[PbpEventIn] = []
+    start_utc: Optional[int] = None  # tip-off; defaults to the earliest comment
 
 class TimelineResponse(BaseModel):
     timeline: list[dict]
@@ -76,46 +101,25 @@ def load_model_and_tokenizer(model_path: str):
         logger.error(f"❌ Error loading model: {e}")
         return False
 
-def generate_timeline(request: TimelineRequest) -> str:
-    """Generate timeline from request."""
-    global model, tokenizer
-    
-    if model is None or tokenizer is None:
-        raise HTTPException(status_code=500, detail="Model not loaded")
-    
-    # Build prompt
+def build_prompt(request: TimelineRequest) -> str:
+    """The SFT prompt for one window."""
     comments_text = "\n• ".join(request.comments) if request.comments else "• What a game!\n• This is amazing"
     
     prompt = f"""You are a sports timeline generator. Given fan comments from a game thread, create a concise event summary with sentiment.
 
 [CONTEXT]
 game_id={request.game_id}
-quarter={request.quarter} window={request.window} score_before={request.score_before} score_after={request.score_after}
+quarter={request.quarter} window={request.window} score_before={request.score_before} score_after={request.score_after} margin={margin_text(request.score_after)}
 
 [COMMENTS]
 {comments_text}"""
-    
-    inputs = tokenizer(prompt, return_tensors="pt", truncation=True, max_length=512)
-    
-    if torch.cuda.is_available():
-        inputs = {k: v.cuda() for k, v in inputs.items()}
-    
-    with torch.no_grad():
-        outputs = model.generate(
-            **inputs,
-            max_new_tokens=256,
-            temperature=0.7,
-            do_sample=True,
-            pad_token_id=tokenizer.eos_token_id,
-            eos_token_id=tokenizer.eos_token_id
-        )
-    
-    generated_text = tokenizer.decode(outputs[0], skip_special_tokens=True)
-    # Extract only the new generated part
-    prompt_length = len(tokenizer.decode(inputs["input_ids"][0], skip_special_tokens=True))
-    generated_part = generated_text[prompt_length:].strip()
-    
-    return generated_part
+    return prompt
+
+def generate_timeline(request: TimelineRequest) -> str:
+    """Generate timeline from request (blocks until its batch has run)."""
+    if engine is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+    return engine.generate(build_prompt(request))
 
 @app.on_event("startup")
 async def startup_event():
@@ -128,6 +132,16 @@ async def startup_event():
     success = load_model_and_tokenizer(model_path)
     if not success:
         logger.error("Failed to load model")
+        return
+    
+    global engine
+    engine = BatchEngine(HFGenerator(model, tokenizer), max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Finish queued generations and stop the batch engine."""
+    if engine is not None:
+        engine.close()
 
 @app.get("/")
 async def root():
@@ -140,40 +154,115 @@ async def health_check():
     return {
         "status": "healthy",
         "model_loaded": model is not None,
-        "cuda_available": torch.cuda.is_available()
+        "cuda_available": torch.cuda.is_available(),
+        "batches": engine.stats if engine is not None else None
     }
 
+def parse_generated(generated_text: str) -> TimelineResponse:
+    """Turn model output into a response, reporting unparseable output.
+
+    Never raises: in the whole-game stream a bad window becomes an error
+    record instead of ending the stream.
+    """
+    # Try to parse as JSON
+    try:
+        parsed = json.loads(generated_text)
+    except json.JSONDecodeError:
+        return TimelineResponse(
+            timeline=[],
+            success=False,
+            error=f"Generated text is not valid JSON: {generated_text[:200]}"
+        )
+    if not isinstance(parsed, dict):
+        return TimelineResponse(
+            timeline=[],
+            success=False,
+            error=f"Generated JSON is not an object: {generated_text[:200]}"
+        )
+    timeline = parsed.get("timeline")
+    if timeline is None:
+        return TimelineResponse(
+            timeline=[],
+            success=False,
+            error="Generated text missing timeline field"
+        )
+    if not isinstance(timeline, list) or not all(isinstance(entry, dict) for entry in timeline):
+        return TimelineResponse(
+            timeline=[],
+            success=False,
+            error="Generated timeline is not a list of objects"
+        )
+    return TimelineResponse(timeline=timeline, success=True)
+
 @app.post("/v1/timeline/generate", response_model=TimelineResponse)
 async def generate_timeline_endpoint(request: TimelineRequest):
     """Generate timeline from fan comments."""
+    if engine is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
     try:
-        generated_text = generate_timeline(request)
-        
-        # Try to parse as JSON
-        try:
-            parsed = json.loads(generated_text)
-            if "timeline" in parsed:
-                return TimelineResponse(
-                    timeline=parsed["timeline"],
-                    success=True
-                )
-            else:
-                return TimelineResponse(
-                    timeline=[],
-                    success=False,
-                    error="Generated text missing timeline field"
-                )
-        except json.JSONDecodeError:
-            return TimelineResponse(
-                timeline=[],
-                success=False,
-                error=f"Generated text is not valid JSON: {generated_text[:200]}"
-            )
-            
+        # Await the batch instead of blocking the event loop, so other requests can join it
+        generated_text = await asyncio.wrap_future(engine.submit(build_prompt(request)))
+        return parse_generated(generated_text)
+    except Exception as e:
+        logger.error(f"Generation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/v1/timeline/generate_batch", response_model=list[TimelineResponse])
+async def generate_batch_endpoint(requests: list[TimelineRequest]):
+    """Generate timelines for many windows (e.g. a whole game), batched together."""
+    if engine is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+    try:
+        futures = [asyncio.wrap_future(engine.submit(build_prompt(r))) for r in requests]
+        return [parse_generated(text) for text in await asyncio.gather(*futures)]
     except Exception as e:
         logger.error(f"Generation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/v1/timeline/game")
+async def generate_game_endpoint(request: GameRequest, http_request: Request):
+    """Generate a whole game's timeline from its thread and PBP in one call.
+
+    Comments and PBP are aligned and windowed server-side, every window's
+    prompt goes to the batch engine at once, and results stream back as
+    their batches finish: NDJSON by default, server-sent events with
+    Accept: text/event-stream. Each window line carries win_id, period and
+    clock_start (lines arrive roughly, not strictly, in window order); a
+    final "done" line summarizes the game.
+    """
+    if engine is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+    
+    # Aligning and windowing is CPU work; keep it off the event loop
+    loop = asyncio.get_running_loop()
+    prompts = await loop.run_in_executor(None, lambda: game_prompts(
+        windows_from_records(request.comments, request.pbp, request.game_id, request.start_utc), request.game_id))
+    sse = "text/event-stream" in http_request.headers.get("accept", "")
+    
+    def event(data: dict) -> str:
+        line = json.dumps(data, ensure_ascii=False)
+        return f"event: {data['type']}\ndata: {line}\n\n" if sse else line + "\n"
+    
+    async def events():
+        start = time.perf_counter()
+        failed = 0
+        # aclosing: a client disconnect cancels the windows not yet generated
+        async with aclosing(stream_completions(engine, [prompt for _, prompt in prompts])) as results:
+            async for i, text, error in results:
+                window = prompts[i][0]
+                if error is None:
+                    result = parse_generated(text)
+                else:
+                    logger.error(f"Generation error: {error}")
+                    result = TimelineResponse(timeline=[], success=False, error=str(error))
+                failed += not result.success
+                yield event({"type": "window", "win_id": window["win_id"], "period": window["period"],
+                             "clock_start": window["clock_start"], **result.model_dump()})
+        yield event({"type": "done", "game_id": request.game_id, "windows": len(prompts), "failed": failed,
+                     "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)})
+    
+    return StreamingResponse(events(), media_type="text/event-stream" if sse else "application/x-ndjson")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Tuple
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file's bytes."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def code_digest(*module_files: str) -> str:
+    """Version of a stage's code: digest of its source files.
+
+    Editing teacher.py changes the label stage's digest and nothing else.
+    """
+    h = hashlib.sha256()
+    for name in module_files:
+        path = Path(__file__).parent / name
+        h.update(name.encode("utf-8"))
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+class StageCache:
+    """Content-addressed store for pipeline stage outputs.
+
+    A stage's key hashes its input digests, its config and its code version.
+    Outputs live at `root/<stage>/<key><suffix>`, so an unchanged stage is
+    found by key and skipped. Downstream stages take the upstream key as an
+    input digest, so one changed input invalidates exactly the stages after it.
+    """
+
+    def __init__(self, root: Path = Path("data/cache"), enabled: bool = True):
+        self.root = Path(root)
+        self.enabled = enabled
+
+    def key(self, stage: str, inputs: Iterable[str], config: Dict, code_version: str) -> str:
+        payload = json.dumps({
+            "stage": stage,
+            "inputs": list(inputs),
+            "config": config,
+            "code": code_version,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, stage: str, key: str, suffix: str = ".jsonl") -> Path:
+        return self.root / stage / f"{key}{suffix}"
+
+    def run(self, stage: str, key: str, compute: Callable[[Path], None],
+            suffix: str = ".jsonl") -> Tuple[Path, bool]:
+        """Return (output path, hit). On a miss, compute(tmp_path) writes the output."""
+        out = self.path(stage, key, suffix)
+        if self.enabled and out.exists():
+            return out, True
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_name(out.name + f".{os.getpid()}.part")
+        try:
+            compute(tmp)
+            os.replace(tmp, out)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        return out, False
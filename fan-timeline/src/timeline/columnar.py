@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Optional Parquet storage for comments, PBP events and windows.
+
+Each kind is a Hive-partitioned dataset (`<root>/<kind>/game_id=<id>/part-0.parquet`),
+so reads prune by game_id from the directory layout and push time-range filters
+down to row-group statistics. Windows are stored normalized: the `windows`
+table holds one summary row per window, and comments / PBP rows carry the
+`win_id` they fall in instead of being re-serialized inside every window.
+
+Usage: python columnar.py --data_dir data --out data/parquet
+"""
+
+from __future__ import annotations
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = ds = pq = None
+
+try:
+    from .windowing import create_window_summary
+except ImportError:
+    from windowing import create_window_summary
+
+KINDS = ("comments", "pbp", "windows")
+
+def _schemas() -> Dict[str, "pa.Schema"]:
+    # Same logical fields as ingest_reddit.Comment / parse_pbp.PbpEvent / window summaries;
+    # game_id lives in the partition path. elapsed/win_id are null before alignment/windowing.
+    return {
+        "comments": pa.schema([
+            ("body", pa.string()),
+            ("created_utc", pa.int64()),
+            ("score", pa.int64()),
+            ("author", pa.string()),
+            ("elapsed", pa.int64()),
+            ("win_id", pa.int32()),
+        ]),
+        "pbp": pa.schema([
+            ("period", pa.int32()),
+            ("clock", pa.string()),
+            ("team", pa.string()),
+            ("points", pa.int32()),
+            ("desc", pa.string()),
+            ("elapsed", pa.int64()),
+            ("win_id", pa.int32()),
+        ]),
+        "windows": pa.schema([
+            ("win_id", pa.int32()),
+            ("period", pa.int32()),
+            ("clock_start", pa.string()),
+            ("score_before", pa.string()),
+            ("score_after", pa.string()),
+            ("lead_changes", pa.list_(pa.struct([
+                ("elapsed", pa.int64()),
+                ("period", pa.int32()),
+                ("clock", pa.string()),
+                ("team", pa.string()),
+                ("score", pa.string()),
+                ("desc", pa.string()),
+            ]))),
+            ("start_sec", pa.int64()),
+            ("end_sec", pa.int64()),
+            ("n_comments", pa.int32()),
+            ("n_pbp", pa.int32()),
+        ]),
+    }
+
+# Column each kind is filtered on for time-range pushdown (elapsed game seconds)
+TIME_COLUMN = {"comments": "elapsed", "pbp": "elapsed", "windows": "start_sec"}
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet storage needs pyarrow: pip install pyarrow")
+
+def write_records(records: Iterable[Dict], root: Path, kind: str, game_id: str) -> Path:
+    """Write one game's records of `kind`, replacing any previous partition."""
+    _require_pyarrow()
+    schema = _schemas()[kind]
+    columns = {name: [] for name in schema.names}
+    for r in records:
+        for name in schema.names:
+            columns[name].append(r.get(name))
+    table = pa.Table.from_pydict(columns, schema=schema)
+
+    part_dir = Path(root) / kind / f"game_id={game_id}"
+    part_dir.mkdir(parents=True, exist_ok=True)
+    out = part_dir / "part-0.parquet"
+    pq.write_table(table, out, row_group_size=16384)
+    return out
+
+def write_window_summaries(summaries: Iterable[Dict], root: Path, game_id: str, win_len: int = 60,
+                           stride: Optional[int] = None):
+    """Write create_window_summary() dicts as window rows + win_id-tagged comments and PBP.
+
+    Sliding windows (stride < win_len) store an item once per window it falls in.
+    """
+    rows, comments, pbp = [], [], []
+    for w in sorted(summaries, key=lambda w: w["win_id"]):
+        win_id = w["win_id"]
+        start_sec = win_id * (stride or win_len)
+        rows.append({**w, "start_sec": start_sec, "end_sec": start_sec + win_len - 1,
+                     "n_comments": len(w["comments"]), "n_pbp": len(w["pbp"])})
+        comments.extend({**c, "win_id": win_id} for c in w["comments"])
+        pbp.extend({**e, "win_id": win_id} for e in w["pbp"])
+    write_records(rows, root, "windows", game_id)
+    write_records(comments, root, "comments", game_id)
+    write_records(pbp, root, "pbp", game_id)
+
+def write_windows(windows: Dict[int, Dict], root: Path, game_id: str, win_len: int = 60,
+                  stride: Optional[int] = None, scoreboard=None):
+    """Write build_windows() output (see write_window_summaries)."""
+    write_window_summaries((create_window_summary(win_id, windows[win_id], win_len, stride, scoreboard)
+                            for win_id in windows), root, game_id, win_len, stride)
+
+def write_windows_jsonl(windows_file: Path, root: Path, game_id: str, win_len: int = 60,
+                        stride: Optional[int] = None):
+    """Convert a save_windows_to_jsonl() file to the columnar layout."""
+    with open(windows_file, "r", encoding="utf-8") as f:
+        summaries = [json.loads(line) for line in f if line.strip()]
+    write_window_summaries(summaries, root, game_id, win_len, stride)
+
+def _dataset(root: Path, kind: str) -> "ds.Dataset":
+    partitioning = ds.partitioning(pa.schema([("game_id", pa.string())]), flavor="hive")
+    return ds.dataset(Path(root) / kind, format="parquet", partitioning=partitioning,
+                      schema=_schemas()[kind].append(pa.field("game_id", pa.string())))
+
+def read_table(root: Path, kind: str, game_ids: Optional[Sequence[str]] = None,
+               time_range: Optional[Tuple[int, int]] = None,
+               columns: Optional[List[str]] = None) -> "pa.Table":
+    """Scan one kind with game_id / time-range predicates pushed into the scan.
+
+    Args:
+        root: Columnar dataset root
+        kind: "comments", "pbp" or "windows"
+        game_ids: Only these games (partition pruning)
+        time_range: Inclusive (start, end) elapsed seconds
+        columns: Only read these columns
+    """
+    _require_pyarrow()
+    expr = None
+    if game_ids is not None:
+        expr = ds.field("game_id").isin(list(game_ids))
+    if time_range is not None:
+        col = ds.field(TIME_COLUMN[kind])
+        rng = (col >= time_range[0]) & (col <= time_range[1])
+        expr = rng if expr is None else expr & rng
+    return _dataset(root, kind).to_table(columns=columns, filter=expr)
+
+def read_windows(root: Path, game_id: str, time_range: Optional[Tuple[int, int]] = None,
+                 comment_columns: Sequence[str] = ("body", "created_utc", "score", "author", "elapsed")
+                 ) -> List[Dict]:
+    """Rebuild window dicts (as in data/windows/*.jsonl) for one game.
+
+    Only the requested comment columns are read, e.g. ("body", "score") is
+    enough for SFT prompts and teacher labels.
+    """
+    summaries = read_table(root, "windows", [game_id], time_range).to_pylist()
+    if not summaries:
+        return []
+    win_range = (summaries[0]["start_sec"], summaries[-1]["end_sec"]) if time_range else None
+    by_win: Dict[int, Dict] = {s["win_id"]: {"comments": [], "pbp": []} for s in summaries}
+
+    comments = read_table(root, "comments", [game_id], win_range, columns=list(comment_columns) + ["win_id"])
+    for c in comments.to_pylist():
+        win = by_win.get(c.pop("win_id"))
+        if win is not None:
+            win["comments"].append(c)
+    pbp = read_table(root, "pbp", [game_id], win_range,
+                     columns=["period", "clock", "team", "points", "desc", "elapsed", "win_id"])
+    for e in pbp.to_pylist():
+        win = by_win.get(e.pop("win_id"))
+        if win is not None:
+            win["pbp"].append({**e, "game_id": game_id})
+
+    out = []
+    for s in sorted(summaries, key=lambda s: s["win_id"]):
+        w = {
+            "win_id": s["win_id"],
+            "period": s["period"],
+            "clock_start": s["clock_start"],
+            "score_before": s["score_before"],
+            "score_after": s["score_after"],
+            "comments": by_win[s["win_id"]]["comments"],
+            "pbp": by_win[s["win_id"]]["pbp"],
+        }
+        if s["lead_changes"] is not None:
+            w["lead_changes"] = s["lead_changes"]
+        out.append(w)
+    return out
+
+def list_games(root: Path, kind: str = "windows") -> List[str]:
+    """Game ids present in a columnar dataset."""
+    base = Path(root) / kind
+    if not base.exists():
+        return []
+    return sorted(p.name.split("=", 1)[1] for p in base.glob("game_id=*") if p.is_dir())
+
+def main():
+    ap = argparse.ArgumentParser(description="Convert pipeline JSONL outputs to Parquet")
+    ap.add_argument("--data_dir", default="data", help="Directory containing windows/ (and reddit/, pbp/)")
+    ap.add_argument("--out", default="data/parquet", help="Columnar dataset root")
+    ap.add_argument("--win_len", type=int, default=60)
+    ap.add_argument("--stride", type=int, help="Stride the windows were built with (default: win_len)")
+    args = ap.parse_args()
+
+    data_dir = Path(args.data_dir)
+    windows_files = sorted((data_dir / "windows").glob("*.jsonl"))
+    for windows_file in windows_files:
+        write_windows_jsonl(windows_file, Path(args.out), windows_file.stem, args.win_len, args.stride)
+        print(f"Converted {windows_file}")
+
+    # Games that have not been windowed yet: store raw comments / PBP only
+    windowed = {f.stem for f in windows_files}
+    for kind, sub in (("comments", "reddit"), ("pbp", "pbp")):
+        for path in sorted((data_dir / sub).glob("*.jsonl")):
+            if path.stem in windowed:
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            write_records(records, Path(args.out), kind, path.stem)
+            print(f"Converted {path}")
+
+    print(f"Columnar dataset written to {args.out}")
+
+if __name__ == "__main__":
+    main()
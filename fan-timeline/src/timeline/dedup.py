@@ -0,0 +1,138 @@
+from __future__ import annotations
+import hashlib
+import re
+from functools import lru_cache
+from typing import Dict, List, Set
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_REPEAT = re.compile(r"(.)\1{2,}")
+
+# MinHash signature of 32 values, LSH'd as 8 bands of 4 rows. A pair with
+# shingle Jaccard 0.8 shares a band with probability 0.985 (0.9: > 0.999);
+# candidates are then checked against the exact Jaccard, so the bands only
+# have to find them. A missed pair just stays two representatives.
+NUM_PERM = 32
+_BANDS = 8
+_ROWS = NUM_PERM // _BANDS
+
+def dedup_key(text: str) -> str:
+    """Exact-duplicate key: case, punctuation, spacing and stretched letters removed.
+
+    "Let's get this W!!!" and "lets  get this w" share a key.
+    """
+    text = _NON_WORD.sub("", text.lower())
+    text = _REPEAT.sub(r"\1\1", text)
+    return " ".join(text.split())
+
+def shingles(key: str, size: int = 3) -> Set[str]:
+    if len(key) <= size:
+        return {key}
+    return {key[i:i + size] for i in range(len(key) - size + 1)}
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+@lru_cache(maxsize=1)
+def _permutations():
+    """Fixed odd multipliers and offsets for NUM_PERM multiply-shift hashes."""
+    import numpy as np
+    # blake2b, not hash(): signatures must not depend on PYTHONHASHSEED
+    seeds = [int.from_bytes(hashlib.blake2b(f"perm-{i}".encode(), digest_size=8).digest(), "little")
+             for i in range(2 * NUM_PERM + _ROWS)]
+    a = np.array([s | 1 for s in seeds[:NUM_PERM]], dtype=np.uint64)
+    b = np.array(seeds[NUM_PERM:2 * NUM_PERM], dtype=np.uint64)
+    rows = np.array([s | 1 for s in seeds[2 * NUM_PERM:]], dtype=np.uint64)
+    return a, b, rows
+
+def minhash_signatures(keys: List[str]):
+    """(n, NUM_PERM) MinHash signatures of the keys' character 3-gram sets.
+
+    Keys must be at least 3 characters and free of NUL. All keys are joined
+    and decoded to code points once; each 3-gram packs exactly into 63 bits
+    (code points are < 2**21), so no per-shingle Python work is done.
+    """
+    import numpy as np
+    a, b, _ = _permutations()
+    cps = np.frombuffer("\0".join(keys).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    grams = cps[:-2] | cps[1:-1] << np.uint64(21) | cps[2:] << np.uint64(42)
+    grams = grams[(cps[:-2] != 0) & (cps[1:-1] != 0) & (cps[2:] != 0)]
+    starts = np.cumsum([0] + [len(k) - 2 for k in keys[:-1]])
+    with np.errstate(over="ignore"):
+        permuted = grams[:, None] * a  # uint64 arithmetic wraps mod 2^64
+        permuted += b
+    permuted >>= np.uint64(32)
+    return np.minimum.reduceat(permuted, starts, axis=0)
+
+def candidate_pairs(signatures) -> List[tuple]:
+    """Row pairs whose signatures agree on every row of at least one band."""
+    import numpy as np
+    n = len(signatures)
+    _, _, rows = _permutations()
+    with np.errstate(over="ignore"):
+        band_keys = (signatures.reshape(n, _BANDS, _ROWS) * rows).sum(axis=2)
+    band_keys = band_keys ^ np.arange(_BANDS, dtype=np.uint64)  # keep bands apart
+    flat = band_keys.ravel()
+    order = np.argsort(flat, kind="stable")
+    owners = (order // _BANDS).tolist()
+    flat = flat[order]
+    edges = np.flatnonzero(np.diff(flat)) + 1
+    bounds = [0] + edges.tolist() + [len(flat)]
+    pairs = set()
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        if hi - lo > 1:
+            members = sorted(set(owners[lo:hi]))
+            pairs.update((x, y) for i, x in enumerate(members) for y in members[i + 1:])
+    return sorted(pairs)
+
+def collapse_comments(comments: List[Dict], threshold: float = 0.8, min_chars: int = 12) -> List[Dict]:
+    """Collapse repeated and near-repeated comments into one representative each.
+
+    Comments with the same dedup_key are exact repeats. Distinct keys of at
+    least min_chars characters are also merged when the Jaccard similarity of
+    their character 3-gram sets is at least threshold (typos, an extra "lol");
+    MinHash LSH finds the candidate pairs without comparing every pair.
+    Shorter keys ("W", "lets go") only merge exactly: a changed word is most
+    of a short comment. threshold >= 1 disables near-duplicate merging.
+
+    Each representative is a copy of the highest-scored member with a "count"
+    of how many comments it stands for (existing counts add up, so collapsing
+    twice is a no-op). Representatives keep the order their groups first
+    appear in.
+    """
+    groups: Dict[str, List[int]] = {}
+    for i, c in enumerate(comments):
+        groups.setdefault(dedup_key(c.get("body", "")), []).append(i)
+    keys = list(groups)
+
+    # Union-find over keys
+    parent = list(range(len(keys)))
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    long_keys = [k for k in range(len(keys)) if len(keys[k]) >= max(min_chars, 3)]
+    if threshold < 1 and len(long_keys) > 1:
+        sets: Dict[int, Set[str]] = {}
+        for i, j in candidate_pairs(minhash_signatures([keys[k] for k in long_keys])):
+            x, y = long_keys[i], long_keys[j]
+            if find(x) == find(y):
+                continue
+            for k in (x, y):
+                if k not in sets:
+                    sets[k] = shingles(keys[k])
+            if jaccard(sets[x], sets[y]) >= threshold:
+                parent[find(y)] = find(x)
+
+    clusters: Dict[int, List[int]] = {}
+    for k, key in enumerate(keys):
+        clusters.setdefault(find(k), []).extend(groups[key])
+
+    out = []
+    for members in sorted(clusters.values(), key=min):
+        best = max(members, key=lambda i: (comments[i].get("score", 0), -i))
+        rep = dict(comments[best])
+        rep["count"] = sum(comments[i].get("count", 1) for i in members)
+        out.append(rep)
+    return out
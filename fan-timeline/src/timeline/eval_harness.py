@@ -1,22 +1,24 @@
 from __future__ import annotations
-import json, argparse, os
-from typing import List, Dict, Tuple
+import json, argparse, os, random
+from typing import List, Dict, Optional, Tuple
 from collections import Counter
-import jsonschema
 from sklearn.metrics import f1_score, classification_report
 
+try:
+    from .jsonl import JsonlFile
+    from .validation import get_validator, validate
+except ImportError:
+    from jsonl import JsonlFile
+    from validation import get_validator, validate
+
 def load_schema(schema_path: str) -> Dict:
     """Load JSON schema for validation."""
     with open(schema_path, "r") as f:
         return json.load(f)
 
 def validate_json_schema(data: Dict, schema: Dict) -> Tuple[bool, str]:
-    """Validate data against JSON schema."""
-    try:
-        jsonschema.validate(data, schema)
-        return True, "Valid"
-    except jsonschema.ValidationError as e:
-        return False, str(e)
+    """Validate data against JSON schema (compiled once per schema)."""
+    return validate(data, schema)
 
 def calculate_coverage(predicted_events: List[Dict], reference_events: List[Dict], 
                       time_tolerance: int = 90) -> float:
@@ -80,12 +82,16 @@ def calculate_redundancy(events: List[Dict], similarity_threshold: float = 0.8)
     total_pairs = len(events) * (len(events) - 1) / 2
     return duplicate_count / total_pairs if total_pairs > 0 else 0.0
 
-def evaluate_timeline(predicted: Dict, reference: Dict, schema: Dict) -> Dict:
-    """Evaluate a single timeline prediction."""
+def evaluate_timeline(predicted: Dict, reference: Dict, schema: Dict,
+                      validation: Optional[Tuple[bool, str]] = None) -> Dict:
+    """Evaluate a single timeline prediction.
+
+    validation: the prediction's (is_valid, message), if already checked in a batch
+    """
     results = {}
     
     # JSON schema validation
-    is_valid, validation_msg = validate_json_schema(predicted, schema)
+    is_valid, validation_msg = validation or validate_json_schema(predicted, schema)
     results["json_valid"] = is_valid
     results["validation_error"] = validation_msg
     
@@ -115,37 +121,35 @@ def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--predictions", required=True, help="Path to predicted timelines JSONL")
     ap.add_argument("--references", required=True, help="Path to reference timelines JSONL")
-    ap.add_argument("--schema", default="schema/timeline.schema.json", help="Path to JSON schema")
+    ap.add_argument("--schema", default=None, help="Path to JSON schema (default: schema/timeline.schema.json)")
     ap.add_argument("--output", help="Output file for detailed results")
+    ap.add_argument("--sample", type=int, default=0, help="Evaluate a random sample of this many pairs")
+    ap.add_argument("--seed", type=int, default=0, help="Seed for --sample")
     args = ap.parse_args()
     
-    # Load schema
-    try:
-        schema = load_schema(args.schema)
-        print(f"Loaded schema from {args.schema}")
-    except Exception as e:
-        print(f"Warning: Could not load schema: {e}")
-        schema = {}
-    
-    # Load predictions and references
-    predictions = []
-    with open(args.predictions, "r") as f:
-        for line in f:
-            if line.strip():
-                predictions.append(json.loads(line))
-    
-    references = []
-    with open(args.references, "r") as f:
-        for line in f:
-            if line.strip():
-                references.append(json.loads(line))
-    
-    print(f"Loaded {len(predictions)} predictions and {len(references)} references")
-    
-    # Evaluate each prediction
+    # Compile the schema once; a missing schema validates everything
+    validator = get_validator(args.schema)
+    schema = validator.schema if validator is not None else {}
+    if validator is not None:
+        print(f"Loaded schema from {args.schema or 'schema/timeline.schema.json'}")
+    
+    # Predictions and references are paired by record; only sampled pairs are parsed
+    with JsonlFile(args.predictions) as predictions, JsonlFile(args.references) as references:
+        print(f"Found {len(predictions)} predictions and {len(references)} references")
+        n = min(len(predictions), len(references))
+        if args.sample and args.sample < n:
+            sample_ids = sorted(random.Random(args.seed).sample(range(n), args.sample))
+        else:
+            sample_ids = range(n)
+        
+        preds = predictions.take(sample_ids)
+        refs = references.take(sample_ids)
+    
+    # Validate all predictions in one batch, then evaluate each
+    checks = validator.validate_many(preds) if validator is not None else [(True, "Valid")] * len(preds)
     all_results = []
-    for i, (pred, ref) in enumerate(zip(predictions, references)):
-        result = evaluate_timeline(pred, ref, schema)
+    for i, pred, ref, check in zip(sample_ids, preds, refs, checks):
+        result = evaluate_timeline(pred, ref, schema, check)
         result["sample_id"] = i
         all_results.append(result)
     
@@ -2,18 +2,130 @@
 """
 Fetch Reddit game threads using Pushshift API for mini-dataset.
 Usage: python fetch_threads.py --schedule_csv mini_schedule.csv --out_dir data/raw_reddit_mini
+       python fetch_threads.py --schedule_csv full_schedule.csv --out_dir data/raw_reddit_full --workers 4 --rate 2
 """
 
 import argparse
 import csv
 import json
 import os
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Set
 import requests
+from requests.adapters import HTTPAdapter
 
-def search_game_thread(date: str, away: str, home: str) -> Optional[Dict]:
+PUSHSHIFT_BASE_URL = "https://api.pushshift.io"
+MANIFEST_NAME = "fetch_manifest.ckpt"
+GAME_HEADER_KEYS = ("game_id", "date", "away", "home", "submission")
+SEARCH_CACHE_DIR = "_search_cache"
+
+# Abbreviation -> names used in r/nba game thread titles
+TEAM_ALIASES = {
+    "ATL": ["Atlanta Hawks", "Hawks"],
+    "BOS": ["Boston Celtics", "Celtics"],
+    "BKN": ["Brooklyn Nets", "Nets", "BRK"],
+    "CHA": ["Charlotte Hornets", "Hornets", "CHO"],
+    "CHI": ["Chicago Bulls", "Bulls"],
+    "CLE": ["Cleveland Cavaliers", "Cavaliers", "Cavs"],
+    "DAL": ["Dallas Mavericks", "Mavericks", "Mavs"],
+    "DEN": ["Denver Nuggets", "Nuggets"],
+    "DET": ["Detroit Pistons", "Pistons"],
+    "GSW": ["Golden State Warriors", "Warriors"],
+    "HOU": ["Houston Rockets", "Rockets"],
+    "IND": ["Indiana Pacers", "Pacers"],
+    "LAC": ["Los Angeles Clippers", "LA Clippers", "Clippers"],
+    "LAL": ["Los Angeles Lakers", "LA Lakers", "Lakers"],
+    "MEM": ["Memphis Grizzlies", "Grizzlies"],
+    "MIA": ["Miami Heat", "Heat"],
+    "MIL": ["Milwaukee Bucks", "Bucks"],
+    "MIN": ["Minnesota Timberwolves", "Timberwolves", "Wolves"],
+    "NOP": ["New Orleans Pelicans", "Pelicans"],
+    "NYK": ["New York Knicks", "Knicks"],
+    "OKC": ["Oklahoma City Thunder", "Thunder"],
+    "ORL": ["Orlando Magic", "Magic"],
+    "PHI": ["Philadelphia 76ers", "76ers", "Sixers"],
+    "PHX": ["Phoenix Suns", "Suns", "PHO"],
+    "POR": ["Portland Trail Blazers", "Trail Blazers", "Blazers"],
+    "SAC": ["Sacramento Kings", "Kings"],
+    "SAS": ["San Antonio Spurs", "Spurs"],
+    "TOR": ["Toronto Raptors", "Raptors"],
+    "UTA": ["Utah Jazz", "Jazz"],
+    "WAS": ["Washington Wizards", "Wizards"],
+}
+
+_team_re_cache: Dict[str, "re.Pattern"] = {}
+
+def team_pattern(abbr: str) -> "re.Pattern":
+    """Compiled whole-word pattern matching a team's abbreviation or any alias."""
+    if abbr not in _team_re_cache:
+        names = [abbr] + TEAM_ALIASES.get(abbr, [])
+        alternation = "|".join(re.escape(n) for n in sorted(names, key=len, reverse=True))
+        _team_re_cache[abbr] = re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE)
+    return _team_re_cache[abbr]
+
+def is_game_thread_for(title: str, away: str, home: str) -> bool:
+    """True if `title` is a (non post-game) game thread naming both teams."""
+    lowered = title.lower()
+    if "game thread" not in lowered or "post game" in lowered or "post-game" in lowered:
+        return False
+    return bool(team_pattern(away).search(title) and team_pattern(home).search(title))
+
+class TokenBucket:
+    """Thread-safe token bucket used to rate limit Pushshift requests.
+
+    Args:
+        rate: Tokens added per second (<= 0 disables limiting)
+        capacity: Maximum burst size (defaults to max(1, rate))
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until `tokens` are available, then consume them."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+def make_session(pool_size: int = 10) -> requests.Session:
+    """Create a requests session with a connection pool shared across workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def _get_json(url: str, params: Dict, session: Optional[requests.Session] = None,
+              limiter: Optional[TokenBucket] = None, timeout: int = 10) -> Dict:
+    """Rate-limited GET returning the decoded JSON body."""
+    if limiter is not None:
+        limiter.acquire()
+    getter = session.get if session is not None else requests.get
+    response = getter(url, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+def search_game_thread(date: str, away: str, home: str,
+                       session: Optional[requests.Session] = None,
+                       limiter: Optional[TokenBucket] = None,
+                       base_url: str = PUSHSHIFT_BASE_URL) -> Optional[Dict]:
     """Search for a game thread using Pushshift API."""
     # Try different title patterns
     patterns = [
@@ -23,11 +135,11 @@ def search_game_thread(date: str, away: str, home: str) -> Optional[Dict]:
         f"Game Thread: {home} vs {away}",
         f"Game Thread: {home} @ {away}"
     ]
-    
+
     for pattern in patterns:
         try:
             # Search for submission
-            url = "https://api.pushshift.io/reddit/search/submission/"
+            url = f"{base_url}/reddit/search/submission/"
             params = {
                 "subreddit": "nba",
                 "title": pattern,
@@ -35,108 +147,393 @@ def search_game_thread(date: str, away: str, home: str) -> Optional[Dict]:
                 "after": f"{date}T00:00:00",
                 "before": f"{date}T23:59:59"
             }
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
+
+            data = _get_json(url, params, session, limiter)
+
             if data["data"]:
                 submission = data["data"][0]
                 print(f"Found thread: {submission['title']}")
                 return submission
-                
+
         except Exception as e:
             print(f"Error searching for {pattern}: {e}")
             continue
-    
+
     return None
 
-def fetch_comments(link_id: str, max_comments: int = 5000) -> List[Dict]:
-    """Fetch comments for a submission."""
-    try:
-        url = "https://api.pushshift.io/reddit/comment/search"
+class DayThreadIndex:
+    """Game Thread submissions per date, fetched with one query per day.
+
+    The day's result set is cached in memory and, when `cache_dir` is given,
+    on disk so reruns skip the query entirely. Every game scheduled that date
+    is then matched against it in memory instead of issuing one request per
+    title pattern. Safe to share between fetch workers.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None,
+                 session: Optional[requests.Session] = None,
+                 limiter: Optional[TokenBucket] = None,
+                 base_url: str = PUSHSHIFT_BASE_URL,
+                 subreddit: str = "nba",
+                 page_size: int = 100):
+        self.cache_dir = cache_dir
+        self.session = session
+        self.limiter = limiter
+        self.base_url = base_url
+        self.subreddit = subreddit
+        self.page_size = page_size
+        self._days: Dict[str, List[Dict]] = {}
+        self._day_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _query_day(self, date: str) -> List[Dict]:
+        url = f"{self.base_url}/reddit/search/submission/"
+        submissions: List[Dict] = []
+        seen: Set[str] = set()
+        before = f"{date}T23:59:59"
+        while True:
+            params = {
+                "subreddit": self.subreddit,
+                "title": "Game Thread",
+                "size": self.page_size,
+                "sort": "desc",
+                "sort_type": "created_utc",
+                "after": f"{date}T00:00:00",
+                "before": before
+            }
+            page = _get_json(url, params, self.session, self.limiter)["data"]
+            new = [sub for sub in page if sub.get("id") not in seen]
+            submissions.extend(new)
+            seen.update(sub.get("id") for sub in new)
+            if len(page) < self.page_size or not new:
+                return submissions
+            before = min(int(sub.get("created_utc", 0)) for sub in new) + 1
+
+    def submissions(self, date: str) -> List[Dict]:
+        """All Game Thread submissions for `date` (one query per day at most)."""
+        with self._lock:
+            day_lock = self._day_locks.setdefault(date, threading.Lock())
+        with day_lock:
+            if date in self._days:
+                return self._days[date]
+
+            cache_file = self.cache_dir / f"{self.subreddit}-{date}.json" if self.cache_dir else None
+            if cache_file is not None and cache_file.exists():
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    self._days[date] = json.load(f)
+                return self._days[date]
+
+            subs = self._query_day(date)
+            print(f"Found {len(subs)} game threads on {date}")
+            if cache_file is not None:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp = cache_file.with_suffix(".json.part")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(subs, f, ensure_ascii=False)
+                os.replace(tmp, cache_file)
+            self._days[date] = subs
+            return subs
+
+    def find(self, date: str, away: str, home: str) -> Optional[Dict]:
+        """Game thread for `away` @ `home` on `date`, or None."""
+        for submission in self.submissions(date):
+            if is_game_thread_for(submission.get("title", ""), away, home):
+                print(f"Found thread: {submission['title']}")
+                return submission
+        return None
+
+def iter_comment_pages(link_id: str, page_size: int = 500, max_comments: Optional[int] = None,
+                       session: Optional[requests.Session] = None,
+                       limiter: Optional[TokenBucket] = None,
+                       base_url: str = PUSHSHIFT_BASE_URL) -> Iterator[List[Dict]]:
+    """Yield pages of comments for a submission, newest first.
+
+    Pages are walked with a `before` cursor on created_utc. The cursor is
+    inclusive of the boundary second so comments sharing a timestamp across a
+    page break are not lost; ids already seen at that second are dropped.
+    Only one page plus the boundary ids is held in memory at a time.
+    """
+    url = f"{base_url}/reddit/comment/search"
+    before: Optional[int] = None
+    boundary_ids: Set[str] = set()
+    fetched = 0
+
+    while max_comments is None or fetched < max_comments:
+        wanted = page_size if max_comments is None else min(page_size, max_comments - fetched)
+        # Over-ask by the boundary ids we expect to see again
+        size = wanted + len(boundary_ids)
         params = {
             "link_id": link_id,
-            "size": max_comments,
-            "sort": "score",
-            "sort_type": "score"
+            "size": size,
+            "sort": "desc",
+            "sort_type": "created_utc"
         }
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        return data["data"]
-        
+        if before is not None:
+            params["before"] = before + 1
+
+        data = _get_json(url, params, session, limiter)
+        raw = data["data"]
+        page = [c for c in raw if c.get("id") not in boundary_ids][:wanted]
+        if not page:
+            break
+
+        oldest = min(int(c.get("created_utc", 0)) for c in page)
+        if oldest != before:
+            boundary_ids = set()
+        boundary_ids.update(c.get("id") for c in page if int(c.get("created_utc", 0)) == oldest)
+        before = oldest
+
+        fetched += len(page)
+        yield page
+
+        if len(raw) < size:
+            break
+
+def fetch_comments(link_id: str, max_comments: Optional[int] = None,
+                   session: Optional[requests.Session] = None,
+                   limiter: Optional[TokenBucket] = None,
+                   base_url: str = PUSHSHIFT_BASE_URL,
+                   page_size: int = 500) -> List[Dict]:
+    """Fetch comments for a submission (all pages, collected into a list)."""
+    comments: List[Dict] = []
+    try:
+        for page in iter_comment_pages(link_id, page_size, max_comments, session, limiter, base_url):
+            comments.extend(page)
     except Exception as e:
         print(f"Error fetching comments: {e}")
-        return []
+    return comments
 
-def fetch_game_data(date: str, away: str, home: str, out_dir: Path) -> bool:
-    """Fetch complete game data (thread + comments)."""
+def is_valid_game_file(path: Path, expected_size: Optional[int] = None) -> bool:
+    """Check that a fetched game file is complete.
+
+    When the manifest recorded the file size we trust a size match; otherwise
+    the header (JSONL) or whole document (legacy JSON) is checked for the
+    expected top-level keys.
+    """
+    if not path.exists():
+        return False
+    if expected_size is not None:
+        return path.stat().st_size == expected_size
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.suffix == ".jsonl":
+                data = json.loads(f.readline())
+                required = GAME_HEADER_KEYS
+            else:
+                data = json.load(f)
+                required = GAME_HEADER_KEYS + ("comments",)
+    except (OSError, json.JSONDecodeError):
+        return False
+    return isinstance(data, dict) and all(k in data for k in required)
+
+def load_manifest(out_dir: Path) -> Dict[str, Dict]:
+    """Load the checkpoint manifest (last entry per game wins)."""
+    manifest: Dict[str, Dict] = {}
+    path = out_dir / MANIFEST_NAME
+    if not path.exists():
+        return manifest
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Partially written line from a killed run
+                continue
+            manifest[entry["game_id"]] = entry
+    return manifest
+
+_manifest_lock = threading.Lock()
+
+def append_manifest(out_dir: Path, entry: Dict) -> None:
+    """Append one completed game to the checkpoint manifest."""
+    with _manifest_lock:
+        with open(out_dir / MANIFEST_NAME, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+
+def fetch_game_data(date: str, away: str, home: str, out_dir: Path,
+                    session: Optional[requests.Session] = None,
+                    limiter: Optional[TokenBucket] = None,
+                    base_url: str = PUSHSHIFT_BASE_URL,
+                    page_size: int = 500,
+                    max_comments: Optional[int] = None,
+                    day_index: Optional[DayThreadIndex] = None) -> Optional[int]:
+    """Fetch complete game data (thread + comments).
+
+    Output is `{game_id}.jsonl`: a header line with the game and submission,
+    then one comment per line, appended page by page as they arrive.
+    With `day_index` the thread is matched against that date's cached
+    Game Thread listing; otherwise each title pattern is queried in turn.
+
+    Returns:
+        Number of comments saved, or None if the game could not be fetched
+    """
     print(f"Fetching {date} {away} @ {home}...")
-    
+    game_id = f"{date}-{away}-{home}"
+
     # Search for game thread
-    submission = search_game_thread(date, away, home)
+    try:
+        if day_index is not None:
+            submission = day_index.find(date, away, home)
+        else:
+            submission = search_game_thread(date, away, home, session, limiter, base_url)
+    except Exception as e:
+        print(f"Error searching for {date} game threads: {e}")
+        submission = None
     if not submission:
         print(f"No game thread found for {date} {away} @ {home}")
-        return False
-    
-    # Fetch comments
-    comments = fetch_comments(submission["id"])
-    print(f"Found {len(comments)} comments")
-    
-    # Save to file
-    game_id = f"{date}-{away}-{home}"
-    outfile = out_dir / f"{game_id}.json"
-    
-    game_data = {
+        append_manifest(out_dir, {"game_id": game_id, "status": "not_found"})
+        return None
+
+    outfile = out_dir / f"{game_id}.jsonl"
+    header = {
         "game_id": game_id,
         "date": date,
         "away": away,
         "home": home,
-        "submission": submission,
-        "comments": comments
+        "submission": submission
     }
-    
-    with open(outfile, "w", encoding="utf-8") as f:
-        json.dump(game_data, f, indent=2, ensure_ascii=False)
-    
-    print(f"Saved to {outfile}")
-    return True
+
+    # Write to a temp file and rename so a killed run never leaves a truncated game file
+    tmpfile = outfile.with_suffix(".jsonl.part")
+    n_comments = 0
+    start = time.time()
+    try:
+        with open(tmpfile, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for page in iter_comment_pages(submission["id"], page_size, max_comments,
+                                           session, limiter, base_url):
+                for comment in page:
+                    f.write(json.dumps(comment, ensure_ascii=False) + "\n")
+                n_comments += len(page)
+    except Exception as e:
+        print(f"Error fetching comments for {game_id}: {e}")
+        tmpfile.unlink(missing_ok=True)
+        append_manifest(out_dir, {"game_id": game_id, "status": "error", "error": str(e)})
+        return None
+    os.replace(tmpfile, outfile)
+
+    elapsed = time.time() - start
+    append_manifest(out_dir, {
+        "game_id": game_id,
+        "status": "ok",
+        "file": outfile.name,
+        "comments": n_comments,
+        "bytes": outfile.stat().st_size,
+    })
+
+    print(f"Saved {n_comments} comments to {outfile} ({n_comments / max(elapsed, 1e-9):.0f} comments/sec)")
+    return n_comments
+
+def pending_games(games: List[Dict], out_dir: Path) -> List[Dict]:
+    """Drop games whose output file already exists and validates."""
+    manifest = load_manifest(out_dir)
+    pending = []
+    for game in games:
+        game_id = f"{game['date']}-{game['away']}-{game['home']}"
+        entry = manifest.get(game_id, {})
+        done = False
+        # Legacy single-document .json files from older runs still count
+        for path in (out_dir / f"{game_id}.jsonl", out_dir / f"{game_id}.json"):
+            recorded = entry.get("status") == "ok" and entry.get("file") == path.name
+            if is_valid_game_file(path, entry.get("bytes") if recorded else None):
+                done = True
+                break
+        if not done:
+            pending.append(game)
+    return pending
+
+def fetch_all(games: List[Dict], out_dir: Path, workers: int = 1, rate: float = 1.0,
+              base_url: str = PUSHSHIFT_BASE_URL, page_size: int = 500,
+              search: str = "day") -> Dict:
+    """Fetch every game in `games`, sharing one pooled session and rate limiter.
+
+    search="day" looks threads up in a per-date listing (one request per
+    date, cached under `out_dir/_search_cache`); search="pattern" issues the
+    per-game title pattern queries.
+
+    Returns:
+        Dictionary with games fetched, comments saved and elapsed seconds
+    """
+    session = make_session(pool_size=max(workers, 1))
+    limiter = TokenBucket(rate)
+    day_index = None
+    if search == "day":
+        day_index = DayThreadIndex(out_dir / SEARCH_CACHE_DIR, session, limiter, base_url)
+    success_count = 0
+    total_comments = 0
+    start = time.time()
+
+    try:
+        if workers <= 1:
+            for i, game in enumerate(games):
+                print(f"\n[{i+1}/{len(games)}] Processing {game['date']} {game['away']} @ {game['home']}")
+                n = fetch_game_data(game["date"], game["away"], game["home"], out_dir,
+                                    session, limiter, base_url, page_size, day_index=day_index)
+                if n is not None:
+                    success_count += 1
+                    total_comments += n
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(fetch_game_data, g["date"], g["away"], g["home"], out_dir,
+                                session, limiter, base_url, page_size, None, day_index): g
+                    for g in games
+                }
+                for i, future in enumerate(as_completed(futures)):
+                    game = futures[future]
+                    try:
+                        n = future.result()
+                    except Exception as e:
+                        print(f"Error fetching {game['date']} {game['away']} @ {game['home']}: {e}")
+                        n = None
+                    if n is not None:
+                        success_count += 1
+                        total_comments += n
+                    print(f"[{i+1}/{len(games)}] Done {game['date']} {game['away']} @ {game['home']}")
+    finally:
+        session.close()
+
+    return {"games": success_count, "comments": total_comments, "seconds": time.time() - start}
 
 def main():
     parser = argparse.ArgumentParser(description="Fetch Reddit game threads")
     parser.add_argument("--schedule_csv", required=True, help="CSV with date,away,home columns")
-    parser.add_argument("--out_dir", required=True, help="Output directory for JSON files")
-    
+    parser.add_argument("--out_dir", required=True, help="Output directory for JSONL files")
+    parser.add_argument("--workers", type=int, default=1, help="Concurrent fetch workers")
+    parser.add_argument("--rate", type=float, default=1.0, help="Max Pushshift requests per second (0 = unlimited)")
+    parser.add_argument("--base_url", default=PUSHSHIFT_BASE_URL, help="Pushshift API base URL")
+    parser.add_argument("--page_size", type=int, default=500, help="Comments requested per Pushshift page")
+    parser.add_argument("--search", choices=["day", "pattern"], default="day",
+                        help="day: one cached Game Thread query per date; pattern: per-game title queries")
+    parser.add_argument("--no_resume", action="store_true", help="Refetch games that already have valid output")
+
     args = parser.parse_args()
-    
+
     # Create output directory
     out_dir = Path(args.out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
-    
+
     # Read schedule
     with open(args.schedule_csv, "r") as f:
         reader = csv.DictReader(f)
         games = list(reader)
-    
+
     print(f"Found {len(games)} games to fetch")
-    
-    # Fetch each game
-    success_count = 0
-    for i, game in enumerate(games):
-        print(f"\n[{i+1}/{len(games)}] Processing {game['date']} {game['away']} @ {game['home']}")
-        
-        if fetch_game_data(game["date"], game["away"], game["home"], out_dir):
-            success_count += 1
-        
-        # Rate limiting - be nice to Pushshift
-        if i < len(games) - 1:
-            print("Waiting 2 seconds...")
-            time.sleep(2)
-    
-    print(f"\nCompleted! Successfully fetched {success_count}/{len(games)} games")
+
+    if not args.no_resume:
+        remaining = pending_games(games, out_dir)
+        if len(remaining) < len(games):
+            print(f"Resuming: skipping {len(games) - len(remaining)} games already fetched")
+        games = remaining
+
+    stats = fetch_all(games, out_dir, workers=args.workers, rate=args.rate,
+                      base_url=args.base_url, page_size=args.page_size, search=args.search)
+
+    print(f"\nCompleted! Successfully fetched {stats['games']}/{len(games)} games in {stats['seconds']:.1f}s")
+    print(f"Saved {stats['comments']} comments ({stats['comments'] / max(stats['seconds'], 1e-9):.0f} comments/sec)")
     print(f"Files saved to: {out_dir}")
 
 if __name__ == "__main__":
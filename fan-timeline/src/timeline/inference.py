@@ -0,0 +1,180 @@
+from __future__ import annotations
+import asyncio, queue, threading, time
+from concurrent.futures import Future
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+# A batch of prompts in, one completion per prompt out (same order)
+GenerateBatch = Callable[[List[str]], List[str]]
+
+class HFGenerator:
+    """Batched generation with a Hugging Face causal LM: prompts are left-padded into one model.generate call.
+
+    Left padding keeps every prompt's last token at the end of the row, so new
+    tokens for the whole batch start at the same column and can be sliced off
+    without decoding the prompt again.
+    """
+
+    def __init__(self, model, tokenizer, max_length: int = 512, max_new_tokens: int = 256,
+                 temperature: float = 0.7, do_sample: bool = True):
+        self.model = model
+        self.tokenizer = tokenizer
+        tokenizer.padding_side = "left"
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        self.max_length = max_length
+        self.gen_kwargs = dict(max_new_tokens=max_new_tokens, do_sample=do_sample,
+                               pad_token_id=tokenizer.pad_token_id, eos_token_id=tokenizer.eos_token_id)
+        if do_sample:
+            self.gen_kwargs["temperature"] = temperature
+
+    def __call__(self, prompts: List[str]) -> List[str]:
+        import torch
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True, truncation=True,
+                                max_length=self.max_length)
+        inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
+        with torch.no_grad():
+            outputs = self.model.generate(**inputs, **self.gen_kwargs)
+        new_tokens = outputs[:, inputs["input_ids"].shape[1]:]
+        return [text.strip() for text in self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)]
+
+class BatchEngine:
+    """Dynamic micro-batching in front of a batched generate function.
+
+    Callers submit single prompts from any thread (or await them from the
+    event loop via asyncio.wrap_future). One worker thread takes the oldest
+    prompt, waits up to max_wait_ms for more, and runs up to max_batch
+    prompts as one batch; under load batches fill without waiting, when idle
+    a lone prompt pays at most max_wait_ms. A failing batch fails each of its
+    prompts' futures with the error. KeyboardInterrupt / SystemExit in the
+    worker fail the batch and every queued prompt, then stop the engine.
+    """
+
+    def __init__(self, generate_batch: GenerateBatch, max_batch: int = 8, max_wait_ms: float = 10.0):
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
+        self.generate_batch = generate_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._stats: Dict[str, int] = {"batches": 0, "prompts": 0}
+        self._queue: "queue.Queue[Optional[Tuple[str, Future]]]" = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="batch-engine", daemon=True)
+        self._thread.start()
+
+    def submit(self, prompt: str) -> Future:
+        """Queue one prompt; the future resolves to its completion."""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchEngine is closed")
+            self._queue.put((prompt, future))
+        return future
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of the batch counters (safe to read from any thread)."""
+        with self._lock:
+            return dict(self._stats)
+
+    def generate(self, prompt: str) -> str:
+        return self.submit(prompt).result()
+
+    def generate_many(self, prompts: Sequence[str]) -> List[str]:
+        """Completions for many prompts, batched together (and with other callers')."""
+        futures = [self.submit(p) for p in prompts]
+        return [f.result() for f in futures]
+
+    def close(self):
+        """Finish the queued prompts, then stop the worker."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _next_batch(self) -> Tuple[List[Tuple[str, Future]], bool]:
+        """The next batch, and whether the close sentinel was reached."""
+        item = self._queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                # Past the deadline, still take whatever is already queued
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        done = False
+        while not done:
+            batch, done = self._next_batch()
+            batch = [(p, f) for p, f in batch if f.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                outputs = self.generate_batch([p for p, _ in batch])
+                if len(outputs) != len(batch):
+                    raise RuntimeError(f"generate_batch returned {len(outputs)} outputs for {len(batch)} prompts")
+            except Exception as e:
+                for _, f in batch:
+                    f.set_exception(e)
+            except BaseException as e:
+                self._abort(batch, e)
+                raise
+            else:
+                for (_, f), out in zip(batch, outputs):
+                    f.set_result(out)
+            with self._lock:
+                self._stats["batches"] += 1
+                self._stats["prompts"] += len(batch)
+
+    def _abort(self, batch: List[Tuple[str, Future]], error: BaseException):
+        """Fail the running batch and everything still queued; refuse new prompts."""
+        with self._lock:
+            self._closed = True
+        for _, f in batch:
+            f.set_exception(error)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(error)
+
+async def stream_completions(engine: BatchEngine, prompts: Sequence[str]
+                             ) -> AsyncIterator[Tuple[int, Optional[str], Optional[BaseException]]]:
+    """(index, completion, error) for each prompt, in the order they finish.
+
+    All prompts are queued at once so the engine batches them; results are
+    yielded batch by batch instead of after the last one. A failed batch
+    yields its errors and the stream goes on. If the consumer stops early
+    (e.g. the client disconnected), prompts not yet started are cancelled.
+    """
+    futures = [asyncio.wrap_future(engine.submit(p)) for p in prompts]
+    index = {f: i for i, f in enumerate(futures)}
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for f in sorted(done, key=index.get):
+                error = f.exception()
+                yield index[f], None if error else f.result(), error
+    finally:
+        for f in pending:
+            f.cancel()
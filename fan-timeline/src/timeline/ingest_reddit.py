@@ -1,13 +1,15 @@
 from __future__ import annotations
 import json
 import argparse
+import os
+import sys
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import Any, Dict, IO, Iterable, Iterator, List
 from pathlib import Path
 try:
-    from .utils import clean_text
+    from .utils import clean_text, clean_texts, run_batch
 except ImportError:
-    from utils import clean_text
+    from utils import clean_text, clean_texts, run_batch
 
 @dataclass
 class Comment:
@@ -16,14 +18,28 @@ class Comment:
     score: int
     author: str
 
+def is_thread_header(obj: Any) -> bool:
+    """The first line of a fetched `{game_id}.jsonl` (fetch_threads): game and submission, not a comment."""
+    return isinstance(obj, dict) and "submission" in obj
+
+def iter_jsonl_comments(f: IO[str]) -> Iterator[Dict]:
+    """Raw comments from JSONL lines, skipping a fetch_threads header line."""
+    first = True
+    for line in f:
+        if not line.strip():
+            continue
+        obj = json.loads(line)
+        if first:
+            first = False
+            if is_thread_header(obj):
+                continue
+        yield obj
+
 def load_reddit_jsonl(path: str) -> List[Comment]:
     """Load from old JSONL format (legacy)."""
     out: List[Comment] = []
     with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            obj = json.loads(line)
+        for obj in iter_jsonl_comments(f):
             body = clean_text(obj.get("body", ""))
             if not body:
                 continue
@@ -40,9 +56,11 @@ def load_reddit_json(path: str) -> List[Comment]:
     with open(path, "r", encoding="utf-8") as f:
         data = json.load(f)
     
+    raw = data.get("comments", [])
+    bodies = clean_texts(c.get("body", "") for c in raw)
+    
     comments = []
-    for comment_data in data.get("comments", []):
-        body = clean_text(comment_data.get("body", ""))
+    for comment_data, body in zip(raw, bodies):
         if not body:
             continue
         
@@ -55,27 +73,155 @@ def load_reddit_json(path: str) -> List[Comment]:
     
     return comments
 
-def process_file(infile: Path, outfile: Path):
-    """Process a single input file to output file."""
+def iter_json_array(f: IO[str], key: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yield the items of top-level array `key` in a JSON object one at a time.
+
+    Only the current item (plus one read chunk) is held in memory, so a
+    thread file with 100k comments parses in the same footprint as one with
+    100. Sibling values before the array are decoded and discarded.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill() -> None:
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def peek() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if eof:
+                return ""
+            fill()
+
+    def decode() -> Any:
+        nonlocal pos
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+                # A value ending exactly at the buffer edge may be a truncated number
+                if end < len(buf) or eof:
+                    pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill()
+
+    def expect(ch: str) -> None:
+        nonlocal pos
+        if peek() != ch:
+            raise json.JSONDecodeError(f"Expected {ch!r}", buf, pos)
+        pos += 1
+
+    expect("{")
+    while True:
+        ch = peek()
+        if ch == "}":
+            return
+        if ch == ",":
+            pos += 1
+            peek()
+        name = decode()
+        expect(":")
+        peek()
+        if name != key:
+            decode()
+            continue
+
+        expect("[")
+        while True:
+            ch = peek()
+            if ch == "]":
+                return
+            if ch == ",":
+                pos += 1
+                peek()
+            yield decode()
+
+def iter_raw_comments(path: Path) -> Iterator[Dict]:
+    """Stream raw comment dicts from a JSONL file or a fetched JSON thread."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix == ".jsonl":
+            yield from iter_jsonl_comments(f)
+        else:
+            yield from iter_json_array(f, "comments")
+
+def iter_comments(raw: Iterable[Dict]) -> Iterator[Comment]:
+    """Clean raw comment dicts into Comments, dropping empty bodies."""
+    for obj in raw:
+        body = clean_text(obj.get("body", ""))
+        if not body:
+            continue
+        yield Comment(
+            body=body,
+            created_utc=int(obj.get("created_utc", 0)),
+            score=int(obj.get("score", 0)),
+            author=str(obj.get("author", "")),
+        )
+
+def write_comments(comments: Iterable[Comment], outfile: Path) -> int:
+    """Write comments as JSONL; returns the number written.
+
+    Output goes to a temp file renamed on success, so a thread that fails
+    to parse midway never leaves a partial JSONL behind.
+    """
+    n = 0
+    tmpfile = outfile.with_name(outfile.name + ".part")
+    try:
+        with open(tmpfile, "w", encoding="utf-8") as f:
+            for c in comments:
+                f.write(json.dumps(c.__dict__, ensure_ascii=False) + "\n")
+                n += 1
+    except BaseException:
+        tmpfile.unlink(missing_ok=True)
+        raise
+    os.replace(tmpfile, outfile)
+    return n
+
+def process_file(infile: Path, outfile: Path, stream: bool = True) -> int:
+    """Process a single input file to output file.
+
+    With `stream` (default) comments flow parse -> clean_text -> write one at
+    a time; otherwise the whole thread is loaded first.
+
+    Returns:
+        Number of comments written
+    """
     print(f"Processing {infile} -> {outfile}")
-    
+
+    if infile.suffix not in (".jsonl", ".json"):
+        print(f"Unknown file format: {infile}")
+        return 0
+
+    if stream:
+        n = write_comments(iter_comments(iter_raw_comments(infile)), outfile)
+        print(f"Saved {n} comments to {outfile}")
+        return n
+
     # Determine format and load
     if infile.suffix == ".jsonl":
         comments = load_reddit_jsonl(str(infile))
-    elif infile.suffix == ".json":
-        comments = load_reddit_json(str(infile))
     else:
-        print(f"Unknown file format: {infile}")
-        return
+        comments = load_reddit_json(str(infile))
     
     print(f"Loaded {len(comments)} comments")
     
     # Save as JSONL
-    with open(outfile, "w", encoding="utf-8") as f:
-        for c in comments:
-            f.write(json.dumps(c.__dict__, ensure_ascii=False) + "\n")
+    write_comments(comments, outfile)
     
     print(f"Saved {len(comments)} comments to {outfile}")
+    return len(comments)
 
 def main():
     ap = argparse.ArgumentParser()
@@ -83,6 +229,8 @@ def main():
     ap.add_argument("--out_dir", help="Output directory for JSONL files")
     ap.add_argument("--infile", help="Single input file (legacy)")
     ap.add_argument("--outfile", help="Single output file (legacy)")
+    ap.add_argument("--no_stream", action="store_true", help="Load each thread fully before writing")
+    ap.add_argument("--workers", type=int, default=1, help="Worker processes for --in_dir mode")
     args = ap.parse_args()
     
     if args.in_dir and args.out_dir:
@@ -92,19 +240,22 @@ def main():
         out_dir.mkdir(parents=True, exist_ok=True)
         
         # Process all JSON/JSONL files
-        input_files = list(in_dir.glob("*.json")) + list(in_dir.glob("*.jsonl"))
+        input_files = sorted(list(in_dir.glob("*.json")) + list(in_dir.glob("*.jsonl")))
         print(f"Found {len(input_files)} input files")
         
-        for infile in input_files:
-            outfile = out_dir / f"{infile.stem}.jsonl"
-            process_file(infile, outfile)
+        jobs = [(infile.name, (infile, out_dir / f"{infile.stem}.jsonl", not args.no_stream))
+                for infile in input_files]
+        results = run_batch(process_file, jobs, workers=args.workers)
+        print(f"Wrote {sum(r['result'] or 0 for r in results)} comments")
+        if any(not r["ok"] for r in results):
+            return 1
             
     elif args.infile and args.outfile:
         # Single file mode (legacy)
-        process_file(Path(args.infile), Path(args.outfile))
+        process_file(Path(args.infile), Path(args.outfile), stream=not args.no_stream)
     else:
         print("Use --in_dir and --out_dir for directory processing, or --infile and --outfile for single file")
         return 1
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
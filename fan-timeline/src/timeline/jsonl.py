@@ -0,0 +1,172 @@
+from __future__ import annotations
+import json
+import mmap
+import os
+import random
+import struct
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Index file: magic, source size, source mtime_ns, record count, then the
+# starts / ends / line-number arrays
+_INDEX_MAGIC = b"JLIX1"
+_INDEX_HEADER = struct.Struct("<5sQQQ")
+
+def index_path_for(path: Path) -> Path:
+    return path.with_name(path.name + ".idx")
+
+class JsonlFile:
+    """Random access to a JSONL file without loading it.
+
+    The file is memory-mapped and indexed once: the byte offsets of every
+    non-blank line. With cache_index the index is also saved next to the
+    file (`<name>.idx`, skipped if the directory is read-only) and reused
+    while the file's size and mtime are unchanged; by default nothing is
+    written. Reading record i is then one slice of the map and one
+    json.loads, so a sample of k records, a slice or one shard of the file
+    costs O(k), not O(N).
+
+        with JsonlFile("data/sft/sft_data.jsonl") as data:
+            train_ids, val_ids = data.split(500, seed=0)
+            val = data.take(val_ids)
+    """
+
+    def __init__(self, path: Union[str, Path], cache_index: bool = False):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        index = self._load_index() if cache_index else None
+        if index is None:
+            index = self._build_index()
+            if cache_index:
+                self._save_index(index)
+        self._starts, self._ends, self._lines = index
+
+    # Index
+
+    def _build_index(self) -> Tuple[array, array, array]:
+        starts, ends, lines = array("Q"), array("Q"), array("Q")
+        if not self._map:
+            return starts, ends, lines
+        self._map.seek(0)
+        pos = 0
+        for line_no, line in enumerate(iter(self._map.readline, b""), 1):
+            if line.strip():
+                starts.append(pos)
+                ends.append(pos + len(line))
+                lines.append(line_no)
+            pos += len(line)
+        return starts, ends, lines
+
+    def _stamp(self) -> Tuple[int, int]:
+        stat = os.fstat(self._file.fileno())
+        return stat.st_size, stat.st_mtime_ns
+
+    def _load_index(self) -> Optional[Tuple[array, array, array]]:
+        path = index_path_for(self.path)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        if len(data) < _INDEX_HEADER.size:
+            return None
+        magic, size, mtime_ns, count = _INDEX_HEADER.unpack_from(data)
+        if magic != _INDEX_MAGIC or (size, mtime_ns) != self._stamp():
+            return None
+        arrays = []
+        offset = _INDEX_HEADER.size
+        for _ in range(3):
+            a = array("Q")
+            a.frombytes(data[offset:offset + 8 * count])
+            if len(a) != count:
+                return None
+            arrays.append(a)
+            offset += 8 * count
+        return arrays[0], arrays[1], arrays[2]
+
+    def _save_index(self, index: Tuple[array, array, array]):
+        path = index_path_for(self.path)
+        tmp = path.with_name(path.name + f".{os.getpid()}.part")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, *self._stamp(), len(index[0])))
+                for a in index:
+                    f.write(a.tobytes())
+            os.replace(tmp, path)
+        except OSError:
+            # A read-only data directory just means no cached index
+            if tmp.exists():
+                tmp.unlink()
+
+    # Access
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def raw(self, i: int) -> bytes:
+        """Bytes of record i (without parsing)."""
+        return self._map[self._starts[i]:self._ends[i]]
+
+    def line_number(self, i: int) -> int:
+        """1-based line of record i in the file (blank lines are not records)."""
+        return self._lines[i]
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Dict, List[Dict]]:
+        if isinstance(key, slice):
+            return self.take(range(*key.indices(len(self))))
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError(f"record {key} out of range for {len(self)} records")
+        return json.loads(self.raw(key))
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.records(range(len(self)))
+
+    def records(self, indices: Iterable[int]) -> Iterator[Dict]:
+        """Parse the given records lazily, in the given order."""
+        for i in indices:
+            yield json.loads(self._map[self._starts[i]:self._ends[i]])
+
+    def take(self, indices: Iterable[int]) -> List[Dict]:
+        return list(self.records(indices))
+
+    def sample_indices(self, k: int, seed: Optional[int] = None) -> List[int]:
+        """k distinct record indices, sampled without reading any records."""
+        return random.Random(seed).sample(range(len(self)), min(k, len(self)))
+
+    def sample(self, k: int, seed: Optional[int] = None) -> List[Dict]:
+        return self.take(self.sample_indices(k, seed))
+
+    def split(self, holdout: Union[int, float], seed: Optional[int] = None) -> Tuple[List[int], List[int]]:
+        """(train, holdout) record indices; holdout is a count or a fraction of the file."""
+        n = len(self)
+        k = int(round(holdout * n)) if isinstance(holdout, float) else holdout
+        held = set(self.sample_indices(k, seed))
+        return [i for i in range(n) if i not in held], sorted(held)
+
+    def shard(self, index: int, count: int) -> range:
+        """Contiguous record range of shard `index` out of `count`."""
+        if not 0 <= index < count:
+            raise ValueError(f"shard {index} out of range for {count} shards")
+        n = len(self)
+        return range(n * index // count, n * (index + 1) // count)
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "JsonlFile":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_jsonl(path: Union[str, Path], indices: Optional[Sequence[int]] = None) -> List[Dict]:
+    """All records of a JSONL file, or only the given record indices."""
+    with JsonlFile(path) as data:
+        return data.take(range(len(data)) if indices is None else indices)
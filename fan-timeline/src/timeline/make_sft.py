@@ -1,66 +1,156 @@
 #!/usr/bin/env python3
 """
 Generate SFT training data from teacher-labeled windows.
+
+Each game is labeled into its own shard (<out stem>.shards/<game_id>.jsonl),
+optionally across a process pool (--workers). Shards are then merged in
+game order with exact duplicates dropped, so the output is the same for any
+worker count and memory stays bounded by one game.
 """
 
 import json
 import argparse
+import hashlib
 import os
+import shutil
+import sys
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import random
 
 try:
     from .teacher import label_window, extract_top_themes
+    from .sentiment import get_service
+    from .jsonl import JsonlFile
+    from .utils import run_batch
+    from .dedup import collapse_comments
 except ImportError:
     from teacher import label_window, extract_top_themes
+    from sentiment import get_service
+    from jsonl import JsonlFile
+    from utils import run_batch
+    from dedup import collapse_comments
+
+def game_seed(game_id: str, seed: int) -> int:
+    """Stable per-game seed, independent of processing order and PYTHONHASHSEED."""
+    digest = hashlib.sha256(f"{seed}:{game_id}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+INSTRUCTION = "You are a sports timeline generator. Given fan comments from a game thread, create a concise event summary with sentiment."
+
+def margin_text(score: str) -> str:
+    """First team's lead in a "a-b" score, signed ("+3", "-2", "+0")."""
+    a, b = (int(x) for x in score.split("-"))
+    return f"{a - b:+d}"
+
+def lead_change_text(window: Dict) -> Optional[str]:
+    """The window's lead changes for the prompt ("DAL 3-2 Q1 10:45; ..." or "none"), if known."""
+    changes = window.get("lead_changes")
+    if changes is None:
+        return None
+    if not changes:
+        return "none"
+    return "; ".join(f"{c['team']} {c['score']} Q{c['period']} {c['clock']}" for c in changes)
+
+def window_prompt(window: Dict, game_id: str, rng=random) -> str:
+    """The model input for one window: context lines and up to 10 comments.
+
+    The context carries the scores around the window, the margin after it
+    (first team's lead) and, when the window has score state, its lead
+    changes, the signals the teacher's event text is written from.
+    The top 3 comments by score come first, then up to 7 others picked by rng.
+    Collapsed comments show as "body (xN)".
+    """
+    # Sample up to 10 comments per window (top-3 by score + random rest)
+    comments = window.get("comments", [])
+    
+    # Sort by score and get top 3
+    scored_comments = [(c.get("score", 0), c.get("body", "") + (f" (x{c['count']})" if c.get("count", 1) > 1 else ""))
+                       for c in comments]
+    scored_comments.sort(key=lambda x: x[0], reverse=True)
+    top_comments = [body for _, body in scored_comments[:3]]
+    
+    # Add random rest (up to 7 more)
+    remaining = [body for _, body in scored_comments[3:]]
+    if remaining:
+        rng.shuffle(remaining)
+        top_comments.extend(remaining[:7])
+    
+    # Create comment text
+    comment_text = "\n• ".join(top_comments)
+    
+    # Get scores
+    score_before = window.get("score_before", "0-0")
+    score_after = window.get("score_after", "0-0")
+    context = (f"quarter=Q{window['period']} window={window['clock_start']} "
+               f"score_before={score_before} score_after={score_after} margin={margin_text(score_after)}")
+    leads = lead_change_text(window)
+    if leads is not None:
+        context += f"\nlead_changes={leads}"
+    
+    return f"""[CONTEXT]
+game_id={game_id}
+{context}
 
-def create_sft_pairs(windows: List[Dict], game_id: str = "sample-game") -> List[Dict]:
-    """Create SFT training pairs from teacher-labeled windows."""
+[COMMENTS]
+• {comment_text}"""
+
+def game_prompts(windows: List[Dict], game_id: str, seed: int = 0,
+                 dup_threshold: Optional[float] = None) -> List[Tuple[Dict, str]]:
+    """(window, full prompt) for each window with comments, built as for training.
+
+    For inference on a whole game: comments are collapsed the same way (pass
+    the dup_threshold the training data used) and sampling is seeded per
+    game, so the same game always gets the same prompts.
+    """
+    rng = random.Random(game_seed(game_id, seed))
+    out = []
+    for window in windows:
+        if not window.get("comments"):
+            continue
+        if dup_threshold is not None:
+            window = {**window, "comments": collapse_comments(window["comments"], dup_threshold)}
+        out.append((window, f"{INSTRUCTION}\n\n{window_prompt(window, game_id, rng)}"))
+    return out
+
+def create_sft_pairs(windows: List[Dict], game_id: str = "sample-game", seed: Optional[int] = None,
+                     dup_threshold: Optional[float] = None) -> List[Dict]:
+    """Create SFT training pairs from teacher-labeled windows.
+
+    With a seed, comment sampling is reproducible per game. With a
+    dup_threshold (off by default), repeated and near-duplicate comments are
+    first collapsed into one with a count (see dedup.collapse_comments): the
+    prompt shows it once as "body (xN)" and the teacher's sentiment weighs it
+    N times.
+    """
     pairs = []
+    rng = random.Random(game_seed(game_id, seed)) if seed is not None else random
+    if dup_threshold is not None:
+        windows = [{**w, "comments": collapse_comments(w.get("comments", []), dup_threshold)} for w in windows]
+    
+    # Score every comment body in one batch; label_window() then hits the cache
+    get_service().warm([c.get("body", "") for w in windows for c in w.get("comments", [])
+                        if c.get("body", "").strip()])
     
     for window in windows:
-        # Sample up to 10 comments per window (top-3 by score + random rest)
-        comments = window.get("comments", [])
-        if not comments:
+        if not window.get("comments"):
             continue
         
-        # Sort by score and get top 3
-        scored_comments = [(c.get("score", 0), c.get("body", "")) for c in comments]
-        scored_comments.sort(key=lambda x: x[0], reverse=True)
-        top_comments = [body for _, body in scored_comments[:3]]
-        
-        # Add random rest (up to 7 more)
-        remaining = [body for _, body in scored_comments[3:]]
-        if remaining:
-            random.shuffle(remaining)
-            top_comments.extend(remaining[:7])
-        
-        # Create comment text
-        comment_text = "\n• ".join(top_comments)
-        
-        # Get scores
-        score_before = window.get("score_before", "0-0")
-        score_after = window.get("score_after", "0-0")
-        
         # Create input prompt
-        prompt = f"""[CONTEXT]
-game_id={game_id}
-quarter=Q{window['period']} window={window['clock_start']} score_before={score_before} score_after={score_after}
-
-[COMMENTS]
-• {comment_text}"""
+        prompt = window_prompt(window, game_id, rng)
         
         # Get teacher output
         try:
             teacher_output = label_window(window)
+            if not teacher_output["timeline"]:
+                continue  # past the end of any game
             output = json.dumps(teacher_output, ensure_ascii=False)
         except Exception as e:
             print(f"Error processing window: {e}")
             continue
         
         pairs.append({
-            "instruction": "You are a sports timeline generator. Given fan comments from a game thread, create a concise event summary with sentiment.",
+            "instruction": INSTRUCTION,
             "input": prompt,
             "output": output,
             "history": []
@@ -68,85 +158,162 @@ quarter=Q{window['period']} window={window['clock_start']} score_before={score_b
     
     return pairs
 
-def process_game_file(game_file: Path, game_id: str) -> List[Dict]:
-    """Process a single game file and return SFT pairs."""
+def process_game_file(game_file: Path, game_id: str, max_windows: int = 0, seed: int = 0,
+                      dup_threshold: Optional[float] = None) -> List[Dict]:
+    """Process a single game file and return SFT pairs.
+
+    With max_windows, only a random sample of that many windows is parsed.
+    """
     print(f"Processing {game_file}")
     
     # Load windows
-    windows = []
-    with open(game_file, "r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                windows.append(json.loads(line))
+    with JsonlFile(game_file) as data:
+        if max_windows and max_windows < len(data):
+            windows = data.take(sorted(data.sample_indices(max_windows, game_seed(game_id, seed))))
+        else:
+            windows = list(data)
     
     print(f"Loaded {len(windows)} windows")
     
     # Create SFT pairs
-    pairs = create_sft_pairs(windows, game_id)
+    pairs = create_sft_pairs(windows, game_id, seed, dup_threshold)
     print(f"Generated {len(pairs)} SFT pairs")
     
     return pairs
 
+def build_game_shard(game_id: str, game_file: Optional[Path], parquet_dir: Optional[Path],
+                     shard: Path, max_windows: int = 0, seed: int = 0,
+                     dup_threshold: Optional[float] = None) -> Dict:
+    """Label one game and write its pairs to a shard. Runs in a worker process."""
+    if parquet_dir is not None:
+        try:
+            from .columnar import read_windows
+        except ImportError:
+            from columnar import read_windows
+        windows = read_windows(parquet_dir, game_id, comment_columns=("body", "score"))
+        print(f"Loaded {len(windows)} windows for {game_id}")
+        pairs = create_sft_pairs(windows, game_id, seed, dup_threshold)
+    else:
+        pairs = process_game_file(game_file, game_id, max_windows, seed, dup_threshold)
+    
+    tmp = shard.with_name(shard.name + f".{os.getpid()}.part")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for pair in pairs:
+            f.write(json.dumps(pair, ensure_ascii=False) + "\n")
+    os.replace(tmp, shard)
+    return {"pairs": len(pairs), "pid": os.getpid(), "sentiment": get_service().stats()}
+
+def merge_shards(shards: List[Path], out: str) -> Dict:
+    """Concatenate shards into out, dropping exact duplicate pairs.
+
+    Streams line by line; only a 16-byte digest per kept pair is held.
+    """
+    output_dir = os.path.dirname(out)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    seen = set()
+    sentiment_counts = {"pos": 0, "neg": 0, "mixed": 0}
+    pairs = duplicates = 0
+    with open(out, "w", encoding="utf-8") as fout:
+        for shard in shards:
+            with open(shard, "r", encoding="utf-8") as f:
+                for line in f:
+                    digest = hashlib.blake2b(line.encode("utf-8"), digest_size=16).digest()
+                    if digest in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(digest)
+                    fout.write(line)
+                    pairs += 1
+                    try:
+                        output = json.loads(json.loads(line)["output"])
+                        sentiment_counts[output["timeline"][0]["fan_sentiment"]] += 1
+                    except (ValueError, KeyError, IndexError, TypeError):
+                        pass
+    return {"pairs": pairs, "duplicates": duplicates, "sentiment_counts": sentiment_counts}
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--out", required=True, help="Output path for SFT data")
     ap.add_argument("--windows_dir", default="data/windows", help="Directory containing window files")
     ap.add_argument("--game_id", help="Process single game (optional)")
+    ap.add_argument("--parquet_dir", help="Read windows from a columnar dataset (see columnar.py) instead")
+    ap.add_argument("--workers", type=int, default=1, help="Worker processes, one game per job")
+    ap.add_argument("--sentiment_workers", type=int, default=1,
+                    help="Processes for scoring uncached comments (only with --workers 1)")
+    ap.add_argument("--max_windows", type=int, default=0, help="Randomly sample at most this many windows per game")
+    ap.add_argument("--seed", type=int, default=0, help="Seed for per-game window and comment sampling")
+    ap.add_argument("--dup_threshold", type=float,
+                    help="Collapse near-duplicate comments at this shingle Jaccard, e.g. 0.8 "
+                         "(1.0: exact repeats only; default: keep every comment)")
+    ap.add_argument("--keep_shards", action="store_true", help="Keep per-game shards after merging")
     args = ap.parse_args()
+    if args.workers <= 1:
+        get_service().workers = args.sentiment_workers
     
-    windows_dir = Path(args.windows_dir)
-    if not windows_dir.exists():
-        print(f"Error: Windows directory {windows_dir} not found")
-        return 1
-    
-    all_pairs = []
-    
-    if args.game_id:
-        # Process single game
-        game_file = windows_dir / f"{args.game_id}.jsonl"
-        if not game_file.exists():
-            print(f"Error: Game file {game_file} not found")
-            return 1
-        
-        pairs = process_game_file(game_file, args.game_id)
-        all_pairs.extend(pairs)
+    # (game_id, windows file or None) per game
+    parquet_dir = Path(args.parquet_dir) if args.parquet_dir else None
+    if parquet_dir:
+        try:
+            from .columnar import list_games
+        except ImportError:
+            from columnar import list_games
+        games = [(g, None) for g in ([args.game_id] if args.game_id else list_games(parquet_dir))]
+        print(f"Found {len(games)} games in {args.parquet_dir}")
     else:
-        # Process all games
-        game_files = list(windows_dir.glob("*.jsonl"))
-        print(f"Found {len(game_files)} game files")
+        windows_dir = Path(args.windows_dir)
+        if not windows_dir.exists():
+            print(f"Error: Windows directory {windows_dir} not found")
+            return 1
         
-        for game_file in game_files:
-            game_id = game_file.stem
-            pairs = process_game_file(game_file, game_id)
-            all_pairs.extend(pairs)
+        if args.game_id:
+            # Process single game
+            game_file = windows_dir / f"{args.game_id}.jsonl"
+            if not game_file.exists():
+                print(f"Error: Game file {game_file} not found")
+                return 1
+            games = [(args.game_id, game_file)]
+        else:
+            # Process all games
+            games = [(f.stem, f) for f in sorted(windows_dir.glob("*.jsonl"))]
+            print(f"Found {len(games)} game files")
     
-    # Save all pairs
-    output_dir = os.path.dirname(args.out)
-    if output_dir:
-        os.makedirs(output_dir, exist_ok=True)
-    with open(args.out, "w", encoding="utf-8") as f:
-        for pair in all_pairs:
-            f.write(json.dumps(pair, ensure_ascii=False) + "\n")
+    shard_dir = Path(args.out).with_suffix(".shards")
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    jobs = [(game_id, (game_id, game_file, parquet_dir, shard_dir / f"{game_id}.jsonl",
+                       args.max_windows, args.seed, args.dup_threshold))
+            for game_id, game_file in games]
+    results = run_batch(build_game_shard, jobs, workers=args.workers, unit="games")
+    
+    # Merge in game order, whatever order the workers finished in
+    shards = [shard_dir / f"{r['name']}.jsonl" for r in results if r["ok"]]
+    merged = merge_shards(shards, args.out)
+    if not args.keep_shards:
+        shutil.rmtree(shard_dir)
     
+    # Latest cumulative stats of each worker process
+    by_pid = {r["result"]["pid"]: r["result"]["sentiment"] for r in results if r["ok"]}
+    print_summary(merged, args.out, list(by_pid.values()))
+    get_service().close()
+    return 0 if all(r["ok"] for r in results) else 1
+
+def print_summary(merged: Dict, out: str, sentiment_stats: List[Dict]):
+    """Print the merged pair count, sentiment cache stats and label distribution."""
     print(f"\n{'='*50}")
-    print(f"Created {len(all_pairs)} total SFT training pairs")
-    print(f"Saved to: {args.out}")
+    print(f"Created {merged['pairs']} total SFT training pairs ({merged['duplicates']} duplicates dropped)")
+    print(f"Saved to: {out}")
     print(f"{'='*50}")
     
-    # Print sentiment distribution
-    sentiment_counts = {"pos": 0, "neg": 0, "mixed": 0}
-    for pair in all_pairs:
-        try:
-            output = json.loads(pair["output"])
-            sentiment = output["timeline"][0]["fan_sentiment"]
-            sentiment_counts[sentiment] += 1
-        except:
-            pass
+    texts = sum(s["texts"] for s in sentiment_stats)
+    hits = sum(s["hits"] for s in sentiment_stats)
+    cached = sum(s["cached"] for s in sentiment_stats)
+    print(f"Sentiment cache: {hits / texts if texts else 0.0:.1%} hit rate over {texts} texts, "
+          f"{cached} unique across {len(sentiment_stats)} process(es)")
     
     print(f"Sentiment distribution:")
-    for sentiment, count in sentiment_counts.items():
-        percentage = (count / len(all_pairs)) * 100
+    for sentiment, count in merged["sentiment_counts"].items():
+        percentage = (count / merged["pairs"]) * 100 if merged["pairs"] else 0.0
         print(f"  {sentiment}: {count} ({percentage:.1f}%)")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,12 +1,12 @@
 from __future__ import annotations
-import json, argparse, csv
+import json, argparse
 from dataclasses import dataclass
 from typing import List, Dict
 from pathlib import Path
 try:
-    from .utils import mmss_to_secs
+    from .utils import mmss_to_secs, run_batch
 except ImportError:
-    from utils import mmss_to_secs
+    from utils import mmss_to_secs, run_batch
 
 @dataclass
 class PbpEvent:
@@ -51,35 +51,77 @@ def extract_points(desc: str, team: str) -> int:
     
     return 0
 
+# "PT11M40.00S" -> minutes, seconds; anything else goes through parse_clock
+ISO_CLOCK_RE = r"^PT(\d+(?:\.\d*)?)M(\d+(?:\.\d*)?)S$"
+
+def load_pbp_frame(path: str, game_id: str):
+    """Load PBP CSV into a pandas DataFrame without per-row Python work.
+
+    Same rows and values as the per-row loader: period/timeout rows and rows
+    with a blank description are dropped in bulk, ISO clocks are parsed with
+    vectorized string ops and points come from vectorized substring masks
+    with extract_points' precedence.
+
+    Returns:
+        DataFrame with columns period, clock, team, points, desc, game_id
+    """
+    import numpy as np
+    import pandas as pd
+
+    df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8")
+    n = len(df)
+    col = lambda name, default: (df[name].fillna(default) if name in df.columns
+                                 else pd.Series([default] * n, index=df.index, dtype=object))
+
+    keep = ~col("type", "").isin(["period", "timeout"]) & (col("desc", "").str.strip() != "")
+    df = df[keep]
+    n = len(df)
+    desc = col("desc", "")
+
+    raw_clock = col("clock", "PT12M00.00S")
+    iso = raw_clock.str.fullmatch(ISO_CLOCK_RE).fillna(False).to_numpy(dtype=bool)
+    clock = np.full(n, "12:00", dtype=object)
+    if iso.any():
+        iso_clock = raw_clock[iso]
+        minutes = iso_clock.str.replace(ISO_CLOCK_RE, r"\1", regex=True).astype(float).astype(int).to_numpy()
+        seconds = iso_clock.str.replace(ISO_CLOCK_RE, r"\2", regex=True).astype(float).astype(int).to_numpy()
+        # Few distinct clock values per file: format each once, then gather
+        key = minutes * (int(seconds.max()) + 1) + seconds
+        _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+        labels = np.array([f"{m:02d}:{s:02d}" for m, s in zip(minutes[first].tolist(), seconds[first].tolist())],
+                          dtype=object)
+        clock[iso] = labels[inverse]
+    odd = ~iso & (raw_clock != "").to_numpy(dtype=bool)
+    if odd.any():
+        clock[odd] = [parse_clock(c) for c in raw_clock[odd].tolist()]
+
+    made = desc.str.contains("Made", regex=False)
+    points = np.select(
+        [made & desc.str.contains("3PT", regex=False),
+         made & desc.str.contains("2PT", regex=False),
+         made & desc.str.contains("Free Throw", regex=False),
+         made & ~desc.str.contains("PT", regex=False)],
+        [3, 2, 1, 2], default=0)
+
+    return pd.DataFrame({
+        "period": col("period", "1").astype(int).to_numpy(),
+        "clock": clock,
+        "team": col("team", "").to_numpy(),
+        "points": points,
+        "desc": desc.to_numpy(),
+        "game_id": game_id,
+    })
+
+def frame_to_events(df) -> List[PbpEvent]:
+    """PbpEvent objects for the rows of a load_pbp_frame() table."""
+    return [PbpEvent(period=period, clock=clock, team=team, points=points, desc=desc, game_id=game_id)
+            for period, clock, team, points, desc, game_id in zip(
+                df["period"].tolist(), df["clock"].tolist(), df["team"].tolist(),
+                df["points"].tolist(), df["desc"].tolist(), df["game_id"].tolist())]
+
 def load_pbp_csv(path: str, game_id: str) -> List[PbpEvent]:
     """Load PBP data from CSV format."""
-    events: List[PbpEvent] = []
-    
-    with open(path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Skip non-game events
-            if row.get("type") in ["period", "timeout"]:
-                continue
-            
-            period = int(row.get("period", 1))
-            clock = parse_clock(row.get("clock", "PT12M00.00S"))
-            team = row.get("team", "")
-            desc = row.get("desc", "")
-            points = extract_points(desc, team)
-            
-            # Only include events with meaningful descriptions
-            if desc and desc.strip():
-                events.append(PbpEvent(
-                    period=period,
-                    clock=clock,
-                    team=team,
-                    points=points,
-                    desc=desc,
-                    game_id=game_id
-                ))
-    
-    return events
+    return frame_to_events(load_pbp_frame(path, game_id))
 
 def load_pbp_json(path: str) -> List[PbpEvent]:
     """Legacy function for JSON format."""
@@ -95,35 +137,67 @@ def load_pbp_json(path: str) -> List[PbpEvent]:
         events.append(PbpEvent(period, clock, team, points, desc, ""))
     return events
 
-def detect_big_runs(events: List[PbpEvent], window_secs: int = 120) -> List[Dict]:
-    # Simple heuristic: any 8-0 (or more) within rolling 2-min
-    # Returns list of dicts: {period, clock, run_str}
+def detect_big_runs(events: List[PbpEvent], window_secs: int = 120, min_points: int = 8) -> List[Dict]:
+    """Find unanswered scoring runs (e.g. 8-0 within a rolling 2 minutes) in one pass.
+
+    Events must be in game order (clock counting down within each period).
+    A run is a stretch of one team's scoring with no opponent points, in the
+    same game and period. Inside it, a two-pointer window over that team's
+    scoring events tracks points scored within `window_secs`; overlapping
+    windows that reach `min_points` are merged, so each maximal run is
+    reported once. Every event enters and leaves the window at most once.
+
+    Returns:
+        List of dicts: {period, clock, end_clock, team, points, run}, where
+        clock/end_clock are the game clocks of the run's first/last basket
+    """
     out = []
-    # Build timeline in seconds remaining within period
-    pts_by_time = []
+    seg = []        # (secs_remaining, points) of the current unanswered segment
+    prefix = [0]    # prefix sums of seg points
+    key = None      # (game_id, period, team) of the current segment
+    lo = 0          # first seg index inside the rolling window
+    run_start = run_end = -1
+
+    def emit():
+        if run_start < 0:
+            return
+        pts = prefix[run_end + 1] - prefix[run_start]
+        t0, t1 = seg[run_start][0], seg[run_end][0]
+        out.append({"period": key[1], "clock": f"{t0//60:02d}:{t0%60:02d}",
+                    "end_clock": f"{t1//60:02d}:{t1%60:02d}", "team": key[2],
+                    "points": pts, "run": f"{key[2]} {pts}-0"})
+
     for e in events:
+        if not e.team or e.points <= 0:
+            continue
+        k = (e.game_id, e.period, e.team)
+        if k != key:
+            # Opponent scored or the period/game changed: the segment is over
+            emit()
+            seg, prefix, key, lo = [], [0], k, 0
+            run_start = run_end = -1
         t = mmss_to_secs(e.clock)
-        delta = e.points if e.team else 0
-        pts_by_time.append((e.period, t, e.team, delta))
-    
-    # naive scan
-    for i in range(len(pts_by_time)):
-        p0, t0, team0, _ = pts_by_time[i]
-        sum_team = {team0: 0}
-        for j in range(i, len(pts_by_time)):
-            p, t, team, delta = pts_by_time[j]
-            if p != p0 or t < t0 - window_secs:
-                break
-            if team:
-                sum_team[team] = sum_team.get(team, 0) + delta
-        
-        for tm, pts in sum_team.items():
-            if pts >= 8:
-                out.append({"period": p0, "clock": f"{t0//60:02d}:{t0%60:02d}", "run": f"{tm} {pts}-0"})
+        seg.append((t, e.points))
+        prefix.append(prefix[-1] + e.points)
+        i = len(seg) - 1
+        while seg[lo][0] - t > window_secs:
+            lo += 1
+        if prefix[i + 1] - prefix[lo] >= min_points:
+            if run_start >= 0 and lo > run_end:
+                emit()
+                run_start = -1
+            if run_start < 0:
+                run_start = lo
+            run_end = i
+    emit()
     return out
 
-def process_file(infile: Path, outfile: Path, game_id: str):
-    """Process a single PBP file to JSONL output."""
+def process_file(infile: Path, outfile: Path, game_id: str, print_runs: bool = False) -> int:
+    """Process a single PBP file to JSONL output.
+
+    Returns:
+        Number of events written
+    """
     print(f"Processing {infile} -> {outfile}")
     
     if infile.suffix == ".csv":
@@ -132,7 +206,7 @@ def process_file(infile: Path, outfile: Path, game_id: str):
         events = load_pbp_json(str(infile))
     else:
         print(f"Unknown file format: {infile}")
-        return
+        return 0
     
     print(f"Loaded {len(events)} PBP events")
     
@@ -142,6 +216,10 @@ def process_file(infile: Path, outfile: Path, game_id: str):
             f.write(json.dumps(e.__dict__, ensure_ascii=False) + "\n")
     
     print(f"Saved {len(events)} events to {outfile}")
+    if print_runs:
+        for run in detect_big_runs(events):
+            print(f"  Q{run['period']} {run['clock']}-{run['end_clock']}: {run['run']}")
+    return len(events)
 
 def main():
     ap = argparse.ArgumentParser()
@@ -150,6 +228,7 @@ def main():
     ap.add_argument("--infile", help="Single input file (legacy)")
     ap.add_argument("--outfile", help="Single output file (legacy)")
     ap.add_argument("--print_runs", action="store_true")
+    ap.add_argument("--workers", type=int, default=1, help="Worker processes for --in_dir mode")
     args = ap.parse_args()
     
     if args.in_dir and args.out_dir:
@@ -159,18 +238,23 @@ def main():
         out_dir.mkdir(parents=True, exist_ok=True)
         
         # Process all CSV/JSON files
-        input_files = list(in_dir.glob("*.csv")) + list(in_dir.glob("*.json"))
+        input_files = sorted(list(in_dir.glob("*.csv")) + list(in_dir.glob("*.json")))
         print(f"Found {len(input_files)} input files")
         
+        jobs = []
         for infile in input_files:
             # Extract game ID from filename or use stem
             game_id = infile.stem
             outfile = out_dir / f"{game_id}.jsonl"
-            process_file(infile, outfile, game_id)
+            jobs.append((infile.name, (infile, outfile, game_id, args.print_runs)))
+        results = run_batch(process_file, jobs, workers=args.workers)
+        print(f"Wrote {sum(r['result'] or 0 for r in results)} events")
+        if any(not r["ok"] for r in results):
+            return 1
             
     elif args.infile and args.outfile:
         # Single file mode (legacy)
-        process_file(Path(args.infile), Path(args.outfile), "")
+        process_file(Path(args.infile), Path(args.outfile), "", args.print_runs)
     else:
         print("Use --in_dir and --out_dir for directory processing, or --infile and --outfile for single file")
         return 1
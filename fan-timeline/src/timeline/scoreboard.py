@@ -0,0 +1,92 @@
+from __future__ import annotations
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+def teams_from_game_id(game_id: str) -> Optional[Tuple[str, str]]:
+    """(away, home) from an id like 2019-12-01-LAL-DAL, or None."""
+    parts = game_id.split("-") if game_id else []
+    if len(parts) >= 5 and parts[3] and parts[4]:
+        return parts[3], parts[4]
+    return None
+
+# Seconds per period on the elapsed-time axis, and the most periods a game
+# can run: regulation plus six overtimes (the NBA record)
+PERIOD_SECS = 720
+MAX_PERIODS = 4 + 6
+
+def game_end_sec(pbp_events: Sequence[Dict]) -> int:
+    """Elapsed second the game is over by: the end of the last PBP event's period.
+
+    Without PBP, or past MAX_PERIODS, the end of the last possible overtime.
+    """
+    last = max((int(e["period"]) for e in pbp_events if e.get("period") is not None), default=MAX_PERIODS)
+    return min(last, MAX_PERIODS) * PERIOD_SECS
+
+class Scoreboard:
+    """Running score of one game, built in a single pass over its PBP.
+
+    Scoring events are sorted by `elapsed` once; cumulative scores and lead
+    changes are recorded as they happen. Any point in the game is then a
+    bisect on elapsed time, so windows look up their scores in O(log n)
+    without rescanning PBP.
+
+    Scores are "first-second" in `teams` order: (away, home) when known
+    from the game id, otherwise the order teams first score in.
+    """
+
+    def __init__(self, pbp_events: Sequence[Dict], teams: Optional[Tuple[str, str]] = None):
+        scoring = sorted((e for e in pbp_events
+                          if "elapsed" in e and e.get("team") and e.get("points", 0) > 0),
+                         key=lambda e: e["elapsed"])
+        seen = []
+        for e in scoring:
+            if e["team"] not in seen:
+                seen.append(e["team"])
+        if teams is None or any(t not in teams for t in seen):
+            teams = tuple((seen + ["", ""])[:2])
+        self.teams = teams
+
+        self.times: List[float] = []
+        self.scores: List[Tuple[int, int]] = [(0, 0)]  # scores[i] = score after the first i baskets
+        self.lead_changes: List[Dict] = []
+        a = b = 0
+        leader = None
+        for e in scoring:
+            if e["team"] == teams[0]:
+                a += e["points"]
+            elif e["team"] == teams[1]:
+                b += e["points"]
+            else:
+                continue
+            self.times.append(e["elapsed"])
+            self.scores.append((a, b))
+            now = teams[0] if a > b else teams[1] if b > a else None
+            if now is not None and now != leader:
+                if leader is not None:
+                    self.lead_changes.append({
+                        "elapsed": e["elapsed"],
+                        "period": e.get("period"),
+                        "clock": e.get("clock", ""),
+                        "team": now,
+                        "score": f"{a}-{b}",
+                        "desc": e.get("desc", ""),
+                    })
+                leader = now
+        self._change_times = [c["elapsed"] for c in self.lead_changes]
+
+    def score_at(self, t: float) -> Tuple[int, int]:
+        """Score from every basket with elapsed < t."""
+        return self.scores[bisect_left(self.times, t)]
+
+    def score_str(self, t: float) -> str:
+        a, b = self.score_at(t)
+        return f"{a}-{b}"
+
+    def margin_at(self, t: float) -> int:
+        """First team's lead at t (negative when trailing)."""
+        a, b = self.score_at(t)
+        return a - b
+
+    def lead_changes_between(self, t0: float, t1: float) -> List[Dict]:
+        """Lead changes with t0 <= elapsed < t1."""
+        return self.lead_changes[bisect_left(self._change_times, t0):bisect_left(self._change_times, t1)]
@@ -0,0 +1,186 @@
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional
+
+_analyzer = None
+
+def get_analyzer():
+    """The process-wide VADER analyzer, created on first use."""
+    global _analyzer
+    if _analyzer is None:
+        from nltk.sentiment import SentimentIntensityAnalyzer
+        _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+def normalize_text(text: str) -> str:
+    """Cache key for a comment body.
+
+    VADER tokenizes on whitespace, so collapsing runs of whitespace and
+    stripping the ends never changes a score. Case and punctuation are kept:
+    both change VADER's intensity.
+    """
+    return " ".join(text.split())
+
+def _score_chunk(texts: List[str]) -> List[float]:
+    """Compound scores for already-normalized texts (process-pool worker)."""
+    polarity_scores = get_analyzer().polarity_scores
+    return [polarity_scores(t)["compound"] for t in texts]
+
+class SentimentService:
+    """Memoized, batched VADER compound scores.
+
+    Scores are cached in a bounded LRU keyed by normalize_text(body), so
+    duplicate comments ("Who's watching this one?") are scored once per
+    process. score_many() de-duplicates a batch, scores only the misses and,
+    with workers > 1, spreads large cold batches over a process pool.
+    warm() pre-scores texts without counting them as lookups. Safe to share
+    between threads.
+    """
+
+    def __init__(self, maxsize: int = 100_000, workers: int = 1, pool_min: int = 2_000,
+                 latency_window: int = 1024):
+        self.maxsize = maxsize
+        self.workers = workers
+        self.pool_min = pool_min
+        self._cache: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._latencies = deque(maxlen=latency_window)
+        self._warmed: set = set()  # cached by warm(), not looked up since
+        self.calls = 0
+        self.texts = 0
+        self.hits = 0
+        self.misses = 0
+        self.warmed = 0
+        self.warm_hits = 0
+        self.seconds = 0.0
+
+    def score(self, text: str) -> float:
+        """Compound score in [-1, 1] for one text."""
+        return self.score_many([text])[0]
+
+    def score_many(self, texts: Iterable[str]) -> List[float]:
+        """Compound scores for a batch of texts, in input order."""
+        start = time.perf_counter()
+        keys = [normalize_text(t) for t in texts]
+        found: Dict[str, float] = {}
+        missing: List[str] = []
+        hits = warm_hits = 0
+        with self._lock:
+            cache = self._cache
+            for key in keys:
+                if key in found:
+                    hits += 1
+                elif key in cache:
+                    cache.move_to_end(key)
+                    found[key] = cache[key]
+                    if key in self._warmed:
+                        # First lookup of a pre-scored text is not reuse
+                        self._warmed.discard(key)
+                        warm_hits += 1
+                    else:
+                        hits += 1
+                else:
+                    found[key] = None
+                    missing.append(key)
+
+        if missing:
+            for key, score in zip(missing, self._score_misses(missing)):
+                found[key] = score
+            self._store(missing, found)
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.calls += 1
+            self.texts += len(keys)
+            self.hits += hits
+            self.warm_hits += warm_hits
+            self.misses += len(keys) - hits - warm_hits
+            self.seconds += elapsed
+            self._latencies.append(elapsed)
+        return [found[key] for key in keys]
+
+    def warm(self, texts: Iterable[str]) -> int:
+        """Score and cache texts ahead of their lookups; returns how many were scored.
+
+        Warm-up is not counted as calls, hits or misses, and the first later
+        lookup of each warmed text counts as a warm hit, so hit_rate still
+        measures reuse rather than pre-scoring.
+        """
+        keys = list(dict.fromkeys(normalize_text(t) for t in texts))
+        with self._lock:
+            missing = [key for key in keys if key not in self._cache]
+        if missing:
+            self._store(missing, dict(zip(missing, self._score_misses(missing))), warmed=True)
+            with self._lock:
+                self.warmed += len(missing)
+        return len(missing)
+
+    def _store(self, keys: List[str], scores: Dict[str, float], warmed: bool = False):
+        with self._lock:
+            for key in keys:
+                self._cache[key] = scores[key]
+                self._cache.move_to_end(key)
+            if warmed:
+                self._warmed.update(keys)
+            while len(self._cache) > self.maxsize:
+                self._warmed.discard(self._cache.popitem(last=False)[0])
+
+    def _score_misses(self, texts: List[str]) -> List[float]:
+        if self.workers <= 1 or len(texts) < self.pool_min:
+            return _score_chunk(texts)
+        if self._pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        size = -(-len(texts) // (self.workers * 4))
+        chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+        return [score for chunk in self._pool.map(_score_chunk, chunks) for score in chunk]
+
+    def stats(self) -> Dict:
+        """Hit rate and per-call latency counters (latency percentiles over recent calls).
+
+        hit_rate counts only lookups served by an earlier lookup; first
+        lookups of warm()ed texts are reported as warm_hits.
+        """
+        with self._lock:
+            recent = sorted(self._latencies)
+            pct = lambda p: recent[min(len(recent) - 1, int(p * len(recent)))] * 1000 if recent else 0.0
+            return {
+                "calls": self.calls,
+                "texts": self.texts,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / self.texts if self.texts else 0.0,
+                "warmed": self.warmed,
+                "warm_hits": self.warm_hits,
+                "cached": len(self._cache),
+                "avg_call_ms": self.seconds / self.calls * 1000 if self.calls else 0.0,
+                "p50_call_ms": pct(0.50),
+                "p95_call_ms": pct(0.95),
+            }
+
+    def clear(self):
+        """Drop cached scores and reset counters."""
+        with self._lock:
+            self._cache.clear()
+            self._latencies.clear()
+            self._warmed.clear()
+            self.calls = self.texts = self.hits = self.misses = self.warmed = self.warm_hits = 0
+            self.seconds = 0.0
+
+    def close(self):
+        """Shut down the process pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+_service: Optional[SentimentService] = None
+
+def get_service() -> SentimentService:
+    """The process-wide service used by teacher.py."""
+    global _service
+    if _service is None:
+        _service = SentimentService()
+    return _service
@@ -1,28 +1,87 @@
 from __future__ import annotations
-import json, os
-from typing import List, Dict, Optional
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import jsonschema
-from .teacher import windows_from_sources, aggregate_sentiment, label_sentiment, write_event
-from .utils import clean_text
-
-app = FastAPI(title="Sports Timeline API", version="1.0.0")
-
-# Load schema for validation
-SCHEMA_PATH = "schema/timeline.schema.json"
-try:
-    with open(SCHEMA_PATH, "r") as f:
-        TIMELINE_SCHEMA = json.load(f)
-except FileNotFoundError:
-    print(f"Warning: Schema file {SCHEMA_PATH} not found. Validation disabled.")
-    TIMELINE_SCHEMA = None
+import asyncio, os, zlib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Optional, Tuple, Union
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from typing_extensions import Annotated, NotRequired, TypedDict
+from .teacher import label_window
+from .validation import get_validator
+
+# Requests are labeled in a process pool so CPU-bound work never blocks the
+# event loop and concurrent requests run in parallel. TIMELINE_WORKERS=0
+# uses a thread pool instead (keeps the loop free, but shares the GIL).
+WORKERS = int(os.environ.get("TIMELINE_WORKERS", os.cpu_count() or 1))
+_pool: Optional[Executor] = None
+
+def _warm_worker():
+    """Load the sentiment model and NumPy once per worker, not on its first request."""
+    from .sentiment import get_analyzer
+    from . import windowing
+    get_analyzer()
+
+def get_pool() -> Executor:
+    global _pool
+    if _pool is None:
+        _pool = (ProcessPoolExecutor(max_workers=WORKERS, initializer=_warm_worker) if WORKERS > 0
+                 else ThreadPoolExecutor(max_workers=4))
+    return _pool
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_pool()
+    yield
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+app = FastAPI(title="Sports Timeline API", version="1.0.0", lifespan=lifespan)
+
+# Compiled once at import (and once per worker process)
+TIMELINE_VALIDATOR = get_validator()
+
+# Comments and PBP events are validated TypedDicts, not BaseModels: they come
+# out of validation as the plain dicts windows_from_records takes, with no
+# per-record model objects to build and dump again.
+class CommentIn(TypedDict):
+    body: str
+    created_utc: int
+    score: NotRequired[int]
+    author: NotRequired[str]
+
+class PbpEventIn(TypedDict):
+    period: int
+    # MM:SS, checked here so a bad clock is a 422 rather than a worker error
+    clock: Annotated[str, Field(pattern=r"^\d{1,2}:\d{2}$")]
+    team: NotRequired[str]
+    points: NotRequired[int]
+    desc: NotRequired[str]
+
+class RedditThread(TypedDict):
+    comments: List[CommentIn]
+
+class UploadHeader(BaseModel):
+    """First line of an NDJSON upload; every later line is one comment."""
+    game_id: str
+    pbp: List[PbpEventIn]
+    start_utc: Optional[int] = None
+
+COMMENT = TypeAdapter(CommentIn)
+COMMENTS = TypeAdapter(List[CommentIn])
+LEGACY_THREAD = TypeAdapter(Union[List[CommentIn], RedditThread])
+LEGACY_PBP = TypeAdapter(List[PbpEventIn])
 
 class TimelineRequest(BaseModel):
     game_id: str
-    reddit_thread_json: Optional[str] = None
-    pbp_json: Optional[str] = None
+    comments: Optional[List[CommentIn]] = None
+    pbp: Optional[List[PbpEventIn]] = None
+    start_utc: Optional[int] = None  # tip-off; defaults to the earliest comment
     mode: str = "post_hoc"  # "post_hoc" or "live_sim"
+    # JSON-encoded strings, decoded a second time; use comments and pbp instead
+    reddit_thread_json: Optional[str] = Field(None, json_schema_extra={"deprecated": True})
+    pbp_json: Optional[str] = Field(None, json_schema_extra={"deprecated": True})
 
 class TimelineResponse(BaseModel):
     game_id: str
@@ -32,93 +91,161 @@ class TimelineResponse(BaseModel):
 
 def validate_timeline(data: Dict) -> bool:
     """Validate timeline data against schema."""
-    if TIMELINE_SCHEMA is None:
+    if TIMELINE_VALIDATOR is None:
         return True  # Skip validation if schema not available
     
-    try:
-        jsonschema.validate(data, TIMELINE_SCHEMA)
-        return True
-    except jsonschema.ValidationError as e:
-        print(f"Schema validation error: {e}")
-        return False
+    is_valid, message = TIMELINE_VALIDATOR.validate(data)
+    if not is_valid:
+        print(f"Schema validation error: {message}")
+    return is_valid
 
 def extract_themes(windows: List[Dict]) -> List[str]:
     """Extract top themes from windows."""
     from collections import Counter
-    all_text = " ".join(w.get("comments_text", "") for w in windows)
+    all_text = " ".join(c.get("body", "") for w in windows for c in w.get("comments", []))
     words = [w.lower() for w in all_text.split() if len(w) > 3]
     themes = [word for word, count in Counter(words).most_common(20) if count >= 3]
     return themes[:5]
 
-@app.post("/v1/timeline/generate", response_model=TimelineResponse)
-async def generate_timeline(request: TimelineRequest):
-    """Generate a timeline from Reddit thread and PBP data."""
-    try:
-        # Parse input data
-        if request.reddit_thread_json:
-            reddit_data = json.loads(request.reddit_thread_json)
-        else:
-            raise HTTPException(status_code=400, detail="reddit_thread_json is required")
-        
-        if request.pbp_json:
-            pbp_data = json.loads(request.pbp_json)
-        else:
-            raise HTTPException(status_code=400, detail="pbp_json is required")
-        
-        # Create temporary files for processing
-        import tempfile
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.jsonl', delete=False) as reddit_file:
-            for comment in reddit_data:
-                reddit_file.write(json.dumps(comment) + '\n')
-            reddit_path = reddit_file.name
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as pbp_file:
-            json.dump(pbp_data, pbp_file)
-            pbp_path = pbp_file.name
-        
+def build_timeline(game_id: str, comments: List[Dict], pbp_events: List[Dict],
+                   start_utc: Optional[int] = None) -> Dict:
+    """Dicts in, timeline response out, all in memory. Runs in a worker."""
+    # windowing needs NumPy: imported here so the API process itself never loads it
+    from .windowing import windows_from_records
+    windows = windows_from_records(comments, pbp_events, game_id, start_utc)
+    timeline = [entry for w in windows if w["comments"] or w["pbp"]
+                for entry in label_window(w)["timeline"]]
+    response_data = {
+        "game_id": game_id,
+        "timeline": timeline,
+        "top_themes": extract_themes(windows),
+        "notes": "Generated using teacher pipeline (no fine-tuned model)"
+    }
+    if not validate_timeline(response_data):
+        raise ValueError("Generated timeline failed schema validation")
+    return response_data
+
+def _bad_payload(e: ValidationError, what: str) -> HTTPException:
+    if any(err["type"] == "json_invalid" for err in e.errors()):
+        return HTTPException(status_code=400, detail="Invalid JSON in request")
+    return HTTPException(status_code=422, detail=f"Invalid {what}: {e.errors(include_url=False)[:5]}")
+
+def request_inputs(request: TimelineRequest) -> Tuple[List[Dict], List[Dict]]:
+    """Comments and PBP events of a request, decoding the deprecated string fields if used."""
+    if request.comments is None and not request.reddit_thread_json:
+        raise HTTPException(status_code=400, detail="comments is required")
+    if request.pbp is None and not request.pbp_json:
+        raise HTTPException(status_code=400, detail="pbp is required")
+    comments, pbp = request.comments, request.pbp
+    if comments is None:
+        try:
+            thread = LEGACY_THREAD.validate_json(request.reddit_thread_json)
+        except ValidationError as e:
+            raise _bad_payload(e, "reddit_thread_json")
+        # A fetched thread ({"comments": [...]}) or a bare list of comments
+        comments = thread["comments"] if isinstance(thread, dict) else thread
+    if pbp is None:
         try:
-            # Process with teacher pipeline
-            windows, pbp = windows_from_sources(reddit_path, pbp_path)
-            
-            # Build timeline
-            timeline = []
-            for w in windows:
-                sent_val = aggregate_sentiment(w.get("comments", []))
-                sent_lbl = label_sentiment(sent_val, 0.15, -0.15)
-                event = write_event(w, max_len=120)
-                
-                timeline.append({
-                    "ts": w["window_label"],
-                    "event": event,
-                    "fan_sentiment": sent_lbl
-                })
-            
-            # Extract themes
-            themes = extract_themes(windows)
-            
-            # Build response
-            response_data = {
-                "game_id": request.game_id,
-                "timeline": timeline,
-                "top_themes": themes,
-                "notes": "Generated using teacher pipeline (no fine-tuned model)"
-            }
-            
-            # Validate response
-            if not validate_timeline(response_data):
-                raise HTTPException(status_code=500, detail="Generated timeline failed schema validation")
-            
-            return TimelineResponse(**response_data)
-            
-        finally:
-            # Clean up temp files
-            os.unlink(reddit_path)
-            os.unlink(pbp_path)
-            
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=400, detail="Invalid JSON in request")
+            pbp = LEGACY_PBP.validate_json(request.pbp_json)
+        except ValidationError as e:
+            raise _bad_payload(e, "pbp_json")
+    return comments, pbp
+
+async def run_build(game_id: str, comments: List[Dict], pbp: List[Dict],
+                    start_utc: Optional[int]) -> TimelineResponse:
+    try:
+        loop = asyncio.get_running_loop()
+        response_data = await loop.run_in_executor(
+            get_pool(), build_timeline, game_id, comments, pbp, start_utc)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
+    return TimelineResponse(**response_data)
+
+@app.post("/v1/timeline/generate", response_model=TimelineResponse)
+async def generate_timeline(request: TimelineRequest):
+    """Generate a timeline from Reddit comments and PBP events."""
+    comments, pbp = request_inputs(request)
+    return await run_build(request.game_id, comments, pbp, request.start_utc)
+
+async def ndjson_lines(chunks: AsyncIterator[bytes], gzipped: bool = False) -> AsyncIterator[bytes]:
+    """Non-empty lines of a (optionally gzipped) NDJSON byte stream, as they arrive."""
+    inflate = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16) if gzipped else None
+    tail = b""
+    async for chunk in chunks:
+        if inflate is not None:
+            chunk = inflate.decompress(chunk)
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield line
+    if inflate is not None:
+        if not inflate.eof:
+            raise zlib.error("truncated gzip stream")
+        tail += inflate.flush()
+    if tail.strip():
+        yield tail
+
+async def read_upload(chunks: AsyncIterator[bytes], gzipped: bool = False,
+                      batch: int = 2000) -> Tuple[UploadHeader, List[Dict]]:
+    """Decode an NDJSON upload: a header line, then one comment per line.
+
+    Lines are validated in batches as one JSON array each, so decoding
+    overlaps the upload and costs one pass over the bytes. A batch that fails
+    is re-checked line by line to name the bad line.
+    """
+    header: Optional[UploadHeader] = None
+    comments: List[Dict] = []
+    pending: List[bytes] = []
+    first = 0  # line number of pending[0]
+
+    def flush():
+        try:
+            comments.extend(COMMENTS.validate_json(b"[" + b",".join(pending) + b"]"))
+        except ValidationError as batch_error:
+            for n, line in enumerate(pending, first):
+                try:
+                    COMMENT.validate_json(line)
+                except ValidationError as e:
+                    raise HTTPException(status_code=400 if e.errors()[0]["type"] == "json_invalid" else 422,
+                                        detail=f"Line {n}: {e.errors(include_url=False)[0]['msg']}")
+            # Every line is fine alone but the batch is not (e.g. nesting one level too deep)
+            raise _bad_payload(batch_error, "comments")
+        pending.clear()
+
+    n = 0
+    try:
+        async for line in ndjson_lines(chunks, gzipped):
+            n += 1
+            if header is None:
+                try:
+                    header = UploadHeader.model_validate_json(line)
+                except ValidationError as e:
+                    raise _bad_payload(e, "upload header")
+                continue
+            if not pending:
+                first = n
+            pending.append(line)
+            if len(pending) >= batch:
+                flush()
+        if pending:
+            flush()
+    except zlib.error as e:
+        raise HTTPException(status_code=400, detail=f"Invalid gzip body: {e}")
+    if header is None:
+        raise HTTPException(status_code=400, detail="Empty upload")
+    return header, comments
+
+@app.post("/v1/timeline/upload", response_model=TimelineResponse)
+async def upload_timeline(request: Request):
+    """Generate a timeline from an NDJSON body, optionally gzipped.
+
+    Line 1 is {"game_id", "pbp", "start_utc"}; each following line is one
+    comment. Send Content-Encoding: gzip for a compressed body.
+    """
+    gzipped = "gzip" in request.headers.get("content-encoding", "")
+    header, comments = await read_upload(request.stream(), gzipped)
+    return await run_build(header.game_id, comments, header.pbp, header.start_utc)
 
 @app.get("/health")
 async def health_check():
@@ -133,6 +260,7 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "POST /v1/timeline/generate": "Generate timeline from Reddit + PBP data",
+            "POST /v1/timeline/upload": "Same, from NDJSON (optionally gzipped) for large threads",
             "GET /health": "Health check",
             "GET /docs": "API documentation (Swagger UI)"
         }
@@ -7,11 +7,15 @@ import json
 import random
 import re
 from typing import List, Dict, Tuple, Optional
-from nltk.sentiment import SentimentIntensityAnalyzer
-import numpy as np
 
-# Initialize VADER sentiment analyzer
-sia = SentimentIntensityAnalyzer()
+# NumPy, NLTK/VADER and scikit-learn are imported on first use, so importing
+# this module (make_sft, serve, tests) stays cheap on paths that never score.
+try:
+    from .scoreboard import MAX_PERIODS
+    from .sentiment import get_service
+except ImportError:
+    from scoreboard import MAX_PERIODS
+    from sentiment import get_service
 
 def vader_label(text: str) -> str:
     """Label text as positive, negative, or mixed using VADER sentiment analysis.
@@ -25,7 +29,7 @@ def vader_label(text: str) -> str:
     if not text.strip():
         return "mixed"
     
-    score = sia.polarity_scores(text)["compound"]
+    score = get_service().score(text)
     if score > 0.25:
         return "pos"
     elif score < -0.25:
@@ -37,7 +41,8 @@ def trimmed_mean_sentiment(comments: List[Dict]) -> str:
     """Compute sentiment using trimmed mean to avoid single loud user skew.
     
     Args:
-        comments: List of comment dictionaries with 'body' field
+        comments: List of comment dictionaries with 'body' field; a collapsed
+            comment (dedup.collapse_comments) counts 'count' times
         
     Returns:
         Overall sentiment label
@@ -45,13 +50,10 @@ def trimmed_mean_sentiment(comments: List[Dict]) -> str:
     if not comments:
         return "mixed"
     
-    # Get sentiment scores for each comment
-    sentiments = []
-    for comment in comments:
-        body = comment.get("body", "")
-        if body.strip():
-            score = sia.polarity_scores(body)["compound"]
-            sentiments.append(score)
+    # Get sentiment scores for each comment (memoized, one batch per window)
+    kept = [c for c in comments if c.get("body", "").strip()]
+    scores = get_service().score_many([c["body"] for c in kept])
+    sentiments = [score for c, score in zip(kept, scores) for _ in range(c.get("count", 1))]
     
     if not sentiments:
         return "mixed"
@@ -62,6 +64,7 @@ def trimmed_mean_sentiment(comments: List[Dict]) -> str:
     trimmed = sentiments[trim_count:-trim_count] if len(sentiments) > 2 * trim_count else sentiments
     
     # Compute mean and classify
+    import numpy as np
     mean_score = np.mean(trimmed)
     return vader_label("dummy") if len(trimmed) == 0 else vader_label("positive" if mean_score > 0.25 else "negative" if mean_score < -0.25 else "neutral")
 
@@ -96,37 +99,46 @@ def is_run(pbp_events: List[Dict]) -> Optional[Tuple[str, int, str]]:
     
     return None
 
-def is_lead_change(pbp_events: List[Dict]) -> Optional[Tuple[str, str, str]]:
+def shot_type_from_desc(desc: str) -> str:
+    """Shot type named in a PBP description."""
+    if "3PT" in desc:
+        return "three-pointer"
+    elif "Free Throw" in desc:
+        return "free throw"
+    elif "Dunk" in desc:
+        return "dunk"
+    elif "Layup" in desc:
+        return "layup"
+    return "shot"
+
+def is_lead_change(pbp_events: List[Dict],
+                   lead_changes: Optional[List[Dict]] = None) -> Optional[Tuple[str, str, str]]:
     """Detect if PBP events represent a lead change.
     
     Args:
         pbp_events: List of PBP event dictionaries
+        lead_changes: The window's lead changes from the running scoreboard
+            (windowing.create_window_summary); None when the window has no
+            score state, in which case the first scoring event is used
         
     Returns:
         Tuple of (team, player, shot_type) or None if no lead change
     """
+    if lead_changes is not None:
+        if not lead_changes:
+            return None
+        change = lead_changes[-1]
+        return change["team"], "player", shot_type_from_desc(change.get("desc", ""))
+    
     if len(pbp_events) < 1:
         return None
     
-    # Simplified lead change detection
-    # In real implementation, would track score changes
+    # No score state: fall back to the first scoring event
     for event in pbp_events:
         if event.get("points", 0) > 0:
             team = event.get("team", "")
             desc = event.get("desc", "")
-            
-            # Extract shot type from description
-            shot_type = "shot"
-            if "3PT" in desc:
-                shot_type = "three-pointer"
-            elif "Free Throw" in desc:
-                shot_type = "free throw"
-            elif "Dunk" in desc:
-                shot_type = "dunk"
-            elif "Layup" in desc:
-                shot_type = "layup"
-            
-            return team, "player", shot_type
+            return team, "player", shot_type_from_desc(desc)
     
     return None
 
@@ -151,12 +163,14 @@ def is_highlight_play(pbp_events: List[Dict]) -> Optional[Tuple[str, str]]:
     
     return None
 
-def summarize_window(pbp_events: List[Dict], comments: List[Dict]) -> str:
+def summarize_window(pbp_events: List[Dict], comments: List[Dict],
+                     lead_changes: Optional[List[Dict]] = None) -> str:
     """Generate event summary for a window using PBP events and fan quotes.
     
     Args:
         pbp_events: List of PBP event dictionaries
         comments: List of comment dictionaries
+        lead_changes: Lead changes inside the window, if known
         
     Returns:
         Event summary string (≤ 28 tokens)
@@ -169,7 +183,7 @@ def summarize_window(pbp_events: List[Dict], comments: List[Dict]) -> str:
         return summary
     
     # Check for lead changes
-    lead_info = is_lead_change(pbp_events)
+    lead_info = is_lead_change(pbp_events, lead_changes)
     if lead_info:
         team, player, shot_type = lead_info
         summary = f"{team} retake the lead on {player} {shot_type}."
@@ -229,17 +243,19 @@ def add_fan_quotes(summary: str, comments: List[Dict], max_quotes: int = 2) -> s
     
     return summary
 
-def write_event(pbp_events: List[Dict], comments: List[Dict]) -> str:
+def write_event(pbp_events: List[Dict], comments: List[Dict],
+                lead_changes: Optional[List[Dict]] = None) -> str:
     """Write a complete event summary with fan quotes.
     
     Args:
         pbp_events: List of PBP event dictionaries
         comments: List of comment dictionaries
+        lead_changes: Lead changes inside the window, if known
         
     Returns:
         Complete event summary string
     """
-    summary = summarize_window(pbp_events, comments)
+    summary = summarize_window(pbp_events, comments, lead_changes)
     summary_with_quotes = add_fan_quotes(summary, comments)
     
     # Ensure we don't exceed token limit
@@ -256,8 +272,12 @@ def label_window(win: Dict) -> Dict:
         win: Window dictionary with comments and PBP events
         
     Returns:
-        Dictionary with timeline information
+        Dictionary with timeline information; the timeline is empty for a
+        window past the last possible overtime (no game clock to label it with)
     """
+    if win.get("period", 1) > MAX_PERIODS:
+        return {"timeline": []}
+
     # Extract comments and PBP events
     comments = win.get("comments", [])
     pbp_events = win.get("pbp", [])
@@ -266,7 +286,7 @@ def label_window(win: Dict) -> Dict:
     fan_sentiment = trimmed_mean_sentiment(comments)
     
     # Generate event summary
-    event = write_event(pbp_events, comments)
+    event = write_event(pbp_events, comments, win.get("lead_changes"))
     
     # Create timestamp
     period = win.get("period", 1)
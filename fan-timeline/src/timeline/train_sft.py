@@ -27,16 +27,11 @@ from transformers import (
     DataCollatorForLanguageModeling
 )
 from peft import LoraConfig, get_peft_model, TaskType
-import json
+import sys
 
-def load_sft_data(data_path: str):
-    """Load SFT training data."""
-    data = []
-    with open(data_path, "r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                data.append(json.loads(line))
-    return data
+# Shared mmap JSONL reader from the timeline package
+sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})
+from jsonl import JsonlFile
 
 def format_training_example(example):
     """Format example for training."""
@@ -50,13 +45,14 @@ def format_training_example(example):
 def main():
     # Load data
     print("Loading SFT data...")
-    raw_data = load_sft_data("{config.get('paths', {}).get('sft_out', 'data/sft/sft_data.jsonl')}")
+    data = JsonlFile("{config.get('paths', {}).get('sft_out', 'data/sft/sft_data.jsonl')}")
     
-    # Format for training
-    formatted_data = [format_training_example(ex) for ex in raw_data]
-    dataset = Dataset.from_list(formatted_data)
+    # Hold out a validation split by record index; only those records are parsed for it
+    train_ids, val_ids = data.split({config.get('train', {}).get('val_size', 0)!r}, seed={config.get('train', {}).get('seed', 42)})
+    dataset = Dataset.from_list([format_training_example(ex) for ex in data.records(train_ids)])
+    eval_dataset = Dataset.from_list([format_training_example(ex) for ex in data.records(val_ids)]) if val_ids else None
     
-    print(f"Loaded {{len(dataset)}} training examples")
+    print(f"Loaded {{len(dataset)}} training examples, {{len(val_ids)}} validation examples")
     
     # Load model and tokenizer
     print("Loading base model...")
@@ -97,7 +93,7 @@ def main():
         warmup_steps=100,
         logging_steps=10,
         save_steps=500,
-        evaluation_strategy="no",
+        evaluation_strategy="epoch" if eval_dataset is not None else "no",
         save_strategy="epoch",
         load_best_model_at_end=False,
         ddp_find_unused_parameters=False,
@@ -116,6 +112,7 @@ def main():
         model=model,
         args=training_args,
         train_dataset=dataset,
+        eval_dataset=eval_dataset,
         data_collator=data_collator,
         tokenizer=tokenizer,
     )
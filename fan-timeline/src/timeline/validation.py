@@ -0,0 +1,146 @@
+from __future__ import annotations
+import json, re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import jsonschema
+from jsonschema.exceptions import best_match
+
+# schema/timeline.schema.json at the project root, wherever the caller runs from
+DEFAULT_SCHEMA_PATH = Path(__file__).resolve().parents[2] / "schema" / "timeline.schema.json"
+
+Check = Callable[[Any], bool]
+
+# Keywords the fast path implements; a schema using anything else is checked
+# by jsonschema alone. Annotations are accepted and ignored.
+_ANNOTATIONS = {"$schema", "$id", "title", "description", "examples", "default"}
+_TYPES = {
+    "object": lambda x: isinstance(x, dict),
+    "array": lambda x: isinstance(x, list),
+    "string": lambda x: isinstance(x, str),
+    "boolean": lambda x: isinstance(x, bool),
+    "null": lambda x: x is None,
+    "integer": lambda x: (isinstance(x, int) and not isinstance(x, bool)) or (isinstance(x, float) and x.is_integer()),
+    "number": lambda x: isinstance(x, (int, float)) and not isinstance(x, bool),
+}
+
+def _compile(schema: Dict) -> Optional[Check]:
+    """A predicate equivalent to the schema, or None if it uses other keywords.
+
+    Covers the subset the timeline contract is written in. Like JSON Schema,
+    each keyword only constrains values of the type it applies to.
+    """
+    if not isinstance(schema, dict):
+        return None
+    checks: List[Check] = []
+    for key, value in schema.items():
+        if key in _ANNOTATIONS or (key == "additionalProperties" and value is True):
+            continue
+        if key == "type" and isinstance(value, str) and value in _TYPES:
+            checks.append(_TYPES[value])
+        elif key == "enum" and isinstance(value, list) and all(isinstance(v, str) for v in value):
+            allowed = frozenset(value)
+            checks.append(lambda x, allowed=allowed: isinstance(x, str) and x in allowed)
+        elif key == "pattern":
+            search = re.compile(value).search
+            checks.append(lambda x, search=search: not isinstance(x, str) or search(x) is not None)
+        elif key in ("minLength", "maxLength", "minItems", "maxItems") and isinstance(value, int):
+            kind = str if key.endswith("Length") else list
+            if key.startswith("min"):
+                checks.append(lambda x, n=value, kind=kind: not isinstance(x, kind) or len(x) >= n)
+            else:
+                checks.append(lambda x, n=value, kind=kind: not isinstance(x, kind) or len(x) <= n)
+        elif key == "required" and isinstance(value, list):
+            required = frozenset(value)
+            checks.append(lambda x, required=required: not isinstance(x, dict) or required <= x.keys())
+        elif key == "additionalProperties" and value is False:
+            allowed = frozenset(schema.get("properties", {}))
+            checks.append(lambda x, allowed=allowed: not isinstance(x, dict) or x.keys() <= allowed)
+        elif key == "properties" and isinstance(value, dict):
+            props = []
+            for name, sub in value.items():
+                check = _compile(sub)
+                if check is None:
+                    return None
+                props.append((name, check))
+            def check_properties(x, props=props):
+                if not isinstance(x, dict):
+                    return True
+                for name, check in props:
+                    if name in x and not check(x[name]):
+                        return False
+                return True
+            checks.append(check_properties)
+        elif key == "items" and isinstance(value, dict):
+            item = _compile(value)
+            if item is None:
+                return None
+            checks.append(lambda x, item=item: not isinstance(x, list) or all(item(v) for v in x))
+        else:
+            return None
+    if len(checks) == 1:
+        return checks[0]
+    return lambda x: all(check(x) for check in checks)
+
+class TimelineValidator:
+    """A schema compiled once: the schema is checked and its validator built here, not per call.
+
+    Valid documents go through a predicate compiled from the schema when it
+    only uses the keywords the timeline contract needs (_compile), else
+    through a cached jsonschema validator. Invalid ones are always re-run
+    through jsonschema for its error message, so verdicts and messages match
+    jsonschema.validate.
+    """
+
+    def __init__(self, schema: Dict):
+        cls = jsonschema.validators.validator_for(schema)
+        cls.check_schema(schema)
+        self.schema = schema
+        self._validator = cls(schema)
+        self._fast = _compile(schema)
+        self.is_valid: Check = self._fast or self._validator.is_valid
+
+    def validate(self, data: Any) -> Tuple[bool, str]:
+        """(True, "Valid") or (False, the error jsonschema.validate would raise)."""
+        if self.is_valid(data):
+            return True, "Valid"
+        error = best_match(self._validator.iter_errors(data))
+        return False, str(error)
+
+    def validate_many(self, items: Iterable[Any]) -> List[Tuple[bool, str]]:
+        """validate() for each item, e.g. a batch of model outputs."""
+        is_valid, validate = self.is_valid, self.validate
+        return [(True, "Valid") if is_valid(data) else validate(data) for data in items]
+
+_compiled: Dict[int, Tuple[Dict, TimelineValidator]] = {}
+_loaded: Dict[str, Optional[TimelineValidator]] = {}
+
+def compile_schema(schema: Dict) -> TimelineValidator:
+    """The cached validator for a schema dict (keyed by identity; don't mutate it after)."""
+    entry = _compiled.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        entry = _compiled[id(schema)] = (schema, TimelineValidator(schema))
+    return entry[1]
+
+def get_validator(schema_path: Optional[str] = None) -> Optional[TimelineValidator]:
+    """The cached validator for a schema file (default: the timeline contract); None if missing."""
+    path = str(schema_path or DEFAULT_SCHEMA_PATH)
+    if path not in _loaded:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                _loaded[path] = TimelineValidator(json.load(f))
+        except FileNotFoundError:
+            print(f"Warning: Schema file {path} not found. Validation disabled.")
+            _loaded[path] = None
+    return _loaded[path]
+
+def validate(data: Any, schema: Optional[Dict] = None) -> Tuple[bool, str]:
+    """Validate against a schema dict, or the timeline contract by default."""
+    validator = compile_schema(schema) if schema is not None else get_validator()
+    return validator.validate(data) if validator is not None else (True, "Valid")
+
+def validate_many(items: Iterable[Any], schema: Optional[Dict] = None) -> List[Tuple[bool, str]]:
+    """validate() over a batch, compiling the schema once."""
+    validator = compile_schema(schema) if schema is not None else get_validator()
+    if validator is None:
+        return [(True, "Valid") for _ in items]
+    return validator.validate_many(items)
@@ -1,53 +1,204 @@
 from __future__ import annotations
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Sequence, Tuple
 import random
 import json
 from pathlib import Path
+import numpy as np
 try:
-    from .utils import truncate_tokens
+    from .utils import clean_texts, truncate_tokens
+    from .scoreboard import Scoreboard, game_end_sec, teams_from_game_id
+    from .align_time import add_elapsed_times, add_elapsed_times_pbp
 except ImportError:
-    from utils import truncate_tokens
+    from utils import clean_texts, truncate_tokens
+    from scoreboard import Scoreboard, game_end_sec, teams_from_game_id
+    from align_time import add_elapsed_times, add_elapsed_times_pbp
 
-def build_windows(comments: List[Dict], pbp_events: List[Dict], win_len: int = 60) -> Dict[int, Dict]:
-    """Collapse comments + PBP into fixed 60-second bins.
+def elapsed_array(items: Sequence[Dict], field: str = "elapsed") -> np.ndarray:
+    """Column of `field` as float64, NaN where an item lacks it."""
+    nan = float("nan")
+    return np.fromiter([item.get(field, nan) for item in items], dtype=np.float64, count=len(items))
+
+class WindowIndex:
+    """Windows as index ranges into shared comment / PBP arrays.
+
+    `win_ids` is sorted. Window k's comments are
+    `comments[comment_order[comment_starts[k]:comment_ends[k]]]`; likewise
+    for PBP. Ranges of overlapping (sliding) windows overlap in the same
+    order array, so nothing is copied per window.
+    """
+
+    def __init__(self, win_ids: np.ndarray, comment_order: np.ndarray, comment_starts: np.ndarray,
+                 comment_ends: np.ndarray, pbp_order: np.ndarray, pbp_starts: np.ndarray,
+                 pbp_ends: np.ndarray):
+        self.win_ids = win_ids
+        self.comment_order = comment_order
+        self.comment_starts = comment_starts
+        self.comment_ends = comment_ends
+        self.pbp_order = pbp_order
+        self.pbp_starts = pbp_starts
+        self.pbp_ends = pbp_ends
+
+    def __len__(self) -> int:
+        return len(self.win_ids)
+
+    def comment_indices(self, k: int) -> np.ndarray:
+        return self.comment_order[self.comment_starts[k]:self.comment_ends[k]]
+
+    def pbp_indices(self, k: int) -> np.ndarray:
+        return self.pbp_order[self.pbp_starts[k]:self.pbp_ends[k]]
+
+    def comment_counts(self) -> np.ndarray:
+        return self.comment_ends - self.comment_starts
+
+    def to_dict(self, comments: Sequence[Dict], pbp_events: Sequence[Dict]) -> Dict[int, Dict]:
+        """Materialize the build_windows() dict for these index ranges."""
+        # One gather per input, then each window is a list slice of references
+        sorted_comments = [comments[i] for i in self.comment_order.tolist()]
+        sorted_pbp = [pbp_events[i] for i in self.pbp_order.tolist()]
+        ranges = zip(self.win_ids.tolist(), self.comment_starts.tolist(), self.comment_ends.tolist(),
+                     self.pbp_starts.tolist(), self.pbp_ends.tolist())
+        windows = {}
+        for win, c_lo, c_hi, p_lo, p_hi in ranges:
+            windows[win] = {
+                "comments": sorted_comments[c_lo:c_hi],
+                "pbp": sorted_pbp[p_lo:p_hi],
+            }
+        return windows
+
+def _group_bins(elapsed: np.ndarray, win_len: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(stable order of valid items by bin, their sorted bins, unique bins)."""
+    valid = np.flatnonzero(~np.isnan(elapsed))
+    bins = np.floor_divide(elapsed[valid], win_len).astype(np.int64)
+    if not len(bins):
+        return valid, bins, bins
+    lo = bins.min()
+    if bins.max() - lo < 1 << 16:
+        # A game spans a few hundred bins: a uint16 key gets NumPy's radix sort
+        order = np.argsort((bins - lo).astype(np.uint16), kind="stable")
+    else:
+        order = np.argsort(bins, kind="stable")
+    sorted_bins = bins[order]
+    # np.unique without the re-sort: keep positions where the bin changes
+    unique_bins = sorted_bins[np.flatnonzero(np.diff(sorted_bins, prepend=lo - 1))]
+    return valid[order], sorted_bins, unique_bins
+
+def build_window_index(comment_elapsed: np.ndarray, pbp_elapsed: np.ndarray,
+                       win_len: int = 60) -> WindowIndex:
+    """Bucket elapsed-second arrays into fixed bins without per-item Python work.
+
+    Args:
+        comment_elapsed: Elapsed seconds per comment (NaN = not aligned, skipped)
+        pbp_elapsed: Elapsed seconds per PBP event (NaN = skipped)
+        win_len: Window length in seconds
+
+    Returns:
+        WindowIndex over every bin holding at least one comment or PBP event
+    """
+    c_order, c_bins, c_ids = _group_bins(np.asarray(comment_elapsed, dtype=np.float64), win_len)
+    p_order, p_bins, p_ids = _group_bins(np.asarray(pbp_elapsed, dtype=np.float64), win_len)
+    win_ids = np.union1d(c_ids, p_ids)
+    # searchsorted on the sorted bins gives each window's [start, end) range
+    c_bounds = np.searchsorted(c_bins, np.append(win_ids, np.iinfo(np.int64).max))
+    p_bounds = np.searchsorted(p_bins, np.append(win_ids, np.iinfo(np.int64).max))
+    return WindowIndex(win_ids, c_order, c_bounds[:-1], c_bounds[1:], p_order, p_bounds[:-1], p_bounds[1:])
+
+def _sweep(sorted_t: List[float], starts: List[int], win_len: int) -> Tuple[List[int], List[int]]:
+    """Two-pointer pass: [lo, hi) of sorted_t inside [s, s + win_len) for each ascending start s.
+
+    Both pointers only move forward, so each item is visited twice in total
+    however much the windows overlap.
+    """
+    n = len(sorted_t)
+    lo = hi = 0
+    los, his = [], []
+    for s in starts:
+        while lo < n and sorted_t[lo] < s:
+            lo += 1
+        end = s + win_len
+        while hi < n and sorted_t[hi] < end:
+            hi += 1
+        los.append(lo)
+        his.append(hi)
+    return los, his
+
+def build_sliding_index(comment_elapsed: np.ndarray, pbp_elapsed: np.ndarray,
+                        win_len: int = 60, stride: int = 10) -> WindowIndex:
+    """Overlapping windows [k * stride, k * stride + win_len), k >= 0, over elapsed-second arrays.
+
+    Comments and PBP are time-sorted once (stable); each window is then a
+    [lo, hi) range into that order found by a two-pointer sweep, so the
+    cost is O(n log n + n + windows) rather than O(n * win_len / stride).
+
+    Args:
+        comment_elapsed: Elapsed seconds per comment (NaN = not aligned, skipped)
+        pbp_elapsed: Elapsed seconds per PBP event (NaN = skipped)
+        win_len: Window length in seconds
+        stride: Seconds between consecutive window starts
+
+    Returns:
+        WindowIndex over every window holding at least one comment or PBP event
+    """
+    if stride <= 0 or win_len <= 0:
+        raise ValueError("win_len and stride must be positive")
+    orders, times = [], []
+    for elapsed in (np.asarray(comment_elapsed, dtype=np.float64), np.asarray(pbp_elapsed, dtype=np.float64)):
+        valid = np.flatnonzero(~np.isnan(elapsed))
+        order = valid[np.argsort(elapsed[valid], kind="stable")]
+        orders.append(order)
+        times.append(elapsed[order])
+
+    all_t = np.concatenate(times)
+    if not len(all_t):
+        empty = np.zeros(0, dtype=np.int64)
+        return WindowIndex(empty, orders[0], empty, empty, orders[1], empty, empty)
+    # Windows that can contain t satisfy (t - win_len) / stride < k <= t / stride;
+    # none starts before tip-off (a negative start would be period 0)
+    first = max(0, int(np.floor((all_t.min() - win_len) / stride)) + 1)
+    last = int(np.floor(all_t.max() / stride))
+    win_ids = list(range(first, last + 1))
+    starts = [k * stride for k in win_ids]
+
+    c_lo, c_hi = _sweep(times[0].tolist(), starts, win_len)
+    p_lo, p_hi = _sweep(times[1].tolist(), starts, win_len)
+    c_lo, c_hi, p_lo, p_hi = (np.array(x, dtype=np.int64) for x in (c_lo, c_hi, p_lo, p_hi))
+    keep = (c_hi > c_lo) | (p_hi > p_lo)
+    return WindowIndex(np.array(win_ids, dtype=np.int64)[keep], orders[0], c_lo[keep], c_hi[keep],
+                       orders[1], p_lo[keep], p_hi[keep])
+
+def build_windows(comments: List[Dict], pbp_events: List[Dict], win_len: int = 60,
+                  stride: Optional[int] = None) -> Dict[int, Dict]:
+    """Collapse comments + PBP into fixed 60-second bins, or sliding windows.
     
     Args:
         comments: List of comment dictionaries with 'elapsed' field
         pbp_events: List of PBP event dictionaries with 'elapsed' field
         win_len: Window length in seconds (default 60)
+        stride: Seconds between window starts; None or win_len gives disjoint bins.
+            Window k then covers [k * stride, k * stride + win_len) and its
+            items are in time order.
         
     Returns:
-        Dictionary mapping window_id to window data
+        Dictionary mapping window_id to window data, in window order
     """
-    windows = {}
-    
-    # Add comments to windows
-    for c in comments:
-        if 'elapsed' not in c:
-            continue
-        win = int(c["elapsed"] // win_len)
-        if win not in windows:
-            windows[win] = {"comments": [], "pbp": []}
-        windows[win]["comments"].append(c)
-    
-    # Add PBP events to windows
-    for e in pbp_events:
-        if 'elapsed' not in e:
-            continue
-        win = int(e["elapsed"] // win_len)
-        if win not in windows:
-            windows[win] = {"comments": [], "pbp": []}
-        windows[win]["pbp"].append(e)
-    
-    return windows
+    if stride is None or stride == win_len:
+        index = build_window_index(elapsed_array(comments), elapsed_array(pbp_events), win_len)
+    else:
+        index = build_sliding_index(elapsed_array(comments), elapsed_array(pbp_events), win_len, stride)
+    return index.to_dict(comments, pbp_events)
+
+def create_window_summary(win_id: int, window_data: Dict, win_len: int = 60,
+                          stride: Optional[int] = None,
+                          scoreboard: Optional[Scoreboard] = None) -> Dict:
+    """Create a summary for a single window.
 
-def create_window_summary(win_id: int, window_data: Dict, win_len: int = 60) -> Dict:
-    """Create a summary for a single window."""
+    With a scoreboard, scores are looked up at the window's start and end
+    and the window carries the lead changes that happened inside it.
+    """
     comments = window_data.get("comments", [])
     pbp = window_data.get("pbp", [])
     
     # Calculate window timing
-    start_sec = win_id * win_len
+    start_sec = win_id * (stride or win_len)
     end_sec = start_sec + win_len - 1
     
     # Convert to period and clock
@@ -55,11 +206,15 @@ def create_window_summary(win_id: int, window_data: Dict, win_len: int = 60) ->
     secs_into_period = start_sec % 720
     clock_start = f"{11 - secs_into_period // 60:02d}:{59 - secs_into_period % 60:02d}"
     
-    # Calculate scores (simplified - would need more sophisticated logic in practice)
-    score_before = "0-0"  # Placeholder
-    score_after = "0-0"   # Placeholder
+    # Calculate scores
+    if scoreboard is not None:
+        score_before = scoreboard.score_str(start_sec)
+        score_after = scoreboard.score_str(end_sec + 1)
+    else:
+        score_before = "0-0"
+        score_after = "0-0"
     
-    return {
+    summary = {
         "win_id": win_id,
         "period": period,
         "clock_start": clock_start,
@@ -68,27 +223,66 @@ def create_window_summary(win_id: int, window_data: Dict, win_len: int = 60) ->
         "comments": comments,
         "pbp": pbp
     }
+    if scoreboard is not None:
+        summary["lead_changes"] = scoreboard.lead_changes_between(start_sec, end_sec + 1)
+    return summary
 
-def save_windows_to_jsonl(windows: Dict[int, Dict], output_path: Path, win_len: int = 60):
+def save_windows_to_jsonl(windows: Dict[int, Dict], output_path: Path, win_len: int = 60,
+                          stride: Optional[int] = None, scoreboard: Optional[Scoreboard] = None):
     """Save windows to JSONL file."""
     with open(output_path, 'w', encoding='utf-8') as f:
         for win_id in sorted(windows.keys()):
-            window_summary = create_window_summary(win_id, windows[win_id], win_len)
+            window_summary = create_window_summary(win_id, windows[win_id], win_len, stride, scoreboard)
             f.write(json.dumps(window_summary, ensure_ascii=False) + "\n")
 
+def windows_from_records(comments: List[Dict], pbp_events: List[Dict], game_id: str = "",
+                         start_utc: Optional[int] = None, win_len: int = 60,
+                         stride: Optional[int] = None) -> List[Dict]:
+    """Ingest, align and window one game in memory: raw dicts in, window summaries out.
+
+    The same steps as run_pipeline's stages without any files: comment bodies
+    are cleaned (empty ones dropped), comments and PBP get elapsed times, and
+    windows are summarized with the game's running scoreboard. Windows that
+    start after the game is over (scoreboard.game_end_sec) are dropped rather
+    than labeled as ever-later overtimes. The inputs are not modified.
+
+    Args:
+        comments: Reddit comments with body, created_utc, score (author optional)
+        pbp_events: PBP events with period, clock (MM:SS), team, points, desc
+        game_id: Used for team order in scores (e.g. 2019-12-01-LAL-DAL)
+        start_utc: Tip-off in UTC seconds; defaults to the earliest comment
+    """
+    bodies = clean_texts(str(c.get("body", "")) for c in comments)
+    comments = [{"body": body, "created_utc": int(c.get("created_utc", 0)), "score": int(c.get("score", 0)),
+                 "author": str(c.get("author", ""))}
+                for c, body in zip(comments, bodies) if body]
+    if start_utc is None:
+        start_utc = min((c["created_utc"] for c in comments), default=0)
+    comments = add_elapsed_times(comments, start_utc)
+    pbp_events = add_elapsed_times_pbp([dict(e) for e in pbp_events], start_utc)
+
+    windows = build_windows(comments, pbp_events, win_len=win_len, stride=stride)
+    scoreboard = Scoreboard(pbp_events, teams_from_game_id(game_id))
+    end = game_end_sec(pbp_events)
+    return [create_window_summary(w, windows[w], win_len, stride, scoreboard) for w in sorted(windows)
+            if w * (stride or win_len) < end]
+
 def build_windows_legacy(comments: List[Dict], start_utc: int, seconds: int = 60,
                   max_chars: int = 3500, top_k_upvoted: int = 8, sample_extra: int = 12) -> List[Dict]:
     """Group comments into minute windows; select top-K by score plus a sample of others."""
-    # Bucket by minute from start
-    buckets: Dict[int, List[Dict]] = {}
-    for c in comments:
-        t = max(0, int(c["created_utc"]) - start_utc)
-        minute = t // seconds
-        buckets.setdefault(minute, []).append(c)
+    # Bucket by minute from start, highest score first within a minute (ties keep input order)
+    created = np.fromiter((int(c["created_utc"]) for c in comments), dtype=np.int64, count=len(comments))
+    scores = np.fromiter((c.get("score", 0) for c in comments), dtype=np.float64, count=len(comments))
+    minutes = np.maximum(created - start_utc, 0) // seconds
+    order = np.lexsort((-scores, minutes))
+    minutes = minutes[order]
+    starts = np.flatnonzero(np.diff(minutes, prepend=-1))
+    bounds = np.append(starts, len(order)).tolist()
     
     windows = []
-    for minute, group in sorted(buckets.items()):
-        group = sorted(group, key=lambda x: x.get("score", 0), reverse=True)
+    for j, start in enumerate(bounds[:-1]):
+        minute = int(minutes[start])
+        group = [comments[i] for i in order[start:bounds[j + 1]].tolist()]
         topk = group[:top_k_upvoted]
         rest = group[top_k_upvoted:]
         sample = random.sample(rest, k=min(len(rest), sample_extra)) if rest else []
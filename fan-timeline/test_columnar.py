@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test the Parquet storage backend: round trip and game_id / time-range pushdown.
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline import columnar
+from timeline.columnar import list_games, pa, read_table, read_windows, write_windows_jsonl
+from timeline.windowing import build_windows, create_window_summary, save_windows_to_jsonl
+
+def make_game(game_id: str, n_comments: int = 120):
+    comments = [{"body": f"{game_id} comment {i}", "created_utc": 1575249600 + 5 * i,
+                 "score": i % 7, "author": f"user_{i % 5}", "elapsed": 5 * i}
+                for i in range(n_comments)]
+    pbp = [{"period": 1 + (30 * i) // 720, "clock": f"{11 - i // 2:02d}:{(i % 2) * 30:02d}",
+            "team": "LAL" if i % 2 else "DAL", "points": 2 + i % 2, "desc": f"Shot {i}",
+            "game_id": game_id, "elapsed": 30 * i}
+           for i in range(20)]
+    return build_windows(comments, pbp, win_len=60)
+
+def write_dataset(tmp: Path):
+    expected = {}
+    for game_id in ("2019-12-01-LAL-DAL", "2020-01-16-BOS-MIL"):
+        windows = make_game(game_id)
+        jsonl = tmp / f"{game_id}.jsonl"
+        save_windows_to_jsonl(windows, jsonl, 60)
+        write_windows_jsonl(jsonl, tmp / "parquet", game_id)
+        expected[game_id] = [create_window_summary(w, windows[w], 60) for w in sorted(windows)]
+    return expected
+
+def test_round_trip():
+    """read_windows() returns the same windows save_windows_to_jsonl() wrote."""
+    if pa is None:
+        print("pyarrow not installed, skipping")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        expected = write_dataset(Path(tmp))
+        root = Path(tmp) / "parquet"
+        assert list_games(root) == sorted(expected)
+        for game_id, windows in expected.items():
+            got = read_windows(root, game_id)
+            assert json.loads(json.dumps(got)) == json.loads(json.dumps(windows))
+
+def test_pushdown():
+    """game_id and time-range filters select only the matching rows and columns."""
+    if pa is None:
+        print("pyarrow not installed, skipping")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        expected = write_dataset(Path(tmp))
+        root = Path(tmp) / "parquet"
+        game_id = "2020-01-16-BOS-MIL"
+
+        t = read_table(root, "comments", game_ids=[game_id], time_range=(120, 299), columns=["body", "elapsed"])
+        assert t.column_names == ["body", "elapsed"]
+        assert t.num_rows == 36
+        assert all(b.startswith(game_id) for b in t.column("body").to_pylist())
+        assert all(120 <= e <= 299 for e in t.column("elapsed").to_pylist())
+
+        got = read_windows(root, game_id, time_range=(120, 299), comment_columns=("body", "score"))
+        assert [w["win_id"] for w in got] == [2, 3, 4]
+        want = expected[game_id][2:5]
+        for g, w in zip(got, want):
+            assert [c["body"] for c in g["comments"]] == [c["body"] for c in w["comments"]]
+            assert set(g["comments"][0]) == {"body", "score"}
+            assert g["score_before"] == w["score_before"] and g["score_after"] == w["score_after"]
+
+        assert read_table(root, "windows", game_ids=["missing"]).num_rows == 0
+
+def test_cli_stride():
+    """--stride reaches the writer: sliding windows get their real start_sec."""
+    if pa is None:
+        print("pyarrow not installed, skipping")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        game_id = "2019-12-01-LAL-DAL"
+        (Path(tmp) / "windows").mkdir()
+        windows = make_game(game_id)
+        save_windows_to_jsonl(windows, Path(tmp) / "windows" / f"{game_id}.jsonl", 60)
+        argv = sys.argv
+        sys.argv = ["columnar.py", "--data_dir", tmp, "--out", f"{tmp}/parquet", "--stride", "30"]
+        try:
+            columnar.main()
+        finally:
+            sys.argv = argv
+        t = read_table(Path(tmp) / "parquet", "windows", columns=["win_id", "start_sec", "end_sec"])
+        rows = t.to_pylist()
+        assert rows and all(r["start_sec"] == 30 * r["win_id"] and r["end_sec"] == r["start_sec"] + 59
+                            for r in rows)
+
+def main():
+    test_round_trip()
+    test_pushdown()
+    test_cli_stride()
+    print("✅ All columnar tests passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test near-duplicate comment collapsing and the count-weighted sentiment it feeds.
+"""
+
+import random
+import string
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.dedup import candidate_pairs, collapse_comments, dedup_key, jaccard, minhash_signatures, shingles
+from timeline.make_sft import create_sft_pairs
+from timeline.teacher import trimmed_mean_sentiment
+
+def comments_of(*bodies):
+    return [{"body": b, "score": i} for i, b in enumerate(bodies)]
+
+def test_exact_and_near_duplicates():
+    comments = comments_of("Let's get this W!", "lets  get this W", "LET'S GET THIS W!!!!",
+                           "Refs are absolutely terrible tonight", "refs are absolutely terrible tonite",
+                           "W", "w", "Lakers in 5, book it", "Lakers in 6, book it")
+    out = collapse_comments(comments)
+    assert [(c["body"], c["count"]) for c in out] == [
+        ("LET'S GET THIS W!!!!", 3), ("refs are absolutely terrible tonite", 2), ("w", 2),
+        ("Lakers in 5, book it", 1), ("Lakers in 6, book it", 1)]
+    assert dedup_key("Sooooo  GOOD!!") == "soo good"
+
+    # Collapsing again changes nothing; exact-only mode keeps the typo apart
+    assert collapse_comments(out) == out
+    assert len(collapse_comments(comments, threshold=1.0)) == 6
+
+def test_lsh_finds_every_close_pair():
+    """Every key pair at Jaccard >= 0.9 is an LSH candidate (0.985 per pair at 0.8)."""
+    rng = random.Random(0)
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 7))) for _ in range(300)]
+    keys = []
+    for _ in range(150):
+        base = " ".join(rng.choice(words) for _ in range(rng.randint(4, 10)))
+        keys.append(base)
+        keys.append(base + rng.choice(["", " lol", "s", " ok"]))
+    keys = sorted(set(keys))
+    sets = [shingles(k) for k in keys]
+    found = set(candidate_pairs(minhash_signatures(keys)))
+    close = {(i, j) for i in range(len(keys)) for j in range(i + 1, len(keys)) if jaccard(sets[i], sets[j]) >= 0.9}
+    assert close and close <= found
+
+def test_counts_weight_sentiment_and_prompts():
+    loud = ["this is awful", "terrible defense", "awful awful awful"]
+    comments = comments_of(*(["what a beautiful play!"] * 6 + loud))
+    collapsed = collapse_comments(comments)
+    assert len(collapsed) == 4 and collapsed[0]["count"] == 6
+    assert trimmed_mean_sentiment(collapsed) == trimmed_mean_sentiment(comments)
+
+    window = {"period": 1, "clock_start": "12:00", "comments": comments, "pbp": []}
+    prompt = create_sft_pairs([window], "g1", seed=0, dup_threshold=0.8)[0]["input"]
+    assert prompt.count("what a beautiful play!") == 1 and "(x6)" in prompt
+    # Collapsing is opt-in: by default every comment is kept
+    assert create_sft_pairs([window], "g1", seed=0)[0]["input"].count("beautiful") == 6
+
+def main():
+    test_exact_and_near_duplicates()
+    test_lsh_finds_every_close_pair()
+    test_counts_weight_sentiment_and_prompts()
+    print("✅ All dedup tests passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test the one-pass season PBP indexer and seek-based game extraction.
+"""
+
+import csv
+import json
+import os
+import random
+import tempfile
+from pathlib import Path
+
+from extract_mini_pbp import (extract_game_from_csv, index_path_for, load_index, match_game, read_game_rows,
+                              scan_season, season_index)
+
+FIELDS = ["gameid", "actionNumber", "period", "clock", "timeActual", "team", "desc"]
+
+def write_season(path: Path, rng: random.Random):
+    """Three games; the first reappears at the end of the file, some descs span lines."""
+    games = [("0021900301", "2019-12-02T01:40:00Z", ["LAL", "DAL"]),
+             ("0021900302", "2019-12-01T19:00:00Z", ["BOS", "MIA"]),
+             ("0021900777", "2020-02-10T01:10:00Z", ["LAL", "DAL"])]
+    rows = []
+    for gid, ts, teams in games:
+        for i in range(rng.randint(20, 40)):
+            rows.append({"gameid": gid, "actionNumber": i, "period": 1 + i // 10, "clock": "PT11M40.00S",
+                         "timeActual": ts if i == 0 else "", "team": rng.choice(teams + [""]),
+                         "desc": rng.choice(["Made 3PT Jump Shot", "Foul, \"loose ball\"", "Jump Ball\nTip to X", "é"])})
+    rows.append({"gameid": "0021900301", "actionNumber": 99, "period": 4, "clock": "PT00M00.00S",
+                 "timeActual": "", "team": "", "desc": "Game End"})
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=FIELDS)
+        w.writeheader()
+        w.writerows(rows)
+
+def dictreader_rows(path: Path, game_id: str):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [row for row in csv.DictReader(f) if row["gameid"] == game_id]
+
+def test_scan_and_seek_match_full_read():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "pbp2019.csv"
+        write_season(path, random.Random(0))
+        index = scan_season(path)
+        assert sorted(index["games"]) == ["0021900301", "0021900302", "0021900777"]
+        assert len(index["games"]["0021900301"]["spans"]) == 2
+        assert index["games"]["0021900302"]["teams"] == ["BOS", "MIA"]
+        for gid, game in index["games"].items():
+            rows = read_game_rows(path, index, gid)
+            assert rows == dictreader_rows(path, gid)
+            assert game["rows"] == len(rows)
+
+def test_match_game_by_date_and_teams():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "pbp2019.csv"
+        write_season(path, random.Random(1))
+        index = scan_season(path)
+        # Evening tip-off on Dec 1 is stamped Dec 2 UTC
+        lal_dal = {"date": "2019-12-01", "away": "LAL", "home": "DAL"}
+        assert match_game(index, lal_dal) == "0021900301"
+        assert match_game(index, {"date": "2020-02-09", "away": "LAL", "home": "DAL"}) == "0021900777"
+        assert match_game(index, {"date": "2019-12-01", "away": "GSW", "home": "DAL"}) is None
+        assert extract_game_from_csv(path, lal_dal) == dictreader_rows(path, "0021900301")
+
+def test_saved_index_is_reused_until_csv_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "pbp2019.csv"
+        write_season(path, random.Random(2))
+        assert load_index(path) is None
+        index = season_index(path, save=True)
+        assert index_path_for(path).exists()
+        assert load_index(path) == json.loads(json.dumps(index))
+
+        write_season(path, random.Random(3))
+        os.utime(path, ns=(0, 0))
+        assert load_index(path) is None
+        assert season_index(path)["games"]["0021900302"]["rows"] == len(dictreader_rows(path, "0021900302"))
+
+def main():
+    test_scan_and_seek_match_full_read()
+    test_match_game_by_date_and_teams()
+    test_saved_index_is_reused_until_csv_changes()
+    print("✅ All extract_mini_pbp tests passed")
+
+if __name__ == "__main__":
+    main()
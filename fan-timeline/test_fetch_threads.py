@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Test fetch_threads.py against a local stand-in for the Pushshift API.
+"""
+
+import json
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline import fetch_threads
+from timeline.ingest_reddit import process_file
+
+SUBMISSIONS = {
+    "2019-12-01": [
+        {"id": "e4post", "title": "Post Game Thread: The Dallas Mavericks (13-5) defeat the Los Angeles Lakers",
+         "created_utc": 1575258000},
+        {"id": "e4abc1", "title": "Game Thread: LAL @ DAL", "created_utc": 1575246000},
+        {"id": "e4bos1", "title": "GAME THREAD: Boston Celtics (15-4) @ Brooklyn Nets (10-9) - (December 01, 2019)",
+         "created_utc": 1575240000},
+    ],
+    "2020-01-16": [{"id": "eph2x9", "title": "Game Thread: BOS vs MIL", "created_utc": 1579206000}],
+}
+# Several comments share a second so page boundaries land inside a timestamp
+COMMENTS = {
+    "e4abc1": [{"id": f"c{i}", "body": f"LAL comment {i}", "created_utc": 1575249600 + i // 3,
+                "score": i, "author": f"u{i}"} for i in range(25)],
+    "eph2x9": [{"id": f"m{i}", "body": f"MIL comment {i}", "created_utc": 1579209600 + i,
+                "score": i, "author": f"u{i}"} for i in range(7)],
+}
+
+class FakePushshiftHandler(BaseHTTPRequestHandler):
+    """Minimal Pushshift endpoints: submission search and comment search."""
+
+    requests_seen = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        FakePushshiftHandler.requests_seen.append((url.path, params))
+
+        if url.path == "/reddit/search/submission/":
+            date = params.get("after", "")[:10]
+            title = params.get("title", "")
+            data = [s for s in SUBMISSIONS.get(date, []) if title.lower() in s["title"].lower()]
+        elif url.path == "/reddit/comment/search":
+            data = COMMENTS.get(params.get("link_id", ""), [])
+            if "before" in params:
+                data = [c for c in data if c["created_utc"] < int(params["before"])]
+            data = sorted(data, key=lambda c: c["created_utc"], reverse=params.get("sort") == "desc")
+            data = data[:int(params.get("size", len(data)))]
+        else:
+            self.send_error(404)
+            return
+
+        body = json.dumps({"data": data}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fake_pushshift():
+    """Start the stand-in server on a free port; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakePushshiftHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+SCHEDULE = [
+    {"date": "2019-12-01", "away": "LAL", "home": "DAL"},
+    {"date": "2020-01-16", "away": "BOS", "home": "MIL"},
+    {"date": "2021-05-19", "away": "GSW", "home": "LAL"},  # no thread on the server
+]
+
+def test_token_bucket():
+    """Token bucket allows a burst then throttles to the configured rate."""
+    bucket = fetch_threads.TokenBucket(rate=20, capacity=1)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+    assert elapsed >= 0.15, elapsed
+
+def test_paginated_comments():
+    """Small pages still return every comment exactly once."""
+    server, base_url = start_fake_pushshift()
+    try:
+        pages = list(fetch_threads.iter_comment_pages("e4abc1", page_size=4, base_url=base_url))
+        ids = [c["id"] for page in pages for c in page]
+        assert len(pages) > 5
+        assert sorted(ids) == sorted(c["id"] for c in COMMENTS["e4abc1"])
+        assert len(ids) == len(set(ids))
+
+        capped = fetch_threads.fetch_comments("e4abc1", max_comments=10, page_size=4, base_url=base_url)
+        assert len(capped) == 10
+    finally:
+        server.shutdown()
+
+def test_title_matching():
+    """Abbreviations and full names both match; post game threads do not."""
+    assert fetch_threads.is_game_thread_for("Game Thread: LAL @ DAL", "LAL", "DAL")
+    assert fetch_threads.is_game_thread_for(
+        "GAME THREAD: Boston Celtics (15-4) @ Brooklyn Nets (10-9)", "BOS", "BKN")
+    assert not fetch_threads.is_game_thread_for(
+        "Post Game Thread: The Dallas Mavericks defeat the Los Angeles Lakers", "LAL", "DAL")
+    assert not fetch_threads.is_game_thread_for("Game Thread: LAC @ DAL", "LAL", "DAL")
+
+def test_day_thread_index():
+    """All games on a date are matched from one query, cached on disk."""
+    server, base_url = start_fake_pushshift()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            FakePushshiftHandler.requests_seen.clear()
+            index = fetch_threads.DayThreadIndex(Path(tmp), base_url=base_url)
+            assert index.find("2019-12-01", "LAL", "DAL")["id"] == "e4abc1"
+            assert index.find("2019-12-01", "BOS", "BKN")["id"] == "e4bos1"
+            assert index.find("2019-12-01", "GSW", "PHX") is None
+            assert len(FakePushshiftHandler.requests_seen) == 1
+
+            # A fresh index reads the day from the on-disk cache
+            FakePushshiftHandler.requests_seen.clear()
+            index = fetch_threads.DayThreadIndex(Path(tmp), base_url=base_url)
+            assert index.find("2019-12-01", "LAL", "DAL")["id"] == "e4abc1"
+            assert not FakePushshiftHandler.requests_seen
+    finally:
+        server.shutdown()
+
+def test_concurrent_fetch_and_resume():
+    """Thread-pool fetch writes valid files and a resumed run skips them."""
+    server, base_url = start_fake_pushshift()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            out_dir = Path(tmp)
+            stats = fetch_threads.fetch_all(SCHEDULE, out_dir, workers=3, rate=0,
+                                            base_url=base_url, page_size=4)
+            assert stats["games"] == 2
+            assert stats["comments"] == 32
+
+            game_file = out_dir / "2019-12-01-LAL-DAL.jsonl"
+            lines = [json.loads(line) for line in game_file.read_text().splitlines()]
+            assert lines[0]["submission"]["id"] == "e4abc1"
+            assert len(lines) == 1 + 25
+            assert not list(out_dir.glob("*.part"))
+
+            manifest = fetch_threads.load_manifest(out_dir)
+            assert manifest["2019-12-01-LAL-DAL"]["status"] == "ok"
+            assert manifest["2021-05-19-GSW-LAL"]["status"] == "not_found"
+
+            # Only the missing game is retried on resume
+            pending = fetch_threads.pending_games(SCHEDULE, out_dir)
+            assert [g["home"] for g in pending] == ["LAL"]
+
+            # A truncated file is refetched
+            game_file.write_text("{\"game_id\": ")
+            pending = fetch_threads.pending_games(SCHEDULE, out_dir)
+            assert {g["home"] for g in pending} == {"DAL", "LAL"}
+    finally:
+        server.shutdown()
+
+def test_fetch_then_ingest():
+    """A fetched game file ingests to exactly its comments; the header line is not one."""
+    server, base_url = start_fake_pushshift()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            out_dir = Path(tmp)
+            fetch_threads.fetch_all(SCHEDULE[:1], out_dir, workers=1, rate=0, base_url=base_url, page_size=4)
+            game_file = out_dir / "2019-12-01-LAL-DAL.jsonl"
+
+            # Detected by its "submission" key, even if it carried a body
+            lines = game_file.read_text().splitlines()
+            header = json.loads(lines[0])
+            header["body"] = "Game Thread: LAL @ DAL"
+            game_file.write_text("\n".join([json.dumps(header)] + lines[1:]) + "\n")
+
+            expected = sorted((c["body"], c["created_utc"]) for c in COMMENTS["e4abc1"])
+            for stream in (True, False):
+                outfile = out_dir / f"ingested-{stream}.jsonl"
+                assert process_file(game_file, outfile, stream=stream) == 25
+                got = [json.loads(line) for line in outfile.read_text().splitlines()]
+                assert sorted((c["body"], c["created_utc"]) for c in got) == expected
+    finally:
+        server.shutdown()
+
+def main():
+    """Run all tests."""
+    test_token_bucket()
+    test_paginated_comments()
+    test_title_matching()
+    test_day_thread_index()
+    test_concurrent_fetch_and_resume()
+    test_fetch_then_ingest()
+    print("✅ fetch_threads tests passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the streaming Reddit ingest against the whole-file loaders.
+"""
+
+import io
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.ingest_reddit import (
+    iter_json_array, iter_comments, iter_raw_comments, load_reddit_json, load_reddit_jsonl, process_file
+)
+
+TRICKY_COMMENTS = [
+    {"id": "a", "body": "Brackets ] [ and braces } { inside", "created_utc": 10, "score": 1, "author": "x"},
+    {"id": "b", "body": "Escaped \"quote\" and \\ backslash, é 🔥", "created_utc": 11, "score": 2, "author": "y"},
+    {"id": "c", "body": "> quoted line\nreal text https://example.com", "created_utc": 12, "score": 123456789,
+     "author": "z"},
+    {"id": "d", "body": "", "created_utc": 13, "score": 0, "author": "[deleted]"},
+]
+
+def make_thread():
+    return {
+        "game_id": "2019-12-01-LAL-DAL",
+        "submission": {"id": "e4abc1", "title": "Game Thread: LAL @ DAL", "comments": ["not", "these"]},
+        "comments": TRICKY_COMMENTS * 50,
+        "trailing": [1, 2, 3],
+    }
+
+def test_iter_json_array_small_chunks():
+    """Items are decoded correctly even when split across tiny reads."""
+    text = json.dumps(make_thread(), indent=2, ensure_ascii=False)
+    for chunk_size in (1, 7, 64, 1 << 16):
+        items = list(iter_json_array(io.StringIO(text), "comments", chunk_size=chunk_size))
+        assert items == TRICKY_COMMENTS * 50, chunk_size
+
+    assert list(iter_json_array(io.StringIO('{"comments": []}'), "comments")) == []
+    assert list(iter_json_array(io.StringIO('{"other": 5}'), "comments")) == []
+
+def test_streaming_matches_loaders():
+    """Streaming pipeline produces the same comments as the legacy loaders."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        json_path = tmp / "game.json"
+        json_path.write_text(json.dumps(make_thread(), indent=2, ensure_ascii=False), encoding="utf-8")
+        jsonl_path = tmp / "game.jsonl"
+        jsonl_path.write_text("\n".join(json.dumps(c) for c in TRICKY_COMMENTS * 50) + "\n", encoding="utf-8")
+
+        assert list(iter_comments(iter_raw_comments(json_path))) == load_reddit_json(str(json_path))
+        assert list(iter_comments(iter_raw_comments(jsonl_path))) == load_reddit_jsonl(str(jsonl_path))
+
+        streamed, loaded = tmp / "streamed.jsonl", tmp / "loaded.jsonl"
+        process_file(json_path, streamed, stream=True)
+        process_file(json_path, loaded, stream=False)
+        assert streamed.read_bytes() == loaded.read_bytes()
+
+def test_parallel_directory_batch():
+    """Process-pool batch isolates a bad file and keeps results in input order."""
+    from timeline.utils import run_batch
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        jobs = []
+        for name in ("a", "bad", "c"):
+            infile = tmp / f"{name}.json"
+            text = json.dumps(make_thread()) if name != "bad" else '{"comments": [{"body": '
+            infile.write_text(text, encoding="utf-8")
+            jobs.append((infile.name, (infile, tmp / f"{name}.out.jsonl")))
+
+        results = run_batch(process_file, jobs, workers=2)
+        assert [r["name"] for r in results] == ["a.json", "bad.json", "c.json"]
+        assert [r["ok"] for r in results] == [True, False, True]
+        assert results[0]["result"] == 150
+        assert not (tmp / "bad.out.jsonl").exists()
+
+        # The CLI reports the failed file in its exit status
+        out_dir = tmp / "out"
+        proc = subprocess.run([sys.executable, str(Path(__file__).parent / "src/timeline/ingest_reddit.py"),
+                               "--in_dir", str(tmp), "--out_dir", str(out_dir)], capture_output=True, text=True)
+        assert proc.returncode == 1, proc.stdout + proc.stderr
+        assert (out_dir / "a.jsonl").exists() and not (out_dir / "bad.jsonl").exists()
+
+def main():
+    """Run all tests."""
+    test_iter_json_array_small_chunks()
+    test_streaming_matches_loaders()
+    test_parallel_directory_batch()
+    print("✅ ingest_reddit tests passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test the memory-mapped, offset-indexed JSONL reader.
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.jsonl import JsonlFile, index_path_for, read_jsonl
+from validate_sft import validate_sft_file
+
+def write_records(path: Path, n: int, blank_every: int = 7):
+    """n records with occasional blank lines and no trailing newline."""
+    lines = []
+    for i in range(n):
+        lines.append(json.dumps({"i": i, "text": f"window {i} ✓"}, ensure_ascii=False))
+        if i % blank_every == 0:
+            lines.append("   ")
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+def full_read(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def test_random_access_matches_full_read():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "windows.jsonl"
+        write_records(path, 200)
+        expected = full_read(path)
+        with JsonlFile(path) as data:
+            assert len(data) == 200
+            assert list(data) == expected
+            assert data[0] == expected[0] and data[-1] == expected[-1] and data[57] == expected[57]
+            assert data[10:20] == expected[10:20] and data[::50] == expected[::50]
+            assert data.line_number(0) == 1 and data.line_number(1) == 3  # blank line after record 0
+            try:
+                data[200]
+                assert False, "expected IndexError"
+            except IndexError:
+                pass
+
+            ids = data.sample_indices(25, seed=1)
+            assert len(set(ids)) == 25 and ids == data.sample_indices(25, seed=1)
+            assert data.take(ids) == [expected[i] for i in ids]
+
+            train, val = data.split(0.1, seed=0)
+            assert len(val) == 20 and sorted(train + val) == list(range(200))
+            shards = [data.shard(i, 3) for i in range(3)]
+            assert [i for s in shards for i in s] == list(range(200))
+        assert read_jsonl(path, [3, 1]) == [expected[3], expected[1]]
+
+def test_index_is_cached_and_invalidated():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "sft.jsonl"
+        write_records(path, 50)
+        # Nothing is written next to the data unless asked for
+        JsonlFile(path).close()
+        assert not index_path_for(path).exists()
+        JsonlFile(path, cache_index=True).close()
+        assert index_path_for(path).exists()
+
+        # A cached index is used as-is while the file is unchanged
+        with JsonlFile(path, cache_index=True) as data:
+            assert data[49] == {"i": 49, "text": "window 49 ✓"}
+
+        write_records(path, 80, blank_every=3)
+        os.utime(path, ns=(0, 0))
+        with JsonlFile(path, cache_index=True) as data:
+            assert len(data) == 80 and list(data) == full_read(path)
+
+def test_empty_file_and_validate_sample():
+    with tempfile.TemporaryDirectory() as tmp:
+        empty = Path(tmp) / "empty.jsonl"
+        empty.write_text("")
+        with JsonlFile(empty) as data:
+            assert len(data) == 0 and list(data) == []
+
+        path = Path(tmp) / "sft.jsonl"
+        good = {"instruction": "x", "input": "y", "history": [],
+                "output": json.dumps({"timeline": [{"ts": "Q1 12:00", "event": "e", "fan_sentiment": "pos"}]})}
+        path.write_text("\n".join([json.dumps(good)] * 30 + ["{not json"]) + "\n", encoding="utf-8")
+        stats = validate_sft_file(str(path))
+        assert stats["total_lines"] == 31 and stats["valid_schema"] == 30
+        assert stats["errors"][0].startswith("Line 31: JSON decode error")
+        assert validate_sft_file(str(path), sample=5)["total_lines"] == 5
+
+def main():
+    test_random_access_matches_full_read()
+    test_index_is_cached_and_invalidated()
+    test_empty_file_and_validate_sample()
+    print("✅ All jsonl tests passed")
+
+if __name__ == "__main__":
+    main()
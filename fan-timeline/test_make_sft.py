@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test make_sft: per-game shards built in a process pool, seeded sampling and the merge/dedup pass.
+"""
+
+import json
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.make_sft import INSTRUCTION, create_sft_pairs, game_prompts, merge_shards, window_prompt
+from timeline.scoreboard import Scoreboard
+from timeline.windowing import build_windows, create_window_summary
+
+MAKE_SFT = Path(__file__).parent / "src" / "timeline" / "make_sft.py"
+BODIES = ["what a shot", "refs are blind", "LETS GO", "defense is asleep", "MVP MVP", "unreal dunk",
+          "this is painful", "clutch", "bench is cooked", "wow", "terrible turnover", "so good"]
+
+def make_windows(seed: int, n_minutes: int = 8):
+    rng = random.Random(seed)
+    comments = [{"body": rng.choice(BODIES), "score": rng.randint(0, 50), "elapsed": rng.uniform(0, n_minutes * 60)}
+                for _ in range(30 * n_minutes)]
+    pbp = [{"period": 1, "clock": "11:00", "team": rng.choice(["LAL", "DAL"]), "points": rng.choice([0, 2, 3]),
+            "desc": rng.choice(["Made Jump Shot", "Missed Layup", "3PT Made"]), "elapsed": i * 20.0}
+           for i in range(3 * n_minutes)]
+    windows = build_windows(comments, pbp, win_len=60)
+    return [create_window_summary(w, windows[w], 60) for w in sorted(windows)]
+
+def write_windows_dir(root: Path):
+    root.mkdir()
+    for i, game_id in enumerate(["2019-12-01-LAL-DAL", "2020-01-16-BOS-MIL", "2021-05-19-GSW-LAL"]):
+        with open(root / f"{game_id}.jsonl", "w", encoding="utf-8") as f:
+            for w in make_windows(i):
+                f.write(json.dumps(w) + "\n")
+
+def run_make_sft(windows_dir: Path, out: Path, *extra: str):
+    subprocess.run([sys.executable, str(MAKE_SFT), "--windows_dir", str(windows_dir), "--out", str(out), *extra],
+                   check=True, capture_output=True, text=True)
+    return out.read_bytes()
+
+def test_seeded_sampling_is_reproducible():
+    windows = make_windows(0)
+    assert create_sft_pairs(windows, "g1", seed=7) == create_sft_pairs(windows, "g1", seed=7)
+    assert create_sft_pairs(windows, "g1", seed=7) != create_sft_pairs(windows, "g1", seed=8)
+
+def test_game_prompts_match_training_inputs():
+    windows = make_windows(2)
+    pairs = create_sft_pairs(windows, "g1", seed=5)
+    prompts = game_prompts(windows, "g1", seed=5)
+    assert [prompt for _, prompt in prompts] == [f"{INSTRUCTION}\n\n{p['input']}" for p in pairs]
+    assert [w["win_id"] for w, _ in prompts] == [w["win_id"] for w in windows if w["comments"]]
+    pairs = create_sft_pairs(windows, "g1", seed=5, dup_threshold=0.8)
+    prompts = game_prompts(windows, "g1", seed=5, dup_threshold=0.8)
+    assert [prompt for _, prompt in prompts] == [f"{INSTRUCTION}\n\n{p['input']}" for p in pairs]
+
+def test_prompt_carries_margin_and_lead_changes():
+    """The SFT prompt shows the score state the teacher's event text is written from."""
+    pbp = [{"period": 1, "clock": "11:40", "team": "LAL", "points": 2, "desc": "Made Layup", "elapsed": 20},
+           {"period": 1, "clock": "11:10", "team": "DAL", "points": 3, "desc": "3PT Made", "elapsed": 50},
+           {"period": 1, "clock": "10:30", "team": "DAL", "points": 2, "desc": "Dunk", "elapsed": 90}]
+    comments = [{"body": "what a shot", "score": 1, "elapsed": 55}, {"body": "clutch", "score": 2, "elapsed": 95}]
+    windows = build_windows(comments, pbp, win_len=60)
+    board = Scoreboard(pbp, ("LAL", "DAL"))
+    first, second = (create_window_summary(w, windows[w], 60, scoreboard=board) for w in sorted(windows))
+
+    prompt = window_prompt(first, "2019-12-01-LAL-DAL")
+    assert "score_before=0-0 score_after=2-3 margin=-1" in prompt
+    assert "lead_changes=DAL 2-3 Q1 11:10" in prompt
+    prompt = window_prompt(second, "2019-12-01-LAL-DAL")
+    assert "margin=-3" in prompt and "lead_changes=none" in prompt
+    # Windows without score state keep a score-only context
+    assert "lead_changes" not in window_prompt(make_windows(0)[0], "g1")
+
+def test_workers_match_serial_output():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        windows_dir = tmp / "windows"
+        write_windows_dir(windows_dir)
+        serial = run_make_sft(windows_dir, tmp / "serial.jsonl")
+        parallel = run_make_sft(windows_dir, tmp / "parallel.jsonl", "--workers", "2")
+        assert serial == parallel and serial.count(b"\n") > 10
+        assert serial == run_make_sft(windows_dir, tmp / "again.jsonl")
+        assert not (tmp / "parallel.shards").exists()
+
+        sampled = run_make_sft(windows_dir, tmp / "sampled.jsonl", "--max_windows", "3", "--keep_shards")
+        assert sampled.count(b"\n") <= 9
+        assert len(list((tmp / "sampled.shards").glob("*.jsonl"))) == 3
+
+def test_failed_game_exits_nonzero():
+    """A game whose shard fails still merges the others, and the CLI exits 1."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        write_windows_dir(tmp / "windows")
+        (tmp / "windows" / "2022-01-01-NYK-BOS.jsonl").write_text('{"win_id": 0, "comments": [\n')
+        out = tmp / "sft.jsonl"
+        proc = subprocess.run([sys.executable, str(MAKE_SFT), "--windows_dir", str(tmp / "windows"),
+                               "--out", str(out)], capture_output=True, text=True)
+        assert proc.returncode == 1, proc.stdout + proc.stderr
+        assert out.read_bytes()
+
+def test_merge_drops_exact_duplicates():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pairs = create_sft_pairs(make_windows(1), "g1", seed=0)
+        a, b = tmp / "a.jsonl", tmp / "b.jsonl"
+        a.write_text("".join(json.dumps(p, ensure_ascii=False) + "\n" for p in pairs), encoding="utf-8")
+        b.write_text("".join(json.dumps(p, ensure_ascii=False) + "\n" for p in pairs[:3] + pairs[:1]),
+                     encoding="utf-8")
+        merged = merge_shards([a, b], str(tmp / "out" / "sft.jsonl"))
+        assert merged["pairs"] == len(pairs) and merged["duplicates"] == 4
+        assert sum(merged["sentiment_counts"].values()) == len(pairs)
+        assert (tmp / "out" / "sft.jsonl").read_bytes() == a.read_bytes()
+
+def main():
+    test_seeded_sampling_is_reproducible()
+    test_game_prompts_match_training_inputs()
+    test_prompt_carries_margin_and_lead_changes()
+    test_workers_match_serial_output()
+    test_failed_game_exits_nonzero()
+    test_merge_drops_exact_duplicates()
+    print("✅ All make_sft tests passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test parse_pbp: the vectorized CSV loader and the one-pass scoring-run detector.
+"""
+
+import csv
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.parse_pbp import PbpEvent, detect_big_runs, extract_points, load_pbp_csv, load_pbp_frame, parse_clock
+from timeline.utils import mmss_to_secs, secs_to_mmss
+
+def ev(period, clock, team, points, game_id="g1"):
+    return PbpEvent(period=period, clock=clock, team=team, points=points, desc="", game_id=game_id)
+
+def brute_force_runs(events, window_secs=120, min_points=8):
+    """Check every (i, j) pair of scoring events directly, then merge overlapping spans."""
+    scoring = [e for e in events if e.team and e.points > 0]
+    spans = []
+    for i in range(len(scoring)):
+        for j in range(i, len(scoring)):
+            chunk = scoring[i:j + 1]
+            key = (chunk[0].game_id, chunk[0].period, chunk[0].team)
+            if any((e.game_id, e.period, e.team) != key for e in chunk):
+                break
+            if mmss_to_secs(chunk[0].clock) - mmss_to_secs(chunk[-1].clock) > window_secs:
+                break
+            if sum(e.points for e in chunk) >= min_points:
+                spans.append((i, j))
+    merged = []
+    for i, j in sorted(spans):
+        if merged and i <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], j)
+        else:
+            merged.append([i, j])
+    return [(scoring[i].period, scoring[i].clock, scoring[j].clock, scoring[i].team,
+             sum(e.points for e in scoring[i:j + 1])) for i, j in merged]
+
+def as_tuples(runs):
+    return [(r["period"], r["clock"], r["end_clock"], r["team"], r["points"]) for r in runs]
+
+def test_simple_runs():
+    events = [
+        ev(1, "11:40", "LAL", 2), ev(1, "11:20", "LAL", 3), ev(1, "11:00", "LAL", 0),
+        ev(1, "10:45", "LAL", 3), ev(1, "10:30", "DAL", 2),
+        ev(1, "10:00", "DAL", 3), ev(1, "06:00", "DAL", 3), ev(1, "05:30", "DAL", 2),
+        ev(2, "00:40", "LAL", 3), ev(3, "11:50", "LAL", 3), ev(3, "11:30", "LAL", 3),
+    ]
+    runs = detect_big_runs(events)
+    assert [r["run"] for r in runs] == ["LAL 8-0"]
+    assert runs[0]["clock"] == "11:40" and runs[0]["end_clock"] == "10:45"
+
+def test_maximal_run_reported_once():
+    """A long run is one entry, not one per starting event."""
+    events = [ev(1, secs_to_mmss(700 - 15 * i), "BOS", 2) for i in range(8)]
+    runs = detect_big_runs(events)
+    assert as_tuples(runs) == [(1, "11:40", "09:55", "BOS", 16)]
+
+def test_game_boundary_breaks_run():
+    events = [ev(1, "11:00", "LAL", 3, "g1"), ev(1, "10:50", "LAL", 3, "g1"),
+              ev(1, "10:40", "LAL", 3, "g2"), ev(1, "10:30", "LAL", 3, "g2")]
+    assert detect_big_runs(events) == []
+
+def test_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(200):
+        events = []
+        for period in (1, 2):
+            t = 720
+            for _ in range(rng.randint(0, 40)):
+                t = max(0, t - rng.randint(0, 45))
+                events.append(ev(period, secs_to_mmss(t), rng.choice(["LAL", "LAL", "DAL", ""]),
+                                 rng.choice([0, 1, 2, 2, 3])))
+        for window_secs, min_points in [(120, 8), (60, 6), (30, 4)]:
+            assert as_tuples(detect_big_runs(events, window_secs, min_points)) == \
+                   brute_force_runs(events, window_secs, min_points)
+
+def reference_load_pbp_csv(path, game_id):
+    """The original csv.DictReader loader."""
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("type") in ["period", "timeout"]:
+                continue
+            desc = row.get("desc", "")
+            if desc and desc.strip():
+                events.append(PbpEvent(int(row.get("period", 1)), parse_clock(row.get("clock", "PT12M00.00S")),
+                                       row.get("team", ""), extract_points(desc, row.get("team", "")), desc, game_id))
+    return events
+
+CLOCKS = ["PT12M00.00S", "PT11M40.00S", "PT00M05.30S", "PT5M9.9S", "PT07M00S", "", "11:40", "PT1M2M3S"]
+DESCS = ["Made 3PT Jump Shot", "Missed 3PT Jump Shot", "Made 2PT Layup", "Free Throw 1 of 2 Made",
+         "Free Throw 2 of 2 Missed", "Made Dunk", "Made 3PT Free Throw oddity", "Rebound", "   ", "",
+         "Timeout: Regular", "Jump Ball, Made? PT", "Dunk Made, \"quoted\""]
+
+def test_csv_loader_matches_dictreader():
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        for columns in (["gameid", "type", "period", "clock", "team", "desc"], ["period", "clock", "desc"]):
+            path = Path(tmp) / "pbp.csv"
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                w = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+                w.writeheader()
+                for i in range(2000):
+                    w.writerow({"gameid": "g", "type": rng.choice(["shot", "period", "timeout", "", "rebound"]),
+                                "period": str(rng.randint(1, 5)), "clock": rng.choice(CLOCKS),
+                                "team": rng.choice(["LAL", "DAL", ""]), "desc": rng.choice(DESCS)})
+            assert load_pbp_csv(str(path), "g1") == reference_load_pbp_csv(path, "g1")
+            frame = load_pbp_frame(str(path), "g1")
+            assert list(frame.columns) == ["period", "clock", "team", "points", "desc", "game_id"]
+            assert len(frame) == len(reference_load_pbp_csv(path, "g1"))
+
+        empty = Path(tmp) / "empty.csv"
+        empty.write_text("type,period,clock,team,desc\n")
+        assert load_pbp_csv(str(empty), "g1") == []
+
+def main():
+    test_csv_loader_matches_dictreader()
+    test_simple_runs()
+    test_maximal_run_reported_once()
+    test_game_boundary_breaks_run()
+    test_matches_brute_force()
+    print("✅ All parse_pbp tests passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test the cached run_pipeline stages on a tiny synthetic game.
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import run_pipeline
+from timeline.cache import StageCache
+
+GAME_ID = "2019-12-01-LAL-DAL"
+START = 1575249600
+
+def write_game(root: Path):
+    """Raw thread + PBP + schedule for one game under root."""
+    (root / "data/raw").mkdir(parents=True)
+    (root / "data/pbp").mkdir(parents=True)
+    comments = [{"body": f"What a play {i}!", "created_utc": START + 20 * i, "score": i, "author": "u"}
+                for i in range(30)]
+    with open(root / f"data/raw/{GAME_ID}.json", "w") as f:
+        json.dump({"game_id": GAME_ID, "comments": comments}, f)
+    pbp = [{"period": 1, "clock": "11:30", "team": "LAL", "points": 2, "desc": "LeBron 2PT Made", "game_id": GAME_ID},
+           {"period": 1, "clock": "10:45", "team": "DAL", "points": 3, "desc": "Luka 3PT Made", "game_id": GAME_ID}]
+    with open(root / f"data/pbp/{GAME_ID}.jsonl", "w") as f:
+        f.write("\n".join(json.dumps(e) for e in pbp) + "\n")
+    (root / "game_schedule.csv").write_text(f"game_id,start_utc\n{GAME_ID},{START}\n")
+
+def test_stage_cache_reuse():
+    """Second run hits every stage; a code change re-runs only its stage onward."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            os.chdir(tmp)
+            write_game(Path(tmp))
+            cache = StageCache(Path(tmp) / "data/cache")
+            raw = Path("data/raw")
+
+            first = run_pipeline.run_pipeline_for_game(GAME_ID, cache=cache, raw_reddit_dir=raw, label=True)
+            assert set(first["stages"].values()) == {"miss"}
+            assert first["windows"] == 10
+            windows = Path(f"data/windows/{GAME_ID}.jsonl").read_text()
+
+            second = run_pipeline.run_pipeline_for_game(GAME_ID, cache=cache, raw_reddit_dir=raw, label=True)
+            assert set(second["stages"].values()) == {"hit"}
+            assert Path(f"data/windows/{GAME_ID}.jsonl").read_text() == windows
+
+            labels = Path(f"data/labels/{GAME_ID}.jsonl").read_text().splitlines()
+            assert len(labels) == 10
+            assert "timeline" in json.loads(labels[0])
+
+            # Pretend teacher.py changed: only the label stage re-runs
+            real_code_digest = run_pipeline.code_digest
+            run_pipeline.code_digest = lambda *files: real_code_digest(*files) + ("x" if "teacher.py" in files else "")
+            try:
+                third = run_pipeline.run_pipeline_for_game(GAME_ID, cache=cache, raw_reddit_dir=raw, label=True)
+            finally:
+                run_pipeline.code_digest = real_code_digest
+            assert third["stages"] == {"ingest": "hit", "align": "hit", "window": "hit", "label": "miss"}
+        finally:
+            os.chdir(cwd)
+
+def test_window_cache_keyed_by_game():
+    """Two games with identical inputs do not share window summaries."""
+    other = "2019-12-01-DAL-LAL"
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            os.chdir(tmp)
+            root = Path(tmp)
+            write_game(root)
+            (root / f"data/raw/{other}.json").write_text((root / f"data/raw/{GAME_ID}.json").read_text())
+            (root / f"data/pbp/{other}.jsonl").write_text((root / f"data/pbp/{GAME_ID}.jsonl").read_text())
+            with open(root / "game_schedule.csv", "a") as f:
+                f.write(f"{other},{START}\n")
+            cache = StageCache(root / "data/cache")
+            raw = Path("data/raw")
+
+            run_pipeline.run_pipeline_for_game(GAME_ID, cache=cache, raw_reddit_dir=raw)
+            result = run_pipeline.run_pipeline_for_game(other, cache=cache, raw_reddit_dir=raw)
+            assert result["stages"]["align"] == "hit" and result["stages"]["window"] == "miss"
+            last = [json.loads(line) for line in Path(f"data/windows/{GAME_ID}.jsonl").read_text().splitlines()][-1]
+            swapped = [json.loads(line) for line in Path(f"data/windows/{other}.jsonl").read_text().splitlines()][-1]
+            assert last["score_after"] == "2-3" and swapped["score_after"] == "3-2"
+        finally:
+            os.chdir(cwd)
+
+def test_run_all_games_manifest():
+    """Orchestrator runs scheduled games in a pool and records failures in the manifest."""
+    cwd, argv = os.getcwd(), sys.argv
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            os.chdir(tmp)
+            write_game(Path(tmp))
+            with open("game_schedule.csv", "a") as f:
+                f.write(f"2020-01-16-BOS-MIL,{START}\n")  # no inputs on disk
+            sys.argv = ["run_all_games.py", "--workers", "2", "--raw_reddit_dir", "data/raw", "--no_label"]
+            import run_all_games
+            try:
+                run_all_games.main()
+                assert False, "a failed game must exit nonzero"
+            except SystemExit as e:
+                assert e.code == 1
+
+            manifest = json.loads(Path("data/run_manifest.json").read_text())
+            assert manifest["games_ok"] == 1 and manifest["games_failed"] == 1
+            assert manifest["windows"] == 10
+            game = manifest["games"][0]
+            assert game["game_id"] == GAME_ID and game["ok"]
+            assert set(game["timings"]) == {"ingest", "align", "window", "total"}
+
+            # All games ok: normal exit
+            sys.argv += ["--games", GAME_ID]
+            run_all_games.main()
+        finally:
+            os.chdir(cwd)
+            sys.argv = argv
+
+def main():
+    """Run all tests."""
+    test_stage_cache_reuse()
+    test_window_cache_keyed_by_game()
+    test_run_all_games_manifest()
+    print("✅ run_pipeline tests passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test the running scoreboard and the scores / lead changes it gives windows and the teacher.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.scoreboard import MAX_PERIODS, Scoreboard, game_end_sec, teams_from_game_id
+from timeline.teacher import is_lead_change, label_window
+from timeline.windowing import build_windows, create_window_summary
+
+GAME_ID = "2019-12-01-LAL-DAL"
+
+def make_pbp(rng: random.Random, n: int = 300):
+    return [{"period": 1 + i * 10 // 720, "clock": "00:00", "team": rng.choice(["LAL", "DAL", ""]),
+             "points": rng.choice([0, 0, 1, 2, 3]), "desc": rng.choice(["Jump Shot", "3PT Made", "Dunk"]),
+             "elapsed": i * 10 + rng.randint(0, 9)} for i in range(n)]
+
+def test_teams_from_game_id():
+    assert teams_from_game_id(GAME_ID) == ("LAL", "DAL")
+    assert teams_from_game_id("sample-game") is None
+
+def test_game_end():
+    """The game ends with the last PBP event's period, never past the last possible overtime."""
+    assert game_end_sec([{"period": 1}, {"period": 4}, {"period": 2}]) == 4 * 720
+    assert game_end_sec([{"period": 6}]) == 6 * 720
+    assert game_end_sec([]) == game_end_sec([{"period": 99}]) == MAX_PERIODS * 720
+
+def test_scores_match_rescan():
+    """Bisect lookups equal summing every earlier basket directly."""
+    rng = random.Random(0)
+    pbp = make_pbp(rng)
+    rng.shuffle(pbp)
+    board = Scoreboard(pbp, ("LAL", "DAL"))
+    for t in [-5, 0, 1, 59, 60, 61, 500, 1234, 2999, 3000, 10_000]:
+        lal = sum(e["points"] for e in pbp if e["team"] == "LAL" and e["elapsed"] < t)
+        dal = sum(e["points"] for e in pbp if e["team"] == "DAL" and e["elapsed"] < t)
+        assert board.score_at(t) == (lal, dal)
+        assert board.score_str(t) == f"{lal}-{dal}"
+        assert board.margin_at(t) == lal - dal
+
+def test_lead_changes():
+    """Only a switch from one leader to the other counts; ties and the first lead do not."""
+    pbp = [
+        {"team": "LAL", "points": 2, "elapsed": 10, "desc": "Layup"},      # LAL leads (first lead)
+        {"team": "DAL", "points": 2, "elapsed": 20, "desc": "Jump Shot"},  # tie
+        {"team": "LAL", "points": 2, "elapsed": 30, "desc": "Dunk"},       # LAL again: not a change
+        {"team": "DAL", "points": 3, "elapsed": 70, "desc": "3PT Made"},   # DAL 5-4: change
+        {"team": "LAL", "points": 0, "elapsed": 80, "desc": "Miss"},
+        {"team": "LAL", "points": 2, "elapsed": 90, "desc": "Layup"},      # LAL 6-5: change
+    ]
+    board = Scoreboard(pbp, ("LAL", "DAL"))
+    assert [(c["team"], c["score"]) for c in board.lead_changes] == [("DAL", "4-5"), ("LAL", "6-5")]
+    assert board.lead_changes_between(0, 60) == []
+    assert [c["team"] for c in board.lead_changes_between(60, 120)] == ["DAL", "LAL"]
+
+def test_window_summaries_and_teacher():
+    """Windows carry real scores; the teacher reports only true lead changes."""
+    pbp = [
+        {"period": 1, "clock": "11:50", "team": "LAL", "points": 2, "desc": "Layup", "elapsed": 10},
+        {"period": 1, "clock": "11:10", "team": "LAL", "points": 2, "desc": "Jump Shot", "elapsed": 50},
+        {"period": 1, "clock": "10:30", "team": "DAL", "points": 3, "desc": "3PT Made", "elapsed": 90},
+        {"period": 1, "clock": "09:40", "team": "DAL", "points": 3, "desc": "3PT Made", "elapsed": 140},
+    ]
+    comments = [{"body": "wow", "score": 1, "elapsed": 15}]
+    windows = build_windows(comments, pbp, win_len=60)
+    board = Scoreboard(pbp, teams_from_game_id(GAME_ID))
+    summaries = [create_window_summary(w, windows[w], 60, scoreboard=board) for w in sorted(windows)]
+    assert [(s["score_before"], s["score_after"]) for s in summaries] == [("0-0", "4-0"), ("4-0", "4-3"), ("4-3", "4-6")]
+    assert [len(s["lead_changes"]) for s in summaries] == [0, 0, 1]
+
+    # The first window has scoring but no lead change
+    assert is_lead_change(summaries[0]["pbp"], summaries[0]["lead_changes"]) is None
+    assert is_lead_change(summaries[0]["pbp"]) is not None  # legacy fallback without score state
+    assert is_lead_change(summaries[2]["pbp"], summaries[2]["lead_changes"]) == ("DAL", "player", "three-pointer")
+    assert "retake the lead" in label_window(summaries[2])["timeline"][0]["event"]
+    assert "retake the lead" not in label_window(summaries[1])["timeline"][0]["event"]
+
+def main():
+    test_teams_from_game_id()
+    test_game_end()
+    test_scores_match_rescan()
+    test_lead_changes()
+    test_window_summaries_and_teacher()
+    print("✅ All scoreboard tests passed")
+
+if __name__ == "__main__":
+    main()
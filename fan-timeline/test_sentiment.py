@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the memoized VADER sentiment service against direct analyzer calls.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from nltk.sentiment import SentimentIntensityAnalyzer
+from timeline.sentiment import SentimentService, get_service
+from timeline.teacher import trimmed_mean_sentiment, vader_label
+
+SIA = SentimentIntensityAnalyzer()
+
+def sft_bodies():
+    bodies = []
+    with open(Path(__file__).parent / "sft_data.jsonl", encoding="utf-8") as f:
+        for line in f:
+            comments = json.loads(line)["input"].split("[COMMENTS]")[-1]
+            bodies.extend(b.strip() for b in comments.split("•") if b.strip())
+    return bodies
+
+def test_scores_match_analyzer():
+    """Cached batch scores equal per-comment polarity_scores, including whitespace variants."""
+    bodies = sft_bodies()
+    variants = ["  " + b.replace(" ", "\t ") + "\n" for b in bodies[:50]]
+    service = SentimentService()
+    got = service.score_many(bodies + variants)
+    want = [SIA.polarity_scores(b)["compound"] for b in bodies + variants]
+    assert got == want
+    stats = service.stats()
+    assert stats["texts"] == len(bodies) + 50
+    assert stats["misses"] == len(set(" ".join(b.split()) for b in bodies))
+    assert stats["hit_rate"] > 0.9
+    assert service.score("GREAT game!!!") != service.score("great game")
+
+def test_lru_bound():
+    """The cache never holds more than maxsize entries and evicts least recently used."""
+    service = SentimentService(maxsize=3)
+    service.score_many(["a good game", "bad refs", "ok"])
+    service.score("a good game")  # "bad refs" is now least recently used
+    service.score("great dunk")
+    assert service.stats()["cached"] == 3
+    misses = service.stats()["misses"]
+    service.score("a good game")
+    assert service.stats()["misses"] == misses
+    service.score("bad refs")
+    assert service.stats()["misses"] == misses + 1
+    service.clear()
+    assert service.stats()["calls"] == 0 and service.stats()["cached"] == 0
+
+def test_warm_not_counted_as_hits():
+    """Pre-scored texts are cached but do not inflate the hit rate."""
+    service = SentimentService()
+    assert service.warm(["nice pass", "nice  pass", "awful call"]) == 2
+    assert service.stats()["calls"] == 0 and service.stats()["cached"] == 2
+    service.score_many(["nice pass", "awful call", "new take"])
+    stats = service.stats()
+    assert (stats["hits"], stats["warm_hits"], stats["misses"], stats["warmed"]) == (0, 2, 1, 2)
+    assert stats["hit_rate"] == 0.0
+    service.score("nice pass")
+    assert service.stats()["hits"] == 1 and service.stats()["warm_hits"] == 2
+
+def test_process_pool():
+    """The process-pool path returns the same scores in the same order."""
+    texts = [f"{b} #{i}" for i, b in enumerate(sft_bodies()[:400])]
+    service = SentimentService(workers=2, pool_min=100)
+    try:
+        assert service.score_many(texts) == [SIA.polarity_scores(t)["compound"] for t in texts]
+    finally:
+        service.close()
+
+def test_teacher_labels_unchanged():
+    """teacher.py labels through the service match labels from raw scores."""
+    import numpy as np
+
+    def reference(comments):
+        scores = sorted((SIA.polarity_scores(c["body"])["compound"] for c in comments if c["body"].strip()), key=abs)
+        if not scores:
+            return "mixed"
+        trim = max(1, int(len(scores) * 0.1))
+        trimmed = scores[trim:-trim] if len(scores) > 2 * trim else scores
+        mean = np.mean(trimmed)
+        return "pos" if mean > 0.25 else "neg" if mean < -0.25 else "mixed"
+
+    bodies = sft_bodies()
+    for i in range(0, len(bodies), 25):
+        comments = [{"body": b} for b in bodies[i:i + 25]] + [{"body": "  "}]
+        assert trimmed_mean_sentiment(comments) == reference(comments)
+    assert vader_label("What a block!") == vader_label("What  a block! ")
+    assert get_service().stats()["hits"] > 0
+
+def main():
+    test_scores_match_analyzer()
+    test_lru_bound()
+    test_warm_not_counted_as_hits()
+    test_process_pool()
+    test_teacher_labels_unchanged()
+    print("✅ All sentiment tests passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test the timeline API: typed and NDJSON request bodies, work run in the worker pool, and request validation.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+os.environ.setdefault("TIMELINE_WORKERS", "1")
+
+from fastapi.testclient import TestClient
+
+from bench_serve import legacy_payload, make_payload
+from timeline.serve import app, build_timeline, read_upload
+
+def ndjson(payload: dict) -> bytes:
+    header = {"game_id": payload["game_id"], "pbp": payload["pbp"], "start_utc": payload["start_utc"]}
+    return "".join(json.dumps(obj) + "\n" for obj in [header] + payload["comments"]).encode()
+
+def test_generate_runs_in_pool():
+    payload = make_payload(400)
+    with TestClient(app) as client:
+        r = client.post("/v1/timeline/generate", json=payload)
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert body["game_id"] == payload["game_id"] and body["timeline"]
+        expected = build_timeline(payload["game_id"], payload["comments"], payload["pbp"], payload["start_utc"])
+        assert body["timeline"] == expected["timeline"]
+
+        # The deprecated JSON-string fields, as a bare list or a fetched thread object
+        legacy = legacy_payload(payload)
+        assert client.post("/v1/timeline/generate", json=legacy).json()["timeline"] == body["timeline"]
+        wrapped = dict(legacy, reddit_thread_json=json.dumps({"comments": payload["comments"]}))
+        assert client.post("/v1/timeline/generate", json=wrapped).json()["timeline"] == body["timeline"]
+
+        # NDJSON upload, plain and gzipped
+        raw = ndjson(payload)
+        r = client.post("/v1/timeline/upload", content=raw, headers={"Content-Type": "application/x-ndjson"})
+        assert r.status_code == 200, r.text
+        assert r.json()["timeline"] == body["timeline"]
+        r = client.post("/v1/timeline/upload", content=gzip.compress(raw),
+                        headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"})
+        assert r.json()["timeline"] == body["timeline"]
+
+def test_upload_streams_in_chunks():
+    payload = make_payload(50)
+    raw = gzip.compress(ndjson(payload))
+
+    async def chunks(size):
+        for i in range(0, len(raw), size):
+            yield raw[i:i + size]
+
+    for size in (1, 7, 4096):
+        header, comments = asyncio.run(read_upload(chunks(size), gzipped=True, batch=16))
+        assert header.game_id == payload["game_id"] and comments == payload["comments"]
+
+def test_postgame_windows_dropped():
+    """Comments after the game is over get no window, not an ever-later "OT<n>" label."""
+    from timeline.teacher import label_window
+
+    start = 1_000_000
+    game_id = "2023-01-01-BOS-NYK"
+    comments = [{"body": "what a game", "created_utc": start + 30},
+                {"body": "still here after the final", "created_utc": start + 3 * 3600 + 600}]
+    result = build_timeline(game_id, comments, [], start)
+    assert [e["ts"] for e in result["timeline"]] == ["Q1 11:59"]
+
+    # With PBP the game ends with the last event's period: no overtime here
+    pbp = [{"period": 4, "clock": "00:30", "team": "BOS", "points": 2, "desc": "Layup"}]
+    comments.append({"body": "overtime??", "created_utc": start + 4 * 720 + 90})
+    result = build_timeline(game_id, comments, pbp, start)
+    assert [e["ts"] for e in result["timeline"]] == ["Q1 11:59", "Q4 00:59"]
+    with TestClient(app) as client:
+        r = client.post("/v1/timeline/generate", json={"game_id": game_id, "comments": comments,
+                                                       "pbp": pbp, "start_utc": start})
+        assert r.status_code == 200, r.text
+        assert [e["ts"] for e in r.json()["timeline"]] == ["Q1 11:59", "Q4 00:59"]
+
+    assert label_window({"period": 16, "clock_start": "01:59", "comments": comments, "pbp": []}) == {"timeline": []}
+
+def test_import_does_not_load_numpy():
+    """NumPy is only loaded by the workers that window a game (see bench_import.py)."""
+    code = "import sys, timeline.serve; sys.exit('numpy' in sys.modules)"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parent / "src")
+    assert proc.returncode == 0
+
+def test_bad_requests():
+    payload = make_payload(10)
+    with TestClient(app) as client:
+        legacy = legacy_payload(payload)
+        r = client.post("/v1/timeline/generate", json=dict(legacy, pbp_json="{not json"))
+        assert r.status_code == 400 and r.json()["detail"] == "Invalid JSON in request"
+        assert client.post("/v1/timeline/generate", json=dict(payload, pbp=None)).status_code == 400
+        assert client.post("/v1/timeline/generate", json=dict(legacy, pbp_json='{"a": 1}')).status_code == 422
+        bad = dict(payload, comments=[{"body": "no timestamp"}])
+        assert client.post("/v1/timeline/generate", json=bad).status_code == 422
+        bad_clock = dict(payload, pbp=[dict(payload["pbp"][0], clock="12.00")])
+        assert client.post("/v1/timeline/generate", json=bad_clock).status_code == 422
+        assert client.post("/v1/timeline/upload", content=ndjson(bad_clock)).status_code == 422
+
+        raw = ndjson(payload).splitlines()
+        r = client.post("/v1/timeline/upload", content=b"\n".join(raw[:4] + [b'{"body": 1'] + raw[4:]))
+        assert r.status_code == 400 and r.json()["detail"].startswith("Line 5:")
+        r = client.post("/v1/timeline/upload", content=b"\n".join(raw[:3] + [b'{"body": "x"}']))
+        assert r.status_code == 422 and r.json()["detail"].startswith("Line 4:")
+        # The final line is checked by the end-of-stream flush
+        r = client.post("/v1/timeline/upload", content=b"\n".join(raw + [b'{"body": "x", "created_utc": 1']))
+        assert r.status_code == 400 and r.json()["detail"].startswith(f"Line {len(raw) + 1}:")
+        r = client.post("/v1/timeline/upload", content=b"\n".join(raw + [b'{"body": "x"}']) + b"\n")
+        assert r.status_code == 422 and r.json()["detail"].startswith(f"Line {len(raw) + 1}:")
+        # Valid alone, too deeply nested inside the batch array
+        deep = b'{"body": "x", "created_utc": 1, "extra": ' + b"[" * 200 + b"]" * 200 + b"}"
+        r = client.post("/v1/timeline/upload", content=b"\n".join(raw + [deep]))
+        assert r.status_code == 400
+        r = client.post("/v1/timeline/upload", content=gzip.compress(b"\n".join(raw))[:-20],
+                        headers={"Content-Encoding": "gzip"})
+        assert r.status_code == 400
+        assert client.post("/v1/timeline/upload", content=b"").status_code == 400
+        assert client.get("/health").json()["status"] == "healthy"
+
+def main():
+    test_generate_runs_in_pool()
+    test_upload_streams_in_chunks()
+    test_postgame_windows_dropped()
+    test_import_does_not_load_numpy()
+    test_bad_requests()
+    print("✅ All serve tests passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test utils.clean_text / clean_texts against the original chained-regex cleaner.
+"""
+
+import json
+import random
+import re
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.utils import clean_text, clean_texts
+
+def reference_clean_text(s: str) -> str:
+    """The original four-pass implementation, kept as the golden reference."""
+    s = re.sub(r"https?://\S+", "", s)
+    s = re.sub(r"`[^`]+`", "", s)
+    s = re.sub(r">+\s.*$", "", s, flags=re.MULTILINE)
+    s = s.replace("\u00a0", " ")
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+GOLDEN = [
+    "",
+    "   ",
+    "LeBron is absolutely cooking tonight! 🔥",
+    "Refs are blind",
+    "watch https://streamable.com/abc123 now",
+    "http://a.b`c` d",
+    "`a https://x` b`",
+    "use `code` and ``empty`` and `unterminated",
+    "> quoted reply\nactual comment",
+    ">>nested quote\n> another\nreal",
+    ">\nline after bare quote marker\nkept?",
+    "3 > 2 and 5 >= 4",
+    "tabs\tand\r\nwindows\x0bnewlines\x1c em\u2003space",
+    "no-break\u00a0space\u00a0>\u00a0quote after nbsp",
+    "trailing url http://x.y/z?q=1&r=`2`",
+]
+
+def sft_comment_bodies():
+    """Comment lines from the checked-in SFT data, if present."""
+    path = Path(__file__).parent / "sft_data.jsonl"
+    if not path.exists():
+        return []
+    bodies = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            prompt = json.loads(line)["input"]
+            bodies.extend(b.strip() for b in prompt.split("[COMMENTS]", 1)[-1].split("•") if b.strip())
+    return bodies
+
+def test_golden_corpus():
+    """clean_text matches the original cleaner on hand-picked edge cases and real bodies."""
+    corpus = GOLDEN + sft_comment_bodies()
+    for s in corpus:
+        assert clean_text(s) == reference_clean_text(s), repr(s)
+    assert clean_texts(corpus) == [reference_clean_text(s) for s in corpus]
+
+def test_random_fuzz():
+    """Random strings over the characters each pass reacts to."""
+    rng = random.Random(1234)
+    alphabet = ["a", "b", " ", "\n", "\t", "\u00a0", "`", ">", "http", "https://", "://", "x.y", "\u2003", "é"]
+    corpus = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30))) for _ in range(20000)]
+    assert clean_texts(corpus) == [reference_clean_text(s) for s in corpus]
+
+def main():
+    """Run all tests."""
+    test_golden_corpus()
+    test_random_fuzz()
+    print("✅ clean_text tests passed")
+
+if __name__ == "__main__":
+    main()
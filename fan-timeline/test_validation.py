@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test the compiled timeline validator against jsonschema: same verdicts, same messages.
+"""
+
+import json
+import random
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import jsonschema
+
+from timeline.validation import TimelineValidator, compile_schema, get_validator, validate, validate_many
+
+SCHEMA = json.loads((Path(__file__).parent / "schema" / "timeline.schema.json").read_text())
+
+def mutations(rng: random.Random):
+    """Valid timelines with one thing broken (or not)."""
+    values = [None, True, 0, 1.5, "", "x", "Q1 10:32", "OT 01:00", "OT2 00:05", "Q5 01:00", "00:00–00:59",
+              "q1 10:32", "Q1 1:32", "pos", "neg", "mixed", "POS", "ok then", "x" * 161, [], {}, ["a"]]
+    keys = ["ts", "event", "fan_sentiment", "extra", "game_id", "timeline", "top_themes", "notes"]
+    for _ in range(3000):
+        doc = {"game_id": "2019-12-01-LAL-DAL",
+               "timeline": [{"ts": "Q1 10:32", "event": "LeBron opens the scoring.", "fan_sentiment": "pos"}
+                            for _ in range(rng.randint(0, 3))],
+               "top_themes": ["3PT streaks", "bench impact"][:rng.randint(0, 2)]}
+        target = rng.choice([doc] + doc["timeline"] + ([doc["top_themes"]] if doc["top_themes"] else []))
+        if isinstance(target, list):
+            target.extend(rng.choice([["t"] * 5, [1], []]))
+        elif rng.random() < 0.2:
+            target.pop(rng.choice(list(target)), None)
+        else:
+            target[rng.choice(keys)] = rng.choice(values)
+        yield rng.choice([doc, doc, doc, doc.get("timeline"), "not a timeline"])
+
+def test_matches_jsonschema():
+    validator = TimelineValidator(SCHEMA)
+    assert validator._fast is not None  # the contract compiles to the fast path
+    reference = jsonschema.Draft202012Validator(SCHEMA)
+    docs = list(mutations(random.Random(0)))
+    verdicts = validator.validate_many(docs)
+    assert 0 < sum(ok for ok, _ in verdicts) < len(docs)
+    for doc, (ok, message) in zip(docs, verdicts):
+        assert ok == reference.is_valid(doc), doc
+        if not ok:
+            try:
+                jsonschema.validate(doc, SCHEMA)
+            except jsonschema.ValidationError as e:
+                assert message == str(e)
+
+def test_unsupported_keywords_fall_back():
+    schema = {"type": "object", "properties": {"n": {"type": ["integer", "null"], "minimum": 0}}}
+    validator = compile_schema(schema)
+    assert validator._fast is None and compile_schema(schema) is validator
+    assert validate({"n": None}, schema) == (True, "Valid")
+    assert not validate({"n": -1}, schema)[0]
+    try:
+        TimelineValidator({"type": "nope"})
+        assert False, "invalid schema accepted"
+    except jsonschema.SchemaError:
+        pass
+
+def test_default_schema_is_cached():
+    assert get_validator() is get_validator() and get_validator().schema == SCHEMA
+    assert get_validator("missing/schema.json") is None
+    doc = {"game_id": "g", "timeline": [{"ts": "Q9 00:00", "event": "Tip", "fan_sentiment": "pos"}]}
+    ok, message = validate(doc)
+    assert not ok and "does not match" in message
+    assert validate_many([{"game_id": "g", "timeline": []}, doc]) == [(True, "Valid"), (False, message)]
+
+def main():
+    test_matches_jsonschema()
+    test_unsupported_keywords_fall_back()
+    test_default_schema_is_cached()
+    print("✅ All validation tests passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test the vectorized and sliding windowing against the original loops / a direct scan.
+"""
+
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.utils import truncate_tokens
+from timeline.windowing import (build_sliding_index, build_window_index, build_windows,
+                                build_windows_legacy, create_window_summary, elapsed_array)
+
+def reference_build_windows(comments: List[Dict], pbp_events: List[Dict], win_len: int = 60) -> Dict[int, Dict]:
+    """The original dict-of-lists implementation."""
+    windows = {}
+    for c in comments:
+        if 'elapsed' not in c:
+            continue
+        win = int(c["elapsed"] // win_len)
+        if win not in windows:
+            windows[win] = {"comments": [], "pbp": []}
+        windows[win]["comments"].append(c)
+    for e in pbp_events:
+        if 'elapsed' not in e:
+            continue
+        win = int(e["elapsed"] // win_len)
+        if win not in windows:
+            windows[win] = {"comments": [], "pbp": []}
+        windows[win]["pbp"].append(e)
+    return windows
+
+def reference_build_windows_legacy(comments, start_utc, seconds=60, max_chars=3500, top_k_upvoted=8, sample_extra=12):
+    """The original sort-each-bucket implementation."""
+    buckets = {}
+    for c in comments:
+        t = max(0, int(c["created_utc"]) - start_utc)
+        buckets.setdefault(t // seconds, []).append(c)
+    windows = []
+    for minute, group in sorted(buckets.items()):
+        group = sorted(group, key=lambda x: x.get("score", 0), reverse=True)
+        topk = group[:top_k_upvoted]
+        rest = group[top_k_upvoted:]
+        sample = random.sample(rest, k=min(len(rest), sample_extra)) if rest else []
+        chosen = topk + sample
+        text = truncate_tokens("\n".join(f"• {c['body']}" for c in chosen), max_chars)
+        windows.append({"minute": int(minute), "window_label": f"{minute:02d}:00–{minute:02d}:59",
+                        "comments": chosen, "comments_text": text})
+    return windows
+
+def make_game(rng: random.Random, n_comments: int, n_pbp: int):
+    comments = []
+    for i in range(n_comments):
+        c = {"body": f"comment {i}", "created_utc": 1575249600 + rng.randint(-120, 3000),
+             "score": rng.randint(-3, 10)}
+        # Mix of ints, floats, negatives (pre-tip) and unaligned comments
+        if rng.random() < 0.95:
+            c["elapsed"] = c["created_utc"] - 1575249600 + (0.5 if i % 7 == 0 else 0)
+        comments.append(c)
+    pbp = [{"desc": f"event {i}", "elapsed": rng.randint(0, 2880)} for i in range(n_pbp)]
+    return comments, pbp
+
+def test_build_windows_equivalence():
+    """Same window ids, same members in the same order, identical objects."""
+    rng = random.Random(0)
+    for n_comments, n_pbp, win_len in [(0, 0, 60), (1, 0, 60), (0, 3, 60), (500, 40, 60), (2000, 100, 10), (300, 20, 7)]:
+        comments, pbp = make_game(rng, n_comments, n_pbp)
+        want = reference_build_windows(comments, pbp, win_len)
+        got = build_windows(comments, pbp, win_len)
+        assert list(got) == sorted(want)
+        for win, w in want.items():
+            assert all(a is b for a, b in zip(got[win]["comments"], w["comments"]))
+            assert len(got[win]["comments"]) == len(w["comments"])
+            assert all(a is b for a, b in zip(got[win]["pbp"], w["pbp"]))
+            assert len(got[win]["pbp"]) == len(w["pbp"])
+
+def test_window_index_slices():
+    """Index ranges cover every aligned comment exactly once."""
+    comments, pbp = make_game(random.Random(1), 1000, 50)
+    index = build_window_index(elapsed_array(comments), elapsed_array(pbp))
+    aligned = sum(1 for c in comments if "elapsed" in c)
+    assert int(index.comment_counts().sum()) == aligned
+    seen = sorted(i for k in range(len(index)) for i in index.comment_indices(k).tolist())
+    assert seen == [i for i, c in enumerate(comments) if "elapsed" in c]
+    assert list(index.win_ids) == sorted(index.win_ids)
+
+def brute_force_sliding(items: List[Dict], win_len: int, stride: int, from_tipoff: bool = True) -> Dict[int, List[Dict]]:
+    """Every window [k * stride, k * stride + win_len) by direct scan, members in time order.
+
+    Sliding windows start at k = 0; disjoint bins (from_tipoff=False) also keep pre-tip ones.
+    """
+    timed = sorted((x for x in items if "elapsed" in x), key=lambda x: x["elapsed"])
+    if not timed:
+        return {}
+    out = {}
+    first = int(timed[0]["elapsed"] // stride) - win_len // stride - 1
+    for k in range(max(0, first) if from_tipoff else first, int(timed[-1]["elapsed"] // stride) + 1):
+        members = [x for x in timed if k * stride <= x["elapsed"] < k * stride + win_len]
+        if members:
+            out[k] = members
+    return out
+
+def test_sliding_windows():
+    """Two-pointer windows match a direct scan and share the input dicts."""
+    rng = random.Random(3)
+    for n_comments, win_len, stride in [(0, 60, 10), (1, 60, 10), (800, 60, 10), (800, 60, 20), (400, 30, 45), (300, 60, 60)]:
+        comments, _ = make_game(rng, n_comments, 0)
+        want = brute_force_sliding(comments, win_len, stride, from_tipoff=stride != win_len)
+        got = build_windows(comments, [], win_len, stride=stride)
+        if stride == win_len:
+            # Disjoint bins keep input order within a window
+            assert {k: sorted(id(c) for c in w["comments"]) for k, w in got.items()} == \
+                   {k: sorted(id(c) for c in w) for k, w in want.items()}
+            continue
+        assert list(got) == list(want)
+        for k, members in want.items():
+            assert len(got[k]["comments"]) == len(members)
+            assert all(a is b for a, b in zip(got[k]["comments"], members))
+
+def test_sliding_pbp_only_windows():
+    """Windows holding only PBP are kept; empty windows are dropped."""
+    pbp = [{"desc": "tip", "elapsed": 0}, {"desc": "late", "elapsed": 600}]
+    index = build_sliding_index(elapsed_array([]), elapsed_array(pbp), win_len=60, stride=30)
+    assert list(index.win_ids) == [0, 19, 20]
+    assert [len(index.pbp_indices(k)) for k in range(len(index))] == [1, 1, 1]
+
+def test_sliding_windows_start_at_tipoff():
+    """Comments at or before tip-off never open a window with a negative start."""
+    comments = [{"body": "pregame", "elapsed": -30}, {"body": "tip", "elapsed": 0}, {"body": "early", "elapsed": 15}]
+    windows = build_windows(comments, [], win_len=60, stride=10)
+    assert list(windows) == [0, 1]
+    assert [c["body"] for c in windows[0]["comments"]] == ["tip", "early"]
+    summary = create_window_summary(0, windows[0], 60, 10)
+    assert summary["period"] == 1 and summary["clock_start"] == "11:59"
+
+def test_build_windows_legacy_equivalence():
+    """Same buckets, ordering and random sample for the same seed."""
+    comments, _ = make_game(random.Random(2), 3000, 0)
+    random.seed(42)
+    want = reference_build_windows_legacy(comments, 1575249600)
+    random.seed(42)
+    got = build_windows_legacy(comments, 1575249600)
+    assert got == want
+    assert build_windows_legacy([], 1575249600) == []
+
+def main():
+    test_build_windows_equivalence()
+    test_window_index_slices()
+    test_sliding_windows()
+    test_sliding_pbp_only_windows()
+    test_sliding_windows_start_at_tipoff()
+    test_build_windows_legacy_equivalence()
+    print("✅ All windowing tests passed")
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,21 @@ Validate SFT data quality and schema.
 
 import json
 import argparse
+import sys
 from pathlib import Path
 from typing import Dict, List
 
-def validate_sft_file(file_path: str) -> Dict:
-    """Validate SFT file and return statistics."""
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from timeline.jsonl import JsonlFile
+
+def validate_sft_file(file_path: str, sample: int = 0, seed: int = 0) -> Dict:
+    """Validate SFT file and return statistics.
+
+    With sample, only that many randomly chosen records are parsed and checked.
+    Blank lines are skipped.
+    """
     stats = {
         "total_lines": 0,
         "valid_json": 0,
@@ -17,13 +27,15 @@ def validate_sft_file(file_path: str) -> Dict:
         "errors": []
     }
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, 1):
+    with JsonlFile(file_path) as sft:
+        indices = sorted(sft.sample_indices(sample, seed)) if sample else range(len(sft))
+        for i in indices:
+            line_num = sft.line_number(i)
             stats["total_lines"] += 1
             
             try:
                 # Parse JSON
-                data = json.loads(line.strip())
+                data = json.loads(sft.raw(i))
                 stats["valid_json"] += 1
                 
                 # Validate schema
@@ -78,6 +90,8 @@ def validate_sft_pair(data: Dict) -> bool:
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("sft_file", help="Path to SFT data file")
+    ap.add_argument("--sample", type=int, default=0, help="Validate a random sample of this many records")
+    ap.add_argument("--seed", type=int, default=0, help="Seed for --sample")
     args = ap.parse_args()
     
     if not Path(args.sft_file).exists():
@@ -85,7 +99,7 @@ def main():
         return 1
     
     print(f"Validating {args.sft_file}...")
-    stats = validate_sft_file(args.sft_file)
+    stats = validate_sft_file(args.sft_file, args.sample, args.seed)
     
     print(f"\n{'='*50}")
     print("Validation Results")